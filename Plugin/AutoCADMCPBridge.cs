@@ -1,4 +1,5 @@
 using System;
+using System.IO;
 using System.Net;
 using System.Net.Sockets;
 using System.Threading;
@@ -23,11 +24,17 @@ namespace AutoCADMCP
     {
         private TcpListener _listener;
         private CancellationTokenSource _cancellationTokenSource;
-        private const int Port = 6400;
+        private const int DefaultPort = 6400;
+        // Further ports tried when another AutoCAD instance already listens on the configured one
+        private const int PortAttempts = 10;
+        private int _port;
+        // Shared secret clients have to send in HELLO before any other request, or null
+        private string _token;
         private bool _isRunning;
-        private static readonly object lockObj = new object();
-        private static readonly Dictionary<string, (string commandJson, TaskCompletionSource<string> tcs)> commandQueue = new();
-        private static Dictionary<string, (MethodInfo method, object instance)> commandHandlers = new();
+        private static readonly CommandQueue commandQueue = new();
+        private static readonly CommandDispatcher dispatcher = new(commandQueue, ProcessCommand);
+        private static readonly IdempotencyCache idempotencyCache = new(256, TimeSpan.FromMinutes(10));
+        private static Dictionary<string, (MethodInfo method, object instance, MCPCommandAttribute attribute)> commandHandlers = new();
 
         public AutoCADMCPBridge()
         {
@@ -48,9 +55,10 @@ namespace AutoCADMCP
             {
                 _cancellationTokenSource = new CancellationTokenSource();
                 StartTcpListener();
-                Application.Idle += ProcessCommands;
+                DrawingRevision.AttachAll();
+                dispatcher.Start();
                 _isRunning = true;
-                Log.Info($"MCP Bridge started on port {Port}");
+                Log.Info($"MCP Bridge started on port {_port} ({(dispatcher.Sliced ? $"{dispatcher.SliceBudget.TotalMilliseconds} ms slices" : "idle dispatch")})");
             }
             catch (System.Exception ex)
             {
@@ -69,7 +77,9 @@ namespace AutoCADMCP
             try
             {
                 StopListener();
-                Application.Idle -= ProcessCommands;
+                dispatcher.Stop();
+                SessionCommands.AbortActive();
+                DrawingRevision.DetachAll();
             }
             catch (System.Exception ex)
             {
@@ -81,8 +91,7 @@ namespace AutoCADMCP
         {
             try
             {
-                _listener = new TcpListener(IPAddress.Loopback, Port);
-                _listener.Start();
+                _listener = CreateListener();
 
                 while (!_cancellationTokenSource.Token.IsCancellationRequested)
                 {
@@ -108,6 +117,49 @@ namespace AutoCADMCP
             }
         }
 
+        // Several AutoCAD instances can run side by side, so the first free port starting
+        // at AUTOCAD_MCP_PORT (6400 by default) is used. The bridge only accepts local
+        // connections unless AUTOCAD_MCP_BIND names another address to listen on, which
+        // requires a shared token in AUTOCAD_MCP_TOKEN that clients send in their HELLO.
+        private TcpListener CreateListener()
+        {
+            var configuredPort = Environment.GetEnvironmentVariable("AUTOCAD_MCP_PORT");
+            int basePort = int.TryParse(configuredPort, out var parsedPort) ? parsedPort : DefaultPort;
+
+            var configuredToken = Environment.GetEnvironmentVariable("AUTOCAD_MCP_TOKEN");
+            _token = string.IsNullOrEmpty(configuredToken) ? null : configuredToken;
+
+            var configuredAddress = Environment.GetEnvironmentVariable("AUTOCAD_MCP_BIND");
+            var address = IPAddress.Loopback;
+            if (!string.IsNullOrEmpty(configuredAddress))
+            {
+                address = IPAddress.Parse(configuredAddress);
+                if (!IPAddress.IsLoopback(address))
+                {
+                    if (_token == null)
+                    {
+                        throw new InvalidOperationException($"Refusing to listen on {address} without a token in AUTOCAD_MCP_TOKEN");
+                    }
+                    Log.Info($"MCP Bridge accepts remote connections on {address} from clients with the token");
+                }
+            }
+
+            for (int attempt = 0; ; attempt++)
+            {
+                var listener = new TcpListener(address, basePort + attempt);
+                try
+                {
+                    listener.Start();
+                    _port = basePort + attempt;
+                    return listener;
+                }
+                catch (SocketException ex) when (ex.SocketErrorCode == SocketError.AddressAlreadyInUse && attempt + 1 < PortAttempts)
+                {
+                    Log.Info($"Port {basePort + attempt} is in use, trying {basePort + attempt + 1}");
+                }
+            }
+        }
+
         private void StopListener()
         {
             try
@@ -128,12 +180,27 @@ namespace AutoCADMCP
             }
         }
 
+        // Requests are newline-delimited: the server writes every command as one line of JSON,
+        // or the line "ping". A request is complete once its delimiter arrives, so only newly
+        // read bytes are searched, and a line that does not parse is answered with an error at once.
+        private const byte RequestDelimiter = (byte)'\n';
+
+        // State of one client connection
+        private class ClientConnection
+        {
+            public ResponseFraming Framing = new ResponseFraming();
+            public bool Authenticated;
+        }
+
         private async Task HandleClientAsync(TcpClient client)
         {
             using (client)
             using (var stream = client.GetStream())
             {
-                var buffer = new byte[8192];
+                var buffer = new byte[65536];
+                // Bytes of the request being received that precede the current read
+                var pending = new MemoryStream();
+                var connection = new ClientConnection { Authenticated = _token == null };
                 while (_isRunning)
                 {
                     try
@@ -141,27 +208,22 @@ namespace AutoCADMCP
                         int bytesRead = await stream.ReadAsync(buffer, 0, buffer.Length);
                         if (bytesRead == 0) break; // Client disconnected
 
-                        string commandText = System.Text.Encoding.UTF8.GetString(buffer, 0, bytesRead);
-                        string commandId = Guid.NewGuid().ToString();
-                        var tcs = new TaskCompletionSource<string>();
-
-                        // Special handling for ping command to avoid JSON parsing
-                        if (commandText.Trim() == "ping")
+                        // Large commands (e.g. bulk transforms) arrive over several reads
+                        int start = 0;
+                        for (int i = Array.IndexOf(buffer, RequestDelimiter, 0, bytesRead); i >= 0;
+                             i = Array.IndexOf(buffer, RequestDelimiter, start, bytesRead - start))
                         {
-                            // Direct response to ping without going through JSON parsing
-                            byte[] pingResponseBytes = System.Text.Encoding.UTF8.GetBytes("{\"status\":\"success\",\"result\":{\"message\":\"pong\"}}");
-                            await stream.WriteAsync(pingResponseBytes, 0, pingResponseBytes.Length);
-                            continue;
-                        }
+                            pending.Write(buffer, start, i - start);
+                            string commandText = Encoding.UTF8.GetString(pending.GetBuffer(), 0, (int)pending.Length);
+                            pending.SetLength(0);
+                            start = i + 1;
 
-                        lock (lockObj)
-                        {
-                            commandQueue[commandId] = (commandText, tcs);
+                            if (!string.IsNullOrWhiteSpace(commandText) && !await HandleRequestAsync(stream, connection, commandText))
+                            {
+                                return;
+                            }
                         }
-
-                        string response = await tcs.Task;
-                        byte[] responseBytes = System.Text.Encoding.UTF8.GetBytes(response);
-                        await stream.WriteAsync(responseBytes, 0, responseBytes.Length);
+                        pending.Write(buffer, start, bytesRead - start);
                     }
                     catch (System.Exception ex)
                     {
@@ -172,6 +234,88 @@ namespace AutoCADMCP
             }
         }
 
+        // Returns false if the connection is to be closed
+        private async Task<bool> HandleRequestAsync(NetworkStream stream, ClientConnection connection, string commandText)
+        {
+            var framing = connection.Framing;
+            var command = commandText.Trim() == "ping" ? null : TryParseCommand(commandText);
+
+            // Until a client has sent the token, it gets no answer but this one
+            if (!connection.Authenticated && command?.Type != "HELLO")
+            {
+                await framing.WriteAsync(stream, "{\"status\":\"error\",\"error\":\"Authentication required: send HELLO with the bridge token\"}");
+                return false;
+            }
+
+            // Special handling for ping command to avoid JSON parsing
+            if (commandText.Trim() == "ping")
+            {
+                // Direct response to ping without going through JSON parsing
+                await framing.WriteAsync(stream, "{\"status\":\"success\",\"result\":{\"message\":\"pong\"}}");
+                return true;
+            }
+
+            if (command == null)
+            {
+                var invalidJsonResponse = new
+                {
+                    status = "error",
+                    error = "Invalid JSON format",
+                    receivedText = commandText.Length > 50 ? commandText.Substring(0, 50) + "..." : commandText
+                };
+                await framing.WriteAsync(stream, JsonConvert.SerializeObject(invalidJsonResponse));
+                return true;
+            }
+
+            // The handshake configures this connection, so it is answered here (always as bare JSON)
+            if (command.Type == "HELLO")
+            {
+                if (!connection.Authenticated && !TokenMatches(command.Parameters?["token"]?.Value<string>()))
+                {
+                    await new ResponseFraming().WriteAsync(stream, "{\"status\":\"error\",\"error\":\"Invalid bridge token\"}");
+                    return false;
+                }
+                connection.Authenticated = true;
+                var helloResponse = JsonConvert.SerializeObject(framing.Negotiate(command.Parameters));
+                await new ResponseFraming().WriteAsync(stream, helloResponse);
+                return true;
+            }
+
+            var handler = command.Type != null && commandHandlers.TryGetValue(command.Type, out var found) ? found : default;
+
+            // Immediate commands are answered here instead of waiting for the idle handler
+            if (handler.attribute != null && handler.attribute.Immediate)
+            {
+                string immediateResponse = await ExecuteImmediateCommandAsync(command, handler);
+                await framing.WriteAsync(stream, immediateResponse);
+                return true;
+            }
+
+            // The client's id lets it cancel the command while it is still queued
+            string commandId = command.Id ?? Guid.NewGuid().ToString();
+            var entry = commandQueue.Enqueue(commandId, commandText, command, handler.attribute?.Class ?? CommandClass.Edit);
+            dispatcher.Wake();
+
+            string response = await entry.Completion.Task;
+            await framing.WriteAsync(stream, response);
+            return true;
+        }
+
+        // Compares in constant time, so the token cannot be guessed from response times
+        private bool TokenMatches(string token)
+        {
+            if (token == null || token.Length != _token.Length)
+            {
+                return false;
+            }
+            int difference = 0;
+            for (int i = 0; i < token.Length; i++)
+            {
+                difference |= token[i] ^ _token[i];
+            }
+            return difference == 0;
+        }
+
         private void RegisterCommands()
         {
             var assembly = Assembly.GetExecutingAssembly();
@@ -186,116 +330,214 @@ namespace AutoCADMCP
                     if (attribute != null)
                     {
                         object instance = method.IsStatic ? null : Activator.CreateInstance(type);
-                        commandHandlers[attribute.CommandType] = (method, instance);
+                        commandHandlers[attribute.CommandType] = (method, instance, attribute);
                     }
                 }
             }
         }
 
-        private static void ProcessCommands(object sender, EventArgs e)
+        [MCPCommand("CANCEL", Immediate = true, Class = CommandClass.Read)]
+        public static Task<object> CancelCommands(JObject parameters)
         {
-            List<string> processedIds = new();
-            lock (lockObj)
-            {
-                foreach (var kvp in commandQueue.ToList())
-                {
-                    string id = kvp.Key;
-                    string commandText = kvp.Value.commandJson;
-                    var tcs = kvp.Value.tcs;
-
-                    try
+            return CommandTemplates.RunImmediate(parameters,
+                (parameters) => {
+                    var commandIds = parameters["commandIds"].ToObject<List<string>>();
+                    var cancelled = new List<string>();
+                    var cancelling = new List<string>();
+                    var notQueued = new List<string>();
+
+                    foreach (var commandId in commandIds)
                     {
-                        // Special case handling
-                        if (string.IsNullOrEmpty(commandText))
+                        if (commandQueue.TryRemove(commandId, out var entry))
                         {
-                            var emptyResponse = new
+                            if (entry.Job != null)
                             {
-                                status = "error",
-                                error = "Empty command received"
-                            };
-                            tcs.SetResult(JsonConvert.SerializeObject(emptyResponse));
-                            processedIds.Add(id);
-                            continue;
-                        }
-
-                        // Trim the command text to remove any whitespace
-                        commandText = commandText.Trim();
-
-                        // Non-JSON direct commands handling (like ping)
-                        if (commandText == "ping")
-                        {
-                            var pingResponse = new
-                            {
-                                status = "success",
-                                result = new { message = "pong" }
-                            };
-                            tcs.SetResult(JsonConvert.SerializeObject(pingResponse));
-                            processedIds.Add(id);
-                            continue;
-                        }
-
-                        // Check if the command is valid JSON before attempting to deserialize
-                        if (!IsValidJson(commandText))
-                        {
-                            var invalidJsonResponse = new
+                                Jobs.RequestCancel(commandId);
+                            }
+                            var cancelledResponse = new
                             {
                                 status = "error",
-                                error = "Invalid JSON format",
-                                receivedText = commandText.Length > 50 ? commandText.Substring(0, 50) + "..." : commandText
+                                error = "Command cancelled",
+                                command = entry.Command?.Type
                             };
-                            tcs.SetResult(JsonConvert.SerializeObject(invalidJsonResponse));
-                            processedIds.Add(id);
-                            continue;
+                            entry.Completion.TrySetResult(JsonConvert.SerializeObject(cancelledResponse));
+                            cancelled.Add(commandId);
                         }
-
-                        // Normal JSON command processing
-                        var command = JsonConvert.DeserializeObject<Command>(commandText);
-                        if (command == null)
+                        else if (Jobs.RequestCancel(commandId))
                         {
-                            var nullCommandResponse = new
-                            {
-                                status = "error",
-                                error = "Command deserialized to null",
-                                details = "The command was valid JSON but could not be deserialized to a Command object"
-                            };
-                            tcs.SetResult(JsonConvert.SerializeObject(nullCommandResponse));
+                            // A running job stops at its next progress report
+                            cancelling.Add(commandId);
                         }
                         else
                         {
-                            string responseJson = ExecuteCommand(command);
-                            tcs.SetResult(responseJson);
+                            // Unknown, already executing or already finished
+                            notQueued.Add(commandId);
                         }
                     }
-                    catch (System.Exception ex)
+
+                    Log.Info($"Cancelled {cancelled.Count} of {commandIds.Count} commands");
+                    return Task.FromResult<object>(new {
+                        cancelled = cancelled,
+                        cancelling = cancelling,
+                        notQueued = notQueued
+                    });
+                },
+                (isSuccess) => isSuccess ? "Commands cancelled successfully!" : "Failed to cancel commands!"
+            );
+        }
+
+        [MCPCommand("SUBMIT_JOB", Immediate = true, Class = CommandClass.Read)]
+        public static Task<object> SubmitJob(JObject parameters)
+        {
+            return CommandTemplates.RunImmediate(parameters,
+                (parameters) => {
+                    var command = new Command
                     {
-                        Log.Error($"Error processing command: {ex.Message}\n{ex.StackTrace}");
+                        Id = parameters.ContainsKey("jobId") ? parameters["jobId"].Value<string>() : Guid.NewGuid().ToString("N"),
+                        Type = parameters["command"].Value<string>(),
+                        Document = parameters["document"]?.Value<string>(),
+                        IdempotencyKey = parameters["idempotencyKey"]?.Value<string>(),
+                        Parameters = parameters["parameters"] as JObject ?? new JObject()
+                    };
+                    if (!commandHandlers.TryGetValue(command.Type, out var handler))
+                    {
+                        throw new System.Exception($"Unknown command type: {command.Type}");
+                    }
+                    if (handler.attribute.Immediate)
+                    {
+                        throw new System.Exception($"{command.Type} is answered immediately and cannot run as a job");
+                    }
 
-                        var response = new
-                        {
-                            status = "error",
-                            error = ex.Message,
-                            commandType = "Unknown (error during processing)",
-                            receivedText = commandText?.Length > 50 ? commandText.Substring(0, 50) + "..." : commandText
-                        };
-                        string responseJson = JsonConvert.SerializeObject(response);
-                        tcs.SetResult(responseJson);
+                    // The job id doubles as the command id, so CANCEL withdraws or stops the job
+                    var job = Jobs.Create(command.Id, command.Type);
+                    var entry = commandQueue.Enqueue(command.Id, JsonConvert.SerializeObject(command), command, handler.attribute.Class);
+                    entry.Job = job;
+                    entry.Completion.Task.ContinueWith(response => Jobs.Finish(job, response.Result), TaskContinuationOptions.OnlyOnRanToCompletion);
+                    dispatcher.Wake();
+
+                    Log.Info($"Submitted {command.Type} as job {job.Id}");
+                    return Task.FromResult<object>(new {
+                        jobId = job.Id,
+                        command = job.CommandType,
+                        status = job.Status
+                    });
+                },
+                (isSuccess) => isSuccess ? "Job submitted successfully!" : "Failed to submit job!"
+            );
+        }
+
+        [MCPCommand("GET_JOB", Immediate = true, Class = CommandClass.Read)]
+        public static Task<object> GetJob(JObject parameters)
+        {
+            return CommandTemplates.RunImmediate(parameters,
+                async (parameters) => {
+                    var jobId = parameters["jobId"].Value<string>();
+                    var since = parameters.ContainsKey("since") ? parameters["since"].Value<int>() : 0;
+                    var wait = parameters.ContainsKey("wait") && parameters["wait"].Value<bool>();
+                    var timeout = parameters.ContainsKey("timeout") ? parameters["timeout"].Value<double>() : 30.0;
+
+                    if (!Jobs.TryGet(jobId, out var job))
+                    {
+                        throw new System.Exception($"Unknown job: {jobId}");
                     }
+                    return await Jobs.Describe(job, since, wait, timeout);
+                },
+                (isSuccess) => isSuccess ? "Job retrieved successfully!" : "Failed to retrieve job!"
+            );
+        }
 
-                    processedIds.Add(id);
+        private static void ProcessCommand(QueuedCommand entry)
+        {
+            string commandText = entry.CommandText;
+            var tcs = entry.Completion;
+
+            try
+            {
+                // Special case handling
+                if (string.IsNullOrEmpty(commandText))
+                {
+                    var emptyResponse = new
+                    {
+                        status = "error",
+                        error = "Empty command received"
+                    };
+                    tcs.SetResult(JsonConvert.SerializeObject(emptyResponse));
+                    return;
                 }
 
-                foreach (var id in processedIds)
+                // Normal JSON command processing
+                var command = entry.Command;
+                if (command == null)
                 {
-                    commandQueue.Remove(id);
+                    var nullCommandResponse = new
+                    {
+                        status = "error",
+                        error = "Command deserialized to null",
+                        details = "The command was valid JSON but could not be deserialized to a Command object"
+                    };
+                    tcs.SetResult(JsonConvert.SerializeObject(nullCommandResponse));
+                }
+                else if (command.IdempotencyKey != null && idempotencyCache.TryGet(command.IdempotencyKey, out var replayedJson))
+                {
+                    // A retry of a command that already ran: answer with the original response
+                    Log.Info($"Replaying response of {command.Type} for idempotency key {command.IdempotencyKey}");
+                    tcs.SetResult(replayedJson);
+                }
+                else
+                {
+                    string responseJson;
+                    if (entry.Job != null)
+                    {
+                        Jobs.Start(entry.Job);
+                        Jobs.Current = entry.Job;
+                    }
+                    try
+                    {
+                        responseJson = ExecuteCommand(command, new DispatchStats
+                        {
+                            QueueWaitMs = Math.Round((DateTime.UtcNow - entry.EnqueuedAt).TotalMilliseconds, 1),
+                            QueueDepth = commandQueue.Count
+                        });
+                    }
+                    finally
+                    {
+                        Jobs.Current = null;
+                    }
+                    if (command.IdempotencyKey != null)
+                    {
+                        idempotencyCache.Add(command.IdempotencyKey, responseJson);
+                    }
+                    tcs.SetResult(responseJson);
                 }
             }
+            catch (System.Exception ex)
+            {
+                Log.Error($"Error processing command: {ex.Message}\n{ex.StackTrace}");
+
+                var response = new
+                {
+                    status = "error",
+                    error = ex.Message,
+                    commandType = "Unknown (error during processing)",
+                    receivedText = commandText?.Length > 50 ? commandText.Substring(0, 50) + "..." : commandText
+                };
+                string responseJson = JsonConvert.SerializeObject(response);
+                tcs.TrySetResult(responseJson);
+            }
+        }
+
+        // How long a command waited in the queue, and how many commands were still waiting when it started
+        private struct DispatchStats
+        {
+            public double QueueWaitMs;
+            public int QueueDepth;
         }
 
-        private static string ExecuteCommand(Command command)
+        private static string ExecuteCommand(Command command, DispatchStats stats)
         {
             try
             {
-                Log.Info($"Executing command: {command.Type} with parameters: {command.Parameters}");
+                Log.Debug(() => $"Executing command: {command.Type} with parameters: {Log.Summarize(command.Parameters)}");
 
                 if (string.IsNullOrEmpty(command.Type))
                 {
@@ -317,9 +559,46 @@ namespace AutoCADMCP
 
                 if (commandHandlers.TryGetValue(command.Type, out var handler))
                 {
-                    object result = handler.method.Invoke(handler.instance, new[] { command.Parameters });
-                    Log.Info($"Command {command.Type} executed successfully with result: {result}");
-                    var response = new { status = "success", result };
+                    var doc = ResolveDocument(command.Document);
+                    var db = doc?.Database;
+
+                    // Conditional reads answer with a tiny payload when the drawing is unchanged
+                    if (handler.attribute.Conditional && db != null
+                        && command.Parameters != null && command.Parameters.ContainsKey("ifRevisionNot")
+                        && command.Parameters["ifRevisionNot"].Value<string>() == DrawingRevision.GetToken(db))
+                    {
+                        var notModifiedResponse = new
+                        {
+                            status = "success",
+                            result = new { success = true, notModified = true },
+                            revision = DrawingRevision.GetRevision(db),
+                            epoch = DrawingRevision.GetEpoch(db),
+                            queueWaitMs = stats.QueueWaitMs,
+                            queueDepth = stats.QueueDepth
+                        };
+                        return JsonConvert.SerializeObject(notModifiedResponse);
+                    }
+
+                    object result;
+                    CommandTemplates.TargetDocument = doc;
+                    try
+                    {
+                        result = handler.method.Invoke(handler.instance, new[] { command.Parameters });
+                    }
+                    finally
+                    {
+                        CommandTemplates.TargetDocument = null;
+                    }
+                    Log.Debug(() => $"Command {command.Type} executed successfully");
+                    var response = new
+                    {
+                        status = "success",
+                        result,
+                        revision = db != null ? DrawingRevision.GetRevision(db) : 0,
+                        epoch = db != null ? DrawingRevision.GetEpoch(db) : DrawingRevision.Epoch,
+                        queueWaitMs = stats.QueueWaitMs,
+                        queueDepth = stats.QueueDepth
+                    };
                     return JsonConvert.SerializeObject(response);
                 }
                 else 
@@ -336,38 +615,81 @@ namespace AutoCADMCP
                     error = ex.Message,
                     command = command.Type,
                     stackTrace = ex.StackTrace,
-                    paramsSummary = command.Parameters != null ? GetParamsSummary(command.Parameters) : "No parameters"
+                    paramsSummary = Log.Summarize(command.Parameters),
+                    queueWaitMs = stats.QueueWaitMs,
+                    queueDepth = stats.QueueDepth
                 };
                 return JsonConvert.SerializeObject(response);
             }
         }
 
-        private static bool IsValidJson(string strInput)
+        // Finds an open document by full path, file name, or file name without extension
+        private static Document ResolveDocument(string name)
         {
-            if (string.IsNullOrWhiteSpace(strInput)) return false;
-            try
+            var session = SessionCommands.ActiveSession;
+            if (string.IsNullOrEmpty(name))
             {
-                JToken.Parse(strInput);
-                return true;
+                return session?.Document ?? Application.DocumentManager.MdiActiveDocument;
             }
-            catch (JsonReaderException)
+
+            Document found = null;
+            foreach (Document doc in Application.DocumentManager)
             {
-                return false;
+                if (string.Equals(doc.Name, name, StringComparison.OrdinalIgnoreCase)
+                    || string.Equals(System.IO.Path.GetFileName(doc.Name), name, StringComparison.OrdinalIgnoreCase)
+                    || string.Equals(System.IO.Path.GetFileNameWithoutExtension(doc.Name), name, StringComparison.OrdinalIgnoreCase))
+                {
+                    found = doc;
+                    break;
+                }
+            }
+
+            if (found == null)
+            {
+                throw new System.Exception($"Document {name} is not open");
+            }
+            if (session != null && session.Document != found)
+            {
+                throw new System.Exception($"Session {session.Id} is active on another document");
             }
+            return found;
         }
 
-        private static string GetParamsSummary(JObject @params)
+        private static Command TryParseCommand(string commandText)
         {
             try
             {
-                if (@params == null || !@params.HasValues)
-                    return "No parameters";
+                return JsonConvert.DeserializeObject<Command>(commandText);
+            }
+            catch (JsonException)
+            {
+                return null;
+            }
+        }
 
-                return string.Join(", ", @params.Properties().Select(p => $"{p.Name}: {p.Value?.ToString()?.Substring(0, Math.Min(20, p.Value?.ToString()?.Length ?? 0))}"));
+        private static async Task<string> ExecuteImmediateCommandAsync(Command command,
+            (MethodInfo method, object instance, MCPCommandAttribute attribute) handler)
+        {
+            try
+            {
+                object result = handler.method.Invoke(handler.instance, new[] { command.Parameters });
+                if (result is Task<object> pending)
+                {
+                    result = await pending;
+                }
+                var response = new { status = "success", result };
+                return JsonConvert.SerializeObject(response);
             }
-            catch
+            catch (System.Exception ex)
             {
-                return "Could not summarize parameters";
+                var error = ex is TargetInvocationException && ex.InnerException != null ? ex.InnerException : ex;
+                var response = new
+                {
+                    status = "error",
+                    error = error.Message,
+                    command = command.Type
+                };
+                return JsonConvert.SerializeObject(response);
             }
         }
     }
@@ -5,7 +5,11 @@ namespace AutoCADMCP
 {
     public class Command
     {
+        public string Id { get; set; }
         public string Type { get; set; }
+        public string IdempotencyKey { get; set; }
+        // Name or path of the open document to run on; the active document when omitted
+        public string Document { get; set; }
         public JObject Parameters { get; set; }
     }
 }
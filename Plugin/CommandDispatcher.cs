@@ -0,0 +1,162 @@
+using System;
+using System.Diagnostics;
+using System.Threading;
+using Timer = System.Windows.Forms.Timer;
+
+using Autodesk.AutoCAD.ApplicationServices;
+
+using AutoCADMCP.Commands;
+
+namespace AutoCADMCP
+{
+    // Runs queued commands on AutoCAD's UI thread.
+    //
+    // In sliced mode (the default) a command arriving on a socket thread posts a callback to the
+    // UI thread's synchronization context, so it starts as soon as the message loop gets to it
+    // instead of the next time AutoCAD goes idle. The queue is worked off in slices of a fixed
+    // time budget. When a slice leaves commands queued, the next one is not posted, since posted
+    // messages are retrieved before input and paint messages; it is started by a timer instead,
+    // whose messages are only generated once no other message is waiting, so the UI keeps
+    // responding while a burst of commands is processed. The Idle handler still runs slices, in
+    // case a callback could not be posted.
+    //
+    // In idle mode commands only run from the Idle handler, which works off the whole queue.
+    // AUTOCAD_MCP_DISPATCH selects the mode ("sliced" or "idle"), and AUTOCAD_MCP_SLICE_MS the
+    // time budget of a slice.
+    public class CommandDispatcher
+    {
+        private const int DefaultSliceMilliseconds = 16;
+
+        private readonly CommandQueue queue;
+        private readonly Action<QueuedCommand> process;
+        private SynchronizationContext uiContext;
+        // 1 while a slice is posted to the UI thread and has not started yet
+        private int posted;
+        // Set while a slice runs, so commands pumping messages cannot start another one inside it
+        private bool running;
+        // Starts the slice that follows one which left commands queued
+        private Timer followUp;
+        // 1 while the next slice waits for the follow-up timer, during which new commands are not posted
+        private int yielding;
+
+        public bool Sliced { get; }
+        public TimeSpan SliceBudget { get; }
+
+        public CommandDispatcher(CommandQueue queue, Action<QueuedCommand> process)
+        {
+            this.queue = queue;
+            this.process = process;
+
+            var mode = Environment.GetEnvironmentVariable("AUTOCAD_MCP_DISPATCH");
+            Sliced = !string.Equals(mode, "idle", StringComparison.OrdinalIgnoreCase);
+
+            var configuredSlice = Environment.GetEnvironmentVariable("AUTOCAD_MCP_SLICE_MS");
+            int sliceMilliseconds = int.TryParse(configuredSlice, out var parsed) && parsed > 0 ? parsed : DefaultSliceMilliseconds;
+            SliceBudget = TimeSpan.FromMilliseconds(sliceMilliseconds);
+        }
+
+        // Must be called on the UI thread
+        public void Start()
+        {
+            if (Sliced)
+            {
+                uiContext = SynchronizationContext.Current;
+                if (uiContext == null)
+                {
+                    Log.Warning("No synchronization context on the UI thread, commands only run when AutoCAD is idle");
+                }
+                followUp = new Timer { Interval = 1 };
+                followUp.Tick += OnFollowUp;
+            }
+            Application.Idle += OnIdle;
+
+            // Commands may have arrived before the dispatcher started
+            Wake();
+        }
+
+        public void Stop()
+        {
+            Application.Idle -= OnIdle;
+            uiContext = null;
+            if (followUp != null)
+            {
+                followUp.Stop();
+                followUp.Dispose();
+                followUp = null;
+            }
+        }
+
+        // Called from socket threads after a command was queued
+        public void Wake()
+        {
+            var context = uiContext;
+            if (context != null && Volatile.Read(ref yielding) == 0 && Interlocked.Exchange(ref posted, 1) == 0)
+            {
+                context.Post(_ => {
+                    Interlocked.Exchange(ref posted, 0);
+                    RunSlice();
+                }, null);
+            }
+        }
+
+        private void OnFollowUp(object sender, EventArgs e)
+        {
+            followUp.Stop();
+            Interlocked.Exchange(ref yielding, 0);
+            RunSlice();
+        }
+
+        private void OnIdle(object sender, EventArgs e)
+        {
+            SessionCommands.AbortIfExpired();
+
+            if (Sliced)
+            {
+                RunSlice();
+                return;
+            }
+
+            // Commands are taken one at a time in priority order, so commands that arrive
+            // while another one is executing can still overtake lower priority work
+            while (queue.TryDequeue(out var entry))
+            {
+                process(entry);
+            }
+        }
+
+        private void RunSlice()
+        {
+            if (running)
+            {
+                return;
+            }
+
+            running = true;
+            try
+            {
+                // A slice runs at least one command, however long that takes, and then
+                // takes further commands in priority order until its budget is spent
+                var watch = Stopwatch.StartNew();
+                while (queue.TryDequeue(out var entry))
+                {
+                    process(entry);
+                    if (watch.Elapsed >= SliceBudget)
+                    {
+                        break;
+                    }
+                }
+            }
+            finally
+            {
+                running = false;
+            }
+
+            // Let the message loop handle input and paint before the next slice
+            if (queue.Count > 0 && followUp != null)
+            {
+                Interlocked.Exchange(ref yielding, 1);
+                followUp.Start();
+            }
+        }
+    }
+}
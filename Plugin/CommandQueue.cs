@@ -0,0 +1,130 @@
+using System;
+using System.Collections.Generic;
+using System.Threading.Tasks;
+
+namespace AutoCADMCP
+{
+    public class QueuedCommand
+    {
+        public string Id { get; set; }
+        public string CommandText { get; set; }
+        public Command Command { get; set; }
+        public CommandClass Class { get; set; }
+        public long Sequence { get; set; }
+        public DateTime EnqueuedAt { get; set; }
+        public TaskCompletionSource<string> Completion { get; set; }
+        // Set for commands submitted as jobs
+        public Job Job { get; set; }
+    }
+
+    // Commands waiting for the UI thread, ordered by command class and then arrival (FIFO),
+    // so that quick reads are not starved behind long solid modelling or render commands.
+    // Waiting commands gain one class every AgingSeconds, as in the server's scheduler, so a
+    // steady stream of reads cannot starve queued edits and heavy commands either.
+    public class CommandQueue
+    {
+        private const double AgingSeconds = 10.0;
+
+        private readonly object queueLock = new object();
+        // Commands of every class in arrival order, indexed by class
+        private readonly LinkedList<QueuedCommand>[] lanes;
+        private long nextSequence;
+        private int count;
+
+        public CommandQueue()
+        {
+            var classes = (CommandClass[])Enum.GetValues(typeof(CommandClass));
+            lanes = new LinkedList<QueuedCommand>[classes.Length];
+            for (int i = 0; i < lanes.Length; i++)
+            {
+                lanes[i] = new LinkedList<QueuedCommand>();
+            }
+        }
+
+        public int Count
+        {
+            get { lock (queueLock) { return count; } }
+        }
+
+        public QueuedCommand Enqueue(string id, string commandText, Command command, CommandClass commandClass)
+        {
+            var entry = new QueuedCommand
+            {
+                Id = id,
+                CommandText = commandText,
+                Command = command,
+                Class = commandClass,
+                EnqueuedAt = DateTime.UtcNow,
+                Completion = new TaskCompletionSource<string>(TaskCreationOptions.RunContinuationsAsynchronously)
+            };
+
+            lock (queueLock)
+            {
+                entry.Sequence = nextSequence++;
+                lanes[(int)commandClass].AddLast(entry);
+                count++;
+            }
+            return entry;
+        }
+
+        // Takes the command with the lowest class less its age in AgingSeconds, and of equals the
+        // oldest. Within a class the oldest command always ranks best, so only the heads compete.
+        public bool TryDequeue(out QueuedCommand entry)
+        {
+            lock (queueLock)
+            {
+                var now = DateTime.UtcNow;
+                LinkedList<QueuedCommand> best = null;
+                double bestPriority = 0;
+                foreach (var lane in lanes)
+                {
+                    var head = lane.First?.Value;
+                    if (head == null)
+                    {
+                        continue;
+                    }
+                    var priority = (int)head.Class - (now - head.EnqueuedAt).TotalSeconds / AgingSeconds;
+                    if (best == null || priority < bestPriority
+                        || (priority == bestPriority && head.Sequence < best.First.Value.Sequence))
+                    {
+                        best = lane;
+                        bestPriority = priority;
+                    }
+                }
+
+                if (best == null)
+                {
+                    entry = null;
+                    return false;
+                }
+                entry = best.First.Value;
+                best.RemoveFirst();
+                count--;
+                return true;
+            }
+        }
+
+        // Withdraws a command that has not started executing yet
+        public bool TryRemove(string id, out QueuedCommand entry)
+        {
+            lock (queueLock)
+            {
+                foreach (var lane in lanes)
+                {
+                    for (var node = lane.First; node != null; node = node.Next)
+                    {
+                        if (node.Value.Id == id)
+                        {
+                            lane.Remove(node);
+                            count--;
+                            entry = node.Value;
+                            return true;
+                        }
+                    }
+                }
+                entry = null;
+                return false;
+            }
+        }
+    }
+}
@@ -0,0 +1,337 @@
+using System;
+using System.Collections.Generic;
+using Newtonsoft.Json;
+using Newtonsoft.Json.Linq;
+
+using Autodesk.AutoCAD.Runtime;
+using Autodesk.AutoCAD.ApplicationServices;
+using Autodesk.AutoCAD.DatabaseServices;
+using Autodesk.AutoCAD.Geometry;
+using Autodesk.AutoCAD.EditorInput;
+
+namespace AutoCADMCP.Commands
+{
+    public static class BulkCommands
+    {
+        // Creates many entities in one transaction. Each group holds entities of one type whose
+        // geometry is packed into a base64 blob of little-endian doubles (see geometry_io.py).
+        // The handles of the created entities are returned as [first, last] ranges.
+        [MCPCommand("BULK_CREATE", Class = CommandClass.Heavy)]
+        public static object BulkCreate(JObject parameters)
+        {
+            return CommandTemplates.Modify(parameters,
+                (btr, trans, parameters) => {
+                    var layerTable = (LayerTable)trans.GetObject(btr.Database.LayerTableId, OpenMode.ForRead);
+                    var result = new List<object>();
+
+                    foreach (JObject group in parameters["groups"])
+                    {
+                        var type = group["type"].Value<string>();
+                        var count = group["count"].Value<int>();
+                        var values = DecodeDoubles(group["values"].Value<string>());
+                        var offsets = group.ContainsKey("offsets") ? DecodeInts(group["offsets"].Value<string>()) : null;
+                        var closed = group.ContainsKey("closed") ? group["closed"].ToObject<bool[]>() : null;
+                        var layers = group.ContainsKey("layers") ? group["layers"].ToObject<string[]>() : null;
+
+                        var handles = new List<long>(count);
+                        for (int i = 0; i < count; i++)
+                        {
+                            var entity = CreateEntity(type, values, offsets, closed, i);
+                            entity.SetDatabaseDefaults();
+
+                            var layer = layers?[i];
+                            if (!string.IsNullOrEmpty(layer))
+                            {
+                                EnsureLayer(layerTable, trans, layer);
+                                entity.Layer = layer;
+                            }
+
+                            btr.AppendEntity(entity);
+                            trans.AddNewlyCreatedDBObject(entity, true);
+                            handles.Add(entity.Handle.Value);
+                        }
+
+                        result.Add(new {
+                            type = type,
+                            count = count,
+                            handles = ToRanges(handles)
+                        });
+                    }
+
+                    return new {
+                        groups = result
+                    };
+                },
+                (isSuccess) => isSuccess ? "Entities created successfully!" : "Failed to create entities!"
+            );
+        }
+
+        // Key geometry exported per entity type, as named columns of doubles. Other entity
+        // types are exported with their handle, layer and extents only.
+        private static readonly Dictionary<Type, (string[] columns, Func<Entity, double[]> values)> ExportedGeometry = new()
+        {
+            [typeof(DBPoint)] = (new[] { "x", "y", "z" }, e => {
+                var p = ((DBPoint)e).Position;
+                return new[] { p.X, p.Y, p.Z };
+            }),
+            [typeof(Line)] = (new[] { "start_x", "start_y", "start_z", "end_x", "end_y", "end_z", "length" }, e => {
+                var line = (Line)e;
+                return new[] { line.StartPoint.X, line.StartPoint.Y, line.StartPoint.Z, line.EndPoint.X, line.EndPoint.Y, line.EndPoint.Z, line.Length };
+            }),
+            [typeof(Circle)] = (new[] { "center_x", "center_y", "center_z", "radius" }, e => {
+                var circle = (Circle)e;
+                return new[] { circle.Center.X, circle.Center.Y, circle.Center.Z, circle.Radius };
+            }),
+            [typeof(Arc)] = (new[] { "center_x", "center_y", "center_z", "radius", "start_angle", "end_angle" }, e => {
+                var arc = (Arc)e;
+                return new[] { arc.Center.X, arc.Center.Y, arc.Center.Z, arc.Radius, arc.StartAngle, arc.EndAngle };
+            }),
+            [typeof(Ellipse)] = (new[] { "center_x", "center_y", "center_z", "major_x", "major_y", "major_z", "radius_ratio" }, e => {
+                var ellipse = (Ellipse)e;
+                return new[] { ellipse.Center.X, ellipse.Center.Y, ellipse.Center.Z, ellipse.MajorAxis.X, ellipse.MajorAxis.Y, ellipse.MajorAxis.Z, ellipse.RadiusRatio };
+            }),
+            [typeof(Polyline)] = (new[] { "vertex_count", "length", "closed", "elevation" }, e => {
+                var polyline = (Polyline)e;
+                return new[] { (double)polyline.NumberOfVertices, polyline.Length, polyline.Closed ? 1.0 : 0.0, polyline.Elevation };
+            }),
+            [typeof(Polyline3d)] = (new[] { "length", "closed" }, e => {
+                var polyline = (Polyline3d)e;
+                return new[] { polyline.Length, polyline.Closed ? 1.0 : 0.0 };
+            }),
+            [typeof(DBText)] = (new[] { "x", "y", "z", "height", "rotation" }, e => {
+                var text = (DBText)e;
+                return new[] { text.Position.X, text.Position.Y, text.Position.Z, text.Height, text.Rotation };
+            }),
+            [typeof(MText)] = (new[] { "x", "y", "z", "height", "rotation" }, e => {
+                var text = (MText)e;
+                return new[] { text.Location.X, text.Location.Y, text.Location.Z, text.TextHeight, text.Rotation };
+            }),
+        };
+
+        private class ExportTable
+        {
+            public string[] Columns;
+            public List<long> Handles = new();
+            public List<int> Layers = new();
+            public List<int> Colors = new();
+            public List<double> Extents = new();
+            public List<double> Geometry = new();
+        }
+
+        // Returns one page of model space entities as per-type columns: handles, layer codes into
+        // the page's layer names, color indices, extents (NaN when undefined) and key geometry as
+        // base64 doubles. Either the entities given by entityIds, skipping those that no longer
+        // exist, or one page of all entities, where nextCursor is an opaque string (see ModelSpacePages).
+        [MCPCommand("EXPORT_ENTITIES_PAGE", Conditional = true, Class = CommandClass.Read)]
+        public static object ExportEntitiesPage(JObject parameters)
+        {
+            return CommandTemplates.Access(parameters,
+                (btr, trans, parameters) => {
+                    var cursor = parameters["cursor"]?.ToString();
+                    var pageSize = parameters.ContainsKey("pageSize") ? parameters["pageSize"].Value<int>() : 5000;
+
+                    var tables = new Dictionary<string, ExportTable>();
+                    var layerNames = new List<string>();
+                    var layerCodes = new Dictionary<string, int>();
+
+                    List<ObjectId> page;
+                    string nextCursor = null;
+                    if (parameters.ContainsKey("entityIds"))
+                    {
+                        page = new List<ObjectId>();
+                        foreach (var handle in parameters["entityIds"].ToObject<List<long>>())
+                        {
+                            if (btr.Database.TryGetObjectId(new Handle(handle), out ObjectId id) && !id.IsErased)
+                            {
+                                page.Add(id);
+                            }
+                        }
+                    }
+                    else
+                    {
+                        page = ModelSpacePages.Next(btr, cursor, pageSize, out nextCursor);
+                    }
+                    foreach (ObjectId id in page)
+                    {
+                        var entity = trans.GetObject(id, OpenMode.ForRead) as Entity;
+                        if (entity == null)
+                        {
+                            continue;
+                        }
+
+                        var type = entity.GetType();
+                        if (!tables.TryGetValue(type.Name, out var table))
+                        {
+                            table = new ExportTable
+                            {
+                                Columns = ExportedGeometry.TryGetValue(type, out var geometry) ? geometry.columns : new string[0]
+                            };
+                            tables[type.Name] = table;
+                        }
+
+                        if (!layerCodes.TryGetValue(entity.Layer, out var layerCode))
+                        {
+                            layerCode = layerNames.Count;
+                            layerNames.Add(entity.Layer);
+                            layerCodes[entity.Layer] = layerCode;
+                        }
+
+                        table.Handles.Add(entity.Handle.Value);
+                        table.Layers.Add(layerCode);
+                        table.Colors.Add(entity.ColorIndex);
+                        table.Extents.AddRange(GetExtents(entity));
+                        if (table.Columns.Length > 0)
+                        {
+                            table.Geometry.AddRange(ExportedGeometry[type].values(entity));
+                        }
+                    }
+
+                    var result = new Dictionary<string, object>();
+                    foreach (var entry in tables)
+                    {
+                        result[entry.Key] = new {
+                            count = entry.Value.Handles.Count,
+                            handles = entry.Value.Handles,
+                            layers = entry.Value.Layers,
+                            colors = entry.Value.Colors,
+                            extents = EncodeDoubles(entry.Value.Extents),
+                            columns = entry.Value.Columns,
+                            geometry = EncodeDoubles(entry.Value.Geometry)
+                        };
+                    }
+
+                    return new {
+                        tables = result,
+                        layerNames = layerNames,
+                        nextCursor = nextCursor
+                    };
+                },
+                (isSuccess) => isSuccess ? "Entities exported successfully!" : "Failed to export entities!"
+            );
+        }
+
+        internal static double[] GetExtents(Entity entity)
+        {
+            try
+            {
+                var extents = entity.GeometricExtents;
+                return new[] { extents.MinPoint.X, extents.MinPoint.Y, extents.MinPoint.Z, extents.MaxPoint.X, extents.MaxPoint.Y, extents.MaxPoint.Z };
+            }
+            catch (Autodesk.AutoCAD.Runtime.Exception)
+            {
+                // Entities such as empty text or rays have no extents
+                return new[] { double.NaN, double.NaN, double.NaN, double.NaN, double.NaN, double.NaN };
+            }
+        }
+
+        internal static string EncodeDoubles(List<double> values)
+        {
+            var bytes = new byte[values.Count * sizeof(double)];
+            Buffer.BlockCopy(values.ToArray(), 0, bytes, 0, bytes.Length);
+            return Convert.ToBase64String(bytes);
+        }
+
+        private static Entity CreateEntity(string type, double[] values, int[] offsets, bool[] closed, int index)
+        {
+            switch (type)
+            {
+                case "point":
+                {
+                    int i = index * 3;
+                    return new DBPoint(new Point3d(values[i], values[i + 1], values[i + 2]));
+                }
+                case "line":
+                {
+                    int i = index * 6;
+                    return new Line(
+                        new Point3d(values[i], values[i + 1], values[i + 2]),
+                        new Point3d(values[i + 3], values[i + 4], values[i + 5]));
+                }
+                case "circle":
+                {
+                    int i = index * 4;
+                    return new Circle(new Point3d(values[i], values[i + 1], values[i + 2]), Vector3d.ZAxis, values[i + 3]);
+                }
+                case "box":
+                {
+                    int i = index * 6;
+                    var box = new Solid3d();
+                    box.CreateBox(values[i + 3], values[i + 4], values[i + 5]);
+                    box.TransformBy(Matrix3d.Displacement(new Vector3d(values[i], values[i + 1], values[i + 2])));
+                    return box;
+                }
+                case "polyline":
+                {
+                    int start = offsets[index], end = offsets[index + 1];
+                    var polyline = new Polyline();
+                    for (int v = start; v < end; v++)
+                    {
+                        polyline.AddVertexAt(v - start, new Point2d(values[v * 3], values[v * 3 + 1]), 0, 0, 0);
+                    }
+                    polyline.Elevation = values[start * 3 + 2];
+                    polyline.Closed = closed[index];
+                    return polyline;
+                }
+                case "polyline3d":
+                {
+                    int start = offsets[index], end = offsets[index + 1];
+                    var vertices = new Point3dCollection();
+                    for (int v = start; v < end; v++)
+                    {
+                        vertices.Add(new Point3d(values[v * 3], values[v * 3 + 1], values[v * 3 + 2]));
+                    }
+                    return new Polyline3d(Poly3dType.SimplePoly, vertices, closed[index]);
+                }
+                default:
+                    throw new System.Exception($"Unsupported entity type: {type}");
+            }
+        }
+
+        private static void EnsureLayer(LayerTable layerTable, Transaction trans, string name)
+        {
+            if (layerTable.Has(name))
+            {
+                return;
+            }
+            layerTable.UpgradeOpen();
+            var layer = new LayerTableRecord { Name = name };
+            layerTable.Add(layer);
+            trans.AddNewlyCreatedDBObject(layer, true);
+            layerTable.DowngradeOpen();
+        }
+
+        internal static double[] DecodeDoubles(string encoded)
+        {
+            var bytes = Convert.FromBase64String(encoded);
+            var values = new double[bytes.Length / sizeof(double)];
+            Buffer.BlockCopy(bytes, 0, values, 0, bytes.Length);
+            return values;
+        }
+
+        internal static int[] DecodeInts(string encoded)
+        {
+            var bytes = Convert.FromBase64String(encoded);
+            var values = new int[bytes.Length / sizeof(int)];
+            Buffer.BlockCopy(bytes, 0, values, 0, bytes.Length);
+            return values;
+        }
+
+        // Handles of entities appended one after another are usually consecutive
+        internal static List<long[]> ToRanges(List<long> handles)
+        {
+            var ranges = new List<long[]>();
+            foreach (var handle in handles)
+            {
+                if (ranges.Count > 0 && ranges[ranges.Count - 1][1] + 1 == handle)
+                {
+                    ranges[ranges.Count - 1][1] = handle;
+                }
+                else
+                {
+                    ranges.Add(new[] { handle, handle });
+                }
+            }
+            return ranges;
+        }
+    }
+}
@@ -1,5 +1,6 @@
 using System;
 using System.Collections.Generic;
+using System.Threading.Tasks;
 using Newtonsoft.Json;
 using Newtonsoft.Json.Linq;
 
@@ -14,15 +15,24 @@ namespace AutoCADMCP.Commands
 {
     public static class CommandTemplates
     {        
+        // The document addressed by the command being executed, set by the bridge
+        public static Document TargetDocument { get; internal set; }
+
+        // The document commands operate on: the session's, the targeted one, or the active one
+        public static Document CurrentDocument =>
+            SessionCommands.ActiveSession?.Document ?? TargetDocument ?? Application.DocumentManager.MdiActiveDocument;
+
         public static object Run(JObject parameters,
             Func<Document, JObject, object> func,
             Func<bool, string> messageGenerator = null)
         {
-            // Get the current document and database
-            Document doc = Application.DocumentManager.MdiActiveDocument;
+            // Get the current document and database, or the one held by the active session
+            var session = SessionCommands.ActiveSession;
+            Document doc = CurrentDocument;
+            SessionCommands.Touch();
 
-            // Lock the document
-            using (DocumentLock docLock = doc.LockDocument())
+            // Lock the document, unless the active session already holds the lock
+            using (DocumentLock docLock = session == null ? doc.LockDocument() : null)
             {
                 try
                 {
@@ -47,6 +57,42 @@ namespace AutoCADMCP.Commands
             }
         }
 
+        // Within a session the drawing is regenerated once, when the session is committed
+        private static void RegenUnlessInSession(Document doc)
+        {
+            if (SessionCommands.ActiveSession == null)
+            {
+                doc.Editor.Regen();
+            }
+        }
+
+        public static async Task<object> RunImmediate(JObject parameters,
+            Func<JObject, Task<object>> func,
+            Func<bool, string> messageGenerator = null)
+        {
+            // Immediate commands run off the UI thread, so they never lock the document
+            try
+            {
+                var result = await func(parameters);
+
+                return new
+                {
+                    success = true,
+                    message = messageGenerator?.Invoke(true) ?? "Operation completed successfully!",
+                    result = result
+                };
+            }
+            catch (System.Exception ex)
+            {
+                return new
+                {
+                    success = false,
+                    error =  $"{messageGenerator?.Invoke(false) ?? "Operation failed!"}: {ex.Message}",
+                    stackTrace = ex.StackTrace
+                };
+            }
+        }
+
         public static object Modify(JObject parameters,
             Func<BlockTableRecord, Transaction, JObject, object> modifier,
             Func<bool, string> messageGenerator = null)
@@ -68,7 +114,12 @@ namespace AutoCADMCP.Commands
 
                             // Commit the transaction
                             trans.Commit();
-                            doc.Editor.Regen();
+
+                            // Bulk commands sent in several chunks only regenerate after the last one
+                            if (!parameters.ContainsKey("regen") || parameters["regen"].Value<bool>())
+                            {
+                                RegenUnlessInSession(doc);
+                            }
 
                             return result;
                         }
@@ -146,7 +197,7 @@ namespace AutoCADMCP.Commands
 
                                 // Commit the transaction
                                 trans.Commit();
-                                doc.Editor.Regen();
+                                RegenUnlessInSession(doc);
 
                                 return result;
                             }
@@ -196,6 +247,62 @@ namespace AutoCADMCP.Commands
                                     Entity ent = trans.GetObject(objId, OpenMode.ForWrite) as Entity;
                                     var result = modifier(ent, btr, trans, entityParameters != null ? entityParameters[i] : null);
                                     results.Add(result);
+                                    Jobs.ReportProgress(i + 1, entityIds.Count, result);
+                                }
+                                else
+                                {
+                                    throw new System.Exception("Entity not found");
+                                }
+                            }
+
+                            // Commit the transaction
+                            trans.Commit();
+                            RegenUnlessInSession(doc);
+
+                            return results;
+                        }
+                        catch (System.Exception ex)
+                        {
+                            trans.Abort();
+                            throw ex;
+                        }
+                    }
+                }, 
+                messageGenerator
+            );
+        }
+
+        public static object AccessEachEntity(JObject parameters,
+            Func<Entity, BlockTableRecord, Transaction, JObject, object> accessor,
+            Func<bool, string> messageGenerator = null)
+        {
+            return Run(parameters,
+                (doc, parameters) => {
+                    var entityIds = parameters["entityIds"].ToObject<List<long>>();
+
+                    var entityParameters = parameters.ContainsKey("entityParameters") ?
+                        parameters["entityParameters"].ToObject<List<JObject>>() : null;
+
+                    // Start a transaction
+                    using (Transaction trans = doc.Database.TransactionManager.StartTransaction())
+                    {
+                        try 
+                        {
+                            // Get the current space (model space or paper space)
+                            BlockTable bt = (BlockTable)trans.GetObject(doc.Database.BlockTableId, OpenMode.ForRead);
+
+                            // Open the Block table record Model space for read
+                            BlockTableRecord btr = (BlockTableRecord)trans.GetObject(bt[BlockTableRecord.ModelSpace], OpenMode.ForRead);
+
+                            var results = new List<object>();
+                            for (int i = 0; i < entityIds.Count; i++)
+                            {
+                                if (doc.Database.TryGetObjectId(new Handle(entityIds[i]), out ObjectId objId))
+                                {
+                                    // Entities are opened for read so that reads never bump the drawing revision
+                                    Entity ent = trans.GetObject(objId, OpenMode.ForRead) as Entity;
+                                    var result = accessor(ent, btr, trans, entityParameters != null ? entityParameters[i] : null);
+                                    results.Add(result);
                                 }
                                 else
                                 {
@@ -205,7 +312,6 @@ namespace AutoCADMCP.Commands
 
                             // Commit the transaction
                             trans.Commit();
-                            doc.Editor.Regen();
 
                             return results;
                         }
@@ -257,7 +363,7 @@ namespace AutoCADMCP.Commands
 
                             // Commit the transaction
                             trans.Commit();
-                            doc.Editor.Regen();
+                            RegenUnlessInSession(doc);
 
                             return result;
                         }
@@ -102,7 +102,7 @@ namespace AutoCADMCP.Commands
             );
         }
 
-        [MCPCommand("EXTRUDE_REGIONS")]
+        [MCPCommand("EXTRUDE_REGIONS", Class = CommandClass.Heavy)]
         public static object ExtrudeRegions(JObject parameters)
         {
             return CommandTemplates.ModifyEachEntity(parameters,
@@ -136,7 +136,7 @@ namespace AutoCADMCP.Commands
             );
         }
 
-        [MCPCommand("COMBINE_REGIONS")]
+        [MCPCommand("COMBINE_REGIONS", Class = CommandClass.Heavy)]
         public static object CombineRegions(JObject parameters)
         {
             return CommandTemplates.ModifyEntities(parameters,
@@ -173,6 +173,7 @@ namespace AutoCADMCP.Commands
                         if (entities[i] is Region region)
                         {
                             initialRegion.BooleanOperation(operationType, region);
+                            Jobs.ReportProgress(i, entities.Count - 1);
                         }
                         else
                         {
@@ -142,69 +142,64 @@ namespace AutoCADMCP.Commands
         }
         */
 
-        [MCPCommand("MAKE_ENTITY_PATTERN")]
-        public static object MakeEntityPattern(JObject parameters)
+        [MCPCommand("ARRAY_ENTITIES", Class = CommandClass.Heavy)]
+        public static object ArrayEntities(JObject parameters)
         {
             return CommandTemplates.ModifyEntities(parameters,
                 (entities, btr, trans, parameters) => {
-                    var count = parameters["count"].ToObject<int>();
-                    var patternType = parameters["patternType"].ToObject<string>();
-
-                    Matrix3d transform = Matrix3d.Identity;
-
-                    if (patternType == "linear")
-                    {
-                        var delta = parameters["delta"].ToObject<double[]>();
-                        var deltaVector = new Vector3d(delta[0], delta[1], delta.Length > 2 ? delta[2] : 0);
-
-                        transform = Matrix3d.Displacement(deltaVector);
-                    }
-                    else if (patternType == "radial")
-                    {
-                        var angle = parameters["angle"].ToObject<double>();
-                        var axis = parameters["axis"].ToObject<double[]>();
-                        var origin = parameters["origin"].ToObject<double[]>();
-
-                        var originPoint = new Point3d(origin[0], origin[1], origin.Length > 2 ? origin[2] : 0);
-                        var axisVector = new Vector3d(axis[0], axis[1], axis.Length > 2 ? axis[2] : 0);
-                        var plane = new Plane(originPoint, axisVector);
-
-                        transform = Matrix3d.Rotation(angle, axisVector, originPoint);
-                    }
-                    else
-                    {
-                        throw new System.Exception("Invalid pattern type");
-                    }
+                    var transformCount = parameters["transformCount"].ToObject<int>();
+                    var transforms = DecodeTransforms(parameters["transforms"].Value<string>(), transformCount);
 
                     var result = new List<List<object>>();
                     foreach (var entity in entities)
                     {
-                        Entity clone = entity;
-                        var clones = new List<object>();
-                        for (int i = 1; i < count; i++)
+                        var clones = new List<object>(transforms.Length);
+                        foreach (var transform in transforms)
                         {
-                            clone = clone.Clone() as Entity;
+                            var clone = entity.Clone() as Entity;
+                            clone.TransformBy(transform);
                             btr.AppendEntity(clone);
                             trans.AddNewlyCreatedDBObject(clone, true);
 
-                            clone.TransformBy(transform);
-
                             clones.Add(new {
                                 handle = clone.Handle.Value,
-                                type = clone.GetType().Name,
-                                properties = EntityCommands.GetEntityProperties(clone)
+                                type = clone.GetType().Name
                             });
                         }
                         result.Add(clones);
+                        Jobs.ReportProgress(result.Count, entities.Count, clones);
                     }
 
                     return result;
                 },
-                (isSuccess) => isSuccess ? "Entity pattern created successfully!" : "Failed to create entity pattern!"
+                (isSuccess) => isSuccess ? "Entity array created successfully!" : "Failed to create entity array!"
             );
         }
 
-        [MCPCommand("EXPLODE_ENTITIES")]
+        // Transforms are sent as base64 encoded little-endian float64 values, 16 per row-major 4x4 matrix
+        private static Matrix3d[] DecodeTransforms(string encoded, int count)
+        {
+            var bytes = Convert.FromBase64String(encoded);
+            if (bytes.Length != count * 16 * sizeof(double))
+            {
+                throw new System.Exception($"Expected {count} transforms but received {bytes.Length} bytes");
+            }
+
+            var values = new double[count * 16];
+            Buffer.BlockCopy(bytes, 0, values, 0, bytes.Length);
+
+            var transforms = new Matrix3d[count];
+            var data = new double[16];
+            for (int i = 0; i < count; i++)
+            {
+                Array.Copy(values, i * 16, data, 0, 16);
+                transforms[i] = new Matrix3d(data);
+            }
+
+            return transforms;
+        }
+
+        [MCPCommand("EXPLODE_ENTITIES", Class = CommandClass.Heavy)]
         public static object ExplodeEntities(JObject parameters)
         {
             return CommandTemplates.ModifyEachEntity(parameters,
@@ -27,7 +27,7 @@ namespace AutoCADMCP.Commands
             return propertyInfo.ToDictionary(p => p.Name, p => p.GetValue(ent));
         }
 
-        [MCPCommand("GET_ALL_ENTITIES")]
+        [MCPCommand("GET_ALL_ENTITIES", Conditional = true, Class = CommandClass.Read)]
         public static object GetAllEntities(JObject parameters)
         {
             return CommandTemplates.Access(parameters,
@@ -45,7 +45,87 @@ namespace AutoCADMCP.Commands
             );
         }
 
-        [MCPCommand("GET_SELECTED_ENTITIES")]
+        // Lists the model space entities added, modified and erased since a revision token. When the
+        // change log no longer reaches back that far, resync tells the client to re-read everything.
+        // definitionsChanged tells that layers, blocks or styles changed, which can change how
+        // entities look, and their extents, without the entities being modified.
+        [MCPCommand("GET_CHANGES_SINCE", Class = CommandClass.Read)]
+        public static object GetChangesSince(JObject parameters)
+        {
+            return CommandTemplates.Run(parameters,
+                (doc, parameters) => {
+                    var since = parameters.ContainsKey("since") ? parameters["since"].Value<string>() : null;
+                    var token = DrawingRevision.GetToken(doc.Database);
+                    bool complete = DrawingRevision.TryGetChangesSince(doc.Database, since, out var added, out var modified, out var erased,
+                                                                       out var definitionsChanged);
+
+                    return new {
+                        revision = token,
+                        resync = !complete,
+                        added = added,
+                        modified = modified,
+                        erased = erased,
+                        definitionsChanged = definitionsChanged
+                    };
+                },
+                (isSuccess) => isSuccess ? "Changes retrieved successfully!" : "Failed to retrieve changes!"
+            );
+        }
+
+        // Selects model space entities matching a compiled filter expression. The DXF part is handed
+        // to AutoCAD's selection filter where the editor can be used, and the residual expression is
+        // evaluated on the selected entities; otherwise the whole expression is evaluated on each entity.
+        [MCPCommand("SELECT_ENTITIES", Conditional = true, Class = CommandClass.Read)]
+        public static object SelectEntities(JObject parameters)
+        {
+            return CommandTemplates.Access(parameters,
+                (btr, trans, parameters) => {
+                    var doc = CommandTemplates.CurrentDocument;
+                    var limit = parameters.ContainsKey("limit") ? parameters["limit"].Value<int>() : int.MaxValue;
+                    var residual = parameters["residual"] as JObject;
+                    var expression = (JObject)parameters["expression"];
+
+                    IEnumerable<ObjectId> candidates;
+                    if (doc == Application.DocumentManager.MdiActiveDocument)
+                    {
+                        var selection = doc.Editor.SelectAll(EntityFilter.ToSelectionFilter((JArray)parameters["filter"]));
+                        // An empty selection is reported as an error status
+                        candidates = selection.Status == PromptStatus.OK ? selection.Value.GetObjectIds() : new ObjectId[0];
+                    }
+                    else
+                    {
+                        candidates = btr.Cast<ObjectId>();
+                        residual = expression;
+                    }
+
+                    var handles = new List<long>();
+                    int count = 0;
+                    foreach (ObjectId id in candidates)
+                    {
+                        if (residual != null)
+                        {
+                            var entity = trans.GetObject(id, OpenMode.ForRead) as Entity;
+                            if (entity == null || !EntityFilter.Matches(entity, residual))
+                            {
+                                continue;
+                            }
+                        }
+                        if (count++ < limit)
+                        {
+                            handles.Add(id.Handle.Value);
+                        }
+                    }
+
+                    return new {
+                        count = count,
+                        handles = handles
+                    };
+                },
+                (isSuccess) => isSuccess ? "Entities selected successfully!" : "Failed to select entities!"
+            );
+        }
+
+        [MCPCommand("GET_SELECTED_ENTITIES", Class = CommandClass.Read)]
         public static object GetSelectedEntities(JObject parameters)
         {
             return CommandTemplates.Run(parameters,
@@ -66,10 +146,10 @@ namespace AutoCADMCP.Commands
             );
         }
 
-        [MCPCommand("GET_ENTITY_PROPERTIES")]
+        [MCPCommand("GET_ENTITY_PROPERTIES", Conditional = true, Class = CommandClass.Read)]
         public static object GetEntityProperties(JObject parameters)
         {
-            return CommandTemplates.ModifyEachEntity(parameters,
+            return CommandTemplates.AccessEachEntity(parameters,
                 (ent, btr, trans, parameters) => {
                     return new {
                         handle = ent.Handle.Value,
@@ -0,0 +1,117 @@
+using System;
+using System.Collections.Generic;
+using Newtonsoft.Json.Linq;
+
+using Autodesk.AutoCAD.DatabaseServices;
+using Autodesk.AutoCAD.Geometry;
+
+namespace AutoCADMCP.Commands
+{
+    public static class MeasureCommands
+    {
+        // Values measured per entity, in this order; NaN where a quantity does not apply
+        private static readonly string[] Quantities = {
+            "length", "area", "volume",
+            "centroid_x", "centroid_y", "centroid_z",
+            "min_x", "min_y", "min_z", "max_x", "max_y", "max_z"
+        };
+
+        // Measures lengths of curves, areas of closed curves, regions and solids, volumes of solids,
+        // centroids and extents in one pass. Values are returned as base64 doubles, one row of
+        // columns per found handle; handles that do not exist are listed as missing.
+        [MCPCommand("MEASURE_ENTITIES", Class = CommandClass.Read)]
+        public static object MeasureEntities(JObject parameters)
+        {
+            return CommandTemplates.Access(parameters,
+                (btr, trans, parameters) => {
+                    var handles = parameters["entityIds"].ToObject<List<long>>();
+                    var found = new List<long>();
+                    var missing = new List<long>();
+                    var values = new List<double>(handles.Count * Quantities.Length);
+
+                    foreach (var handle in handles)
+                    {
+                        if (!btr.Database.TryGetObjectId(new Handle(handle), out ObjectId id) || id.IsErased
+                            || !(trans.GetObject(id, OpenMode.ForRead) is Entity entity))
+                        {
+                            missing.Add(handle);
+                            continue;
+                        }
+                        found.Add(handle);
+                        values.AddRange(Measure(entity));
+                        values.AddRange(BulkCommands.GetExtents(entity));
+                    }
+
+                    return new {
+                        columns = Quantities,
+                        handles = found,
+                        missing = missing,
+                        values = BulkCommands.EncodeDoubles(values)
+                    };
+                },
+                (isSuccess) => isSuccess ? "Entities measured successfully!" : "Failed to measure entities!"
+            );
+        }
+
+        // Length, area, volume and centroid of an entity
+        private static double[] Measure(Entity entity)
+        {
+            double length = double.NaN, area = double.NaN, volume = double.NaN;
+            Point3d? centroid = null;
+
+            try
+            {
+                switch (entity)
+                {
+                    case Solid3d solid:
+                    {
+                        var mass = solid.MassProperties;
+                        volume = mass.Volume;
+                        area = solid.Area;
+                        centroid = mass.Centroid;
+                        break;
+                    }
+                    case Region region:
+                    {
+                        area = region.Area;
+                        length = region.Perimeter;
+                        var plane = new Plane(Point3d.Origin, region.Normal);
+                        var cs = plane.GetCoordinateSystem();
+                        var properties = region.AreaProperties(cs.Origin, cs.Xaxis, cs.Yaxis);
+                        centroid = cs.Origin + cs.Xaxis * properties.Centroid.X + cs.Yaxis * properties.Centroid.Y;
+                        break;
+                    }
+                    case Curve curve:
+                    {
+                        length = curve.GetDistanceAtParameter(curve.EndParam) - curve.GetDistanceAtParameter(curve.StartParam);
+                        if (curve.Closed)
+                        {
+                            area = curve.Area;
+                        }
+                        if (curve is Circle circle)
+                        {
+                            centroid = circle.Center;
+                        }
+                        else if (curve is Ellipse ellipse && curve.Closed)
+                        {
+                            centroid = ellipse.Center;
+                        }
+                        break;
+                    }
+                    case DBPoint point:
+                        centroid = point.Position;
+                        break;
+                }
+            }
+            catch (Autodesk.AutoCAD.Runtime.Exception)
+            {
+                // Degenerate geometry has no measurable properties; keep what was measured
+            }
+
+            return new[] {
+                length, area, volume,
+                centroid?.X ?? double.NaN, centroid?.Y ?? double.NaN, centroid?.Z ?? double.NaN
+            };
+        }
+    }
+}
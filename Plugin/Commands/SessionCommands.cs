@@ -0,0 +1,161 @@
+using System;
+using System.Collections.Generic;
+using Newtonsoft.Json;
+using Newtonsoft.Json.Linq;
+
+using Autodesk.AutoCAD.Runtime;
+using Autodesk.AutoCAD.ApplicationServices;
+using Autodesk.AutoCAD.DatabaseServices;
+using Autodesk.AutoCAD.EditorInput;
+
+namespace AutoCADMCP.Commands
+{
+    // A long-lived document lock and top-level transaction shared by every command
+    // between BEGIN_SESSION and COMMIT_SESSION / ABORT_SESSION. Command transactions
+    // started meanwhile are nested inside it, so the whole sequence is regenerated
+    // once and forms a single undo step, or is discarded in one go on abort.
+    public class TransactionSession
+    {
+        public string Id { get; set; }
+        public Document Document { get; set; }
+        public DocumentLock Lock { get; set; }
+        public Transaction Transaction { get; set; }
+        public TimeSpan Timeout { get; set; }
+        public DateTime LastActivity { get; set; }
+        public int CommandCount { get; set; }
+    }
+
+    public static class SessionCommands
+    {
+        public static TransactionSession ActiveSession { get; private set; }
+
+        [MCPCommand("BEGIN_SESSION")]
+        public static object BeginSession(JObject parameters)
+        {
+            return CommandTemplates.Run(parameters,
+                (doc, parameters) => {
+                    if (ActiveSession != null)
+                    {
+                        throw new System.Exception($"Session {ActiveSession.Id} is already active");
+                    }
+
+                    var timeout = parameters.ContainsKey("timeout") ? parameters["timeout"].Value<double>() : 600.0;
+
+                    var docLock = doc.LockDocument();
+                    var session = new TransactionSession
+                    {
+                        Id = Guid.NewGuid().ToString("N"),
+                        Document = doc,
+                        Lock = docLock,
+                        Transaction = doc.Database.TransactionManager.StartTransaction(),
+                        Timeout = TimeSpan.FromSeconds(timeout),
+                        LastActivity = DateTime.UtcNow
+                    };
+                    ActiveSession = session;
+
+                    return new {
+                        sessionId = session.Id,
+                        timeout = timeout
+                    };
+                },
+                (isSuccess) => isSuccess ? "Session started successfully!" : "Failed to start session!"
+            );
+        }
+
+        [MCPCommand("COMMIT_SESSION")]
+        public static object CommitSession(JObject parameters)
+        {
+            return CommandTemplates.Run(parameters,
+                (doc, parameters) => {
+                    var session = GetSession(parameters);
+                    End(session, commit: true);
+
+                    return new {
+                        sessionId = session.Id,
+                        commandCount = session.CommandCount
+                    };
+                },
+                (isSuccess) => isSuccess ? "Session committed successfully!" : "Failed to commit session!"
+            );
+        }
+
+        [MCPCommand("ABORT_SESSION")]
+        public static object AbortSession(JObject parameters)
+        {
+            return CommandTemplates.Run(parameters,
+                (doc, parameters) => {
+                    var session = GetSession(parameters);
+                    End(session, commit: false);
+
+                    return new {
+                        sessionId = session.Id,
+                        commandCount = session.CommandCount
+                    };
+                },
+                (isSuccess) => isSuccess ? "Session aborted successfully!" : "Failed to abort session!"
+            );
+        }
+
+        // Called for every command that runs while a session is active
+        internal static void Touch()
+        {
+            if (ActiveSession != null)
+            {
+                ActiveSession.LastActivity = DateTime.UtcNow;
+                ActiveSession.CommandCount++;
+            }
+        }
+
+        // Abandoned sessions would keep the document locked forever, so they are aborted after a period of inactivity
+        internal static void AbortIfExpired()
+        {
+            var session = ActiveSession;
+            if (session != null && DateTime.UtcNow - session.LastActivity > session.Timeout)
+            {
+                Log.Warning($"Session {session.Id} expired after {session.Timeout.TotalSeconds}s of inactivity, aborting");
+                End(session, commit: false);
+            }
+        }
+
+        internal static void AbortActive()
+        {
+            if (ActiveSession != null)
+            {
+                End(ActiveSession, commit: false);
+            }
+        }
+
+        private static TransactionSession GetSession(JObject parameters)
+        {
+            var sessionId = parameters["sessionId"].Value<string>();
+            if (ActiveSession == null || ActiveSession.Id != sessionId)
+            {
+                throw new System.Exception($"Session {sessionId} is not active");
+            }
+            return ActiveSession;
+        }
+
+        private static void End(TransactionSession session, bool commit)
+        {
+            ActiveSession = null;
+            try
+            {
+                if (commit)
+                {
+                    session.Transaction.Commit();
+                }
+                else
+                {
+                    session.Transaction.Abort();
+                }
+            }
+            finally
+            {
+                session.Transaction.Dispose();
+                session.Lock.Dispose();
+            }
+
+            session.Document.Editor.Regen();
+        }
+    }
+}
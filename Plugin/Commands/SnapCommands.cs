@@ -0,0 +1,174 @@
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using Newtonsoft.Json.Linq;
+
+using Autodesk.AutoCAD.DatabaseServices;
+using Autodesk.AutoCAD.Geometry;
+
+namespace AutoCADMCP.Commands
+{
+    public static class SnapCommands
+    {
+        // Kinds of snap points, by code (see snapping.py)
+        private enum SnapKind
+        {
+            Endpoint = 0,
+            Midpoint = 1,
+            Center = 2,
+            Node = 3,
+            Insertion = 4,
+            Grip = 5
+        }
+
+        // Returns the snap points of model space entities: curve endpoints, vertices and segment
+        // midpoints, centers of circular curves and solids, point nodes, insertion points, and grip
+        // points of other entities. Either the entities given by entityIds, or one page of all entities.
+        [MCPCommand("GET_SNAP_POINTS", Class = CommandClass.Read)]
+        public static object GetSnapPoints(JObject parameters)
+        {
+            return CommandTemplates.Access(parameters,
+                (btr, trans, parameters) => {
+                    var handles = new List<long>();
+                    var kinds = new List<int>();
+                    var coordinates = new List<double>();
+                    string nextCursor = null;
+
+                    void Collect(Entity entity)
+                    {
+                        foreach (var (point, kind) in GetSnapPoints(entity))
+                        {
+                            handles.Add(entity.Handle.Value);
+                            kinds.Add((int)kind);
+                            coordinates.Add(point.X);
+                            coordinates.Add(point.Y);
+                            coordinates.Add(point.Z);
+                        }
+                    }
+
+                    if (parameters.ContainsKey("entityIds"))
+                    {
+                        foreach (var handle in parameters["entityIds"].ToObject<List<long>>())
+                        {
+                            if (btr.Database.TryGetObjectId(new Handle(handle), out ObjectId id) && !id.IsErased
+                                && trans.GetObject(id, OpenMode.ForRead) is Entity entity)
+                            {
+                                Collect(entity);
+                            }
+                        }
+                    }
+                    else
+                    {
+                        var cursor = parameters["cursor"]?.ToString();
+                        var pageSize = parameters.ContainsKey("pageSize") ? parameters["pageSize"].Value<int>() : 5000;
+                        foreach (ObjectId id in ModelSpacePages.Next(btr, cursor, pageSize, out nextCursor))
+                        {
+                            if (trans.GetObject(id, OpenMode.ForRead) is Entity entity)
+                            {
+                                Collect(entity);
+                            }
+                        }
+                    }
+
+                    return new {
+                        handles = handles,
+                        kinds = kinds,
+                        points = BulkCommands.EncodeDoubles(coordinates),
+                        nextCursor = nextCursor
+                    };
+                },
+                (isSuccess) => isSuccess ? "Snap points retrieved successfully!" : "Failed to retrieve snap points!"
+            );
+        }
+
+        private static IEnumerable<(Point3d, SnapKind)> GetSnapPoints(Entity entity)
+        {
+            var points = new List<(Point3d, SnapKind)>();
+            try
+            {
+                switch (entity)
+                {
+                    case Circle circle:
+                        points.Add((circle.Center, SnapKind.Center));
+                        break;
+                    case Arc arc:
+                        points.Add((arc.StartPoint, SnapKind.Endpoint));
+                        points.Add((arc.EndPoint, SnapKind.Endpoint));
+                        points.Add((arc.GetPointAtDist(arc.Length / 2), SnapKind.Midpoint));
+                        points.Add((arc.Center, SnapKind.Center));
+                        break;
+                    case Ellipse ellipse:
+                        points.Add((ellipse.Center, SnapKind.Center));
+                        if (!ellipse.Closed)
+                        {
+                            points.Add((ellipse.StartPoint, SnapKind.Endpoint));
+                            points.Add((ellipse.EndPoint, SnapKind.Endpoint));
+                        }
+                        break;
+                    case Polyline _:
+                    case Polyline2d _:
+                    case Polyline3d _:
+                    {
+                        // Polyline parameters run from vertex to vertex, so whole parameters are
+                        // vertices and half parameters segment midpoints
+                        var curve = (Curve)entity;
+                        int segments = (int)Math.Round(curve.EndParam - curve.StartParam);
+                        for (int i = 0; i <= segments; i++)
+                        {
+                            var parameter = curve.StartParam + i;
+                            if (i < segments || !curve.Closed)
+                            {
+                                points.Add((curve.GetPointAtParameter(parameter), SnapKind.Endpoint));
+                            }
+                            if (i < segments)
+                            {
+                                points.Add((curve.GetPointAtParameter(parameter + 0.5), SnapKind.Midpoint));
+                            }
+                        }
+                        break;
+                    }
+                    case Curve curve:
+                        if (!curve.Closed)
+                        {
+                            points.Add((curve.StartPoint, SnapKind.Endpoint));
+                            points.Add((curve.EndPoint, SnapKind.Endpoint));
+                        }
+                        var length = curve.GetDistanceAtParameter(curve.EndParam);
+                        points.Add((curve.GetPointAtDist(length / 2), SnapKind.Midpoint));
+                        break;
+                    case DBPoint point:
+                        points.Add((point.Position, SnapKind.Node));
+                        break;
+                    case BlockReference reference:
+                        points.Add((reference.Position, SnapKind.Insertion));
+                        break;
+                    case DBText text:
+                        points.Add((text.Position, SnapKind.Insertion));
+                        break;
+                    case MText mtext:
+                        points.Add((mtext.Location, SnapKind.Insertion));
+                        break;
+                    case Solid3d solid:
+                        points.Add((solid.MassProperties.Centroid, SnapKind.Center));
+                        AddGripPoints(solid, points);
+                        break;
+                    default:
+                        AddGripPoints(entity, points);
+                        break;
+                }
+            }
+            catch (Autodesk.AutoCAD.Runtime.Exception)
+            {
+                // Degenerate geometry contributes the points found before it failed
+            }
+            return points;
+        }
+
+        private static void AddGripPoints(Entity entity, List<(Point3d, SnapKind)> points)
+        {
+            var grips = new Point3dCollection();
+            entity.GetGripPoints(grips, new IntegerCollection(), new IntegerCollection());
+            points.AddRange(grips.Cast<Point3d>().Select(grip => (grip, SnapKind.Grip)));
+        }
+    }
+}
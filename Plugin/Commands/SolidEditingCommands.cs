@@ -13,7 +13,7 @@ namespace AutoCADMCP.Commands
 {
     public static class SolidEditingCommands
     {
-        [MCPCommand("COMBINE_SOLIDS")]
+        [MCPCommand("COMBINE_SOLIDS", Class = CommandClass.Heavy)]
         public static object CombineSolids(JObject parameters)
         {
             return CommandTemplates.ModifyEntities(parameters, 
@@ -50,6 +50,7 @@ namespace AutoCADMCP.Commands
                         if (entities[i] is Solid3d solid)
                         {
                             initialSolid.BooleanOperation(operationType, solid);
+                            Jobs.ReportProgress(i, entities.Count - 1);
                         }
                         else
                         {
@@ -67,7 +68,58 @@ namespace AutoCADMCP.Commands
             );
         }
 
-        [MCPCommand("SWEEP_SOLID")]
+        // Exact, non-destructive interference test of pairs of solids, typically the candidates of a
+        // bounding box broad phase. Returns the pairs that interfere and the handles that are not solids.
+        [MCPCommand("CHECK_INTERFERENCE", Class = CommandClass.Heavy)]
+        public static object CheckInterference(JObject parameters)
+        {
+            return CommandTemplates.Access(parameters,
+                (btr, trans, parameters) => {
+                    var solids = new Dictionary<long, Solid3d>();
+                    var invalid = new HashSet<long>();
+                    var interfering = new List<long[]>();
+
+                    Solid3d GetSolid(long handle)
+                    {
+                        if (!solids.TryGetValue(handle, out var solid) && !invalid.Contains(handle))
+                        {
+                            if (btr.Database.TryGetObjectId(new Handle(handle), out ObjectId id) && !id.IsErased)
+                            {
+                                solid = trans.GetObject(id, OpenMode.ForRead) as Solid3d;
+                            }
+                            if (solid == null)
+                            {
+                                invalid.Add(handle);
+                            }
+                            else
+                            {
+                                solids[handle] = solid;
+                            }
+                        }
+                        return solid;
+                    }
+
+                    foreach (JArray pair in parameters["pairs"])
+                    {
+                        long first = pair[0].Value<long>(), second = pair[1].Value<long>();
+                        var a = GetSolid(first);
+                        var b = GetSolid(second);
+                        if (a != null && b != null && a.CheckInterference(b))
+                        {
+                            interfering.Add(new[] { first, second });
+                        }
+                    }
+
+                    return new {
+                        interfering = interfering,
+                        invalid = invalid
+                    };
+                },
+                (isSuccess) => isSuccess ? "Interference checked successfully!" : "Failed to check interference!"
+            );
+        }
+
+        [MCPCommand("SWEEP_SOLID", Class = CommandClass.Heavy)]
         public static object SweepSolid(JObject parameters)
         {
             return CommandTemplates.ModifyEntities(parameters, 
@@ -16,7 +16,7 @@ namespace AutoCADMCP.Commands
         [MCPCommand("CREATE_DIMENSION")]
         public static object CreateDimension(JObject parameters)
         {
-            var dimstyle = Application.DocumentManager.MdiActiveDocument.Database.Dimstyle;
+            var dimstyle = CommandTemplates.CurrentDocument.Database.Dimstyle;
 
             return CommandTemplates.Modify(parameters, 
                 (btr, trans, parameters) => {
@@ -1,7 +1,9 @@
 using System;
 using System.IO;
 using System.Drawing;
+using System.Text;
 using System.Collections.Generic;
+using System.Threading.Tasks;
 using System.Windows.Forms;
 using Newtonsoft.Json;
 using Newtonsoft.Json.Linq;
@@ -14,93 +16,339 @@ using Autodesk.AutoCAD.EditorInput;
 
 namespace AutoCADMCP.Commands
 {
+    public class RenderJob
+    {
+        public string Id { get; set; }
+        public JObject Parameters { get; set; }
+        public string OutputPath { get; set; }
+        public string Status { get; set; } = "queued";
+        public string Error { get; set; }
+        // Taken when the job starts, before its view is applied
+        public string RenderToken { get; set; }
+        public TaskCompletionSource<bool> Completion { get; } =
+            new TaskCompletionSource<bool>(TaskCreationOptions.RunContinuationsAsynchronously);
+    }
+
     public static class ViewCommands
     {
+        private const int MaxFinishedJobs = 64;
+
+        private static readonly object jobLock = new object();
+        private static readonly Dictionary<string, RenderJob> jobs = new();
+        private static readonly Queue<RenderJob> pendingJobs = new();
+        private static readonly Queue<string> finishedJobIds = new();
+        private static RenderJob activeJob;
         private static ViewTableRecord originalView;
+        // Lighting settings of the viewport from before the active job applied its view
+        private static string originalViewportSettings;
 
-        [MCPCommand("CAPTURE_VIEW")]
+        [MCPCommand("CAPTURE_VIEW", Class = CommandClass.Heavy)]
         public static object CaptureView(JObject parameters)
         {
             return CommandTemplates.Run(parameters,
                 (doc, parameters) => {
-                    Editor ed = doc.Editor;
-                    Database db = doc.Database;
-    
-                    var target = parameters["target"].ToObject<double[]>();
-                    var viewHeight = parameters["viewHeight"].ToObject<double>();
-                    var viewDirection = parameters["viewDirection"].ToObject<double[]>();
-                    var perspectiveEnabled = parameters["perspectiveEnabled"].ToObject<bool>();
-                    var lensLength = perspectiveEnabled ? parameters["lensLength"].ToObject<double>() : 0;
-
-                    // var viewDirection = (OrthographicView)Enum.Parse(typeof(OrthographicView), parameters["viewDirection"].Value<string>(), true);
-                    using (Transaction trans = db.TransactionManager.StartTransaction())
-                    {
-                        try
-                        {
-                            originalView = ed.GetCurrentView();
-
-                            // Create a new view definition
-                            ViewTableRecord view = new ViewTableRecord();
-
-                            // Resize the view to the new height
-                            var viewWidth = originalView.Width * viewHeight / originalView.Height;
+                    var outputDirectory = parameters.ContainsKey("outputDirectory") && parameters["outputDirectory"].Type != JTokenType.Null ?
+                        parameters["outputDirectory"].Value<string>() : Path.Combine(Path.GetTempPath(), "AutoCADMCP");
+                    Directory.CreateDirectory(outputDirectory);
 
-                            // Set the view direction
-                            var forwardVector = (new Vector3d(viewDirection[0], viewDirection[1], viewDirection[2])).GetNormal();
-                            // var rightVector = (new Vector3d(-viewDirection[1], viewDirection[0], 0)).GetNormal();
-                            //var upVector = forwardVector.CrossProduct(rightVector).GetNormal();
+                    // Each job renders to its own file so concurrent captures never overwrite each other
+                    var jobId = Guid.NewGuid().ToString("N");
+                    var job = new RenderJob
+                    {
+                        Id = jobId,
+                        Parameters = parameters,
+                        OutputPath = Path.Combine(outputDirectory, $"render_{jobId}.png")
+                    };
 
-                            // Set view direction and target
-                            view.ViewDirection = forwardVector;
-                            view.Target = new Point3d(target[0], target[1], target[2]);
-                            view.CenterPoint = Point2d.Origin;
+                    bool startNow;
+                    lock (jobLock)
+                    {
+                        jobs[jobId] = job;
+                        pendingJobs.Enqueue(job);
+                        startNow = activeJob == null;
+                    }
 
-                            view.Height = viewHeight;
-                            view.Width = viewWidth;
+                    if (startNow)
+                    {
+                        StartNextJob(doc);
+                    }
 
-                            // view.PerspectiveEnabled = perspectiveEnabled;
+                    return DescribeJob(job);
+                },
+                (isSuccess) => isSuccess ? "View capture queued successfully!" : "Failed to capture view!"
+            );
+        }
 
-                            if (perspectiveEnabled)
-                            {
-                                // view.LensLength = lensLength;
-                            }
+        // Returns the current render token, so clients can look up a cached render without queueing
+        // a capture behind other heavy commands
+        [MCPCommand("GET_RENDER_TOKEN", Class = CommandClass.Read)]
+        public static object GetRenderTokenCommand(JObject parameters)
+        {
+            return CommandTemplates.Run(parameters,
+                (doc, parameters) => new {
+                    renderToken = GetRenderToken(doc)
+                },
+                (isSuccess) => isSuccess ? "Render token retrieved successfully!" : "Failed to retrieve render token!"
+            );
+        }
 
-                            // Apply it to the editor (model space)
-                            ed.SetCurrentView(view);
+        [MCPCommand("GET_RENDER_JOB", Immediate = true, Class = CommandClass.Read)]
+        public static Task<object> GetRenderJob(JObject parameters)
+        {
+            return CommandTemplates.RunImmediate(parameters,
+                async (parameters) => {
+                    var jobId = parameters["jobId"].Value<string>();
+                    var wait = parameters.ContainsKey("wait") && parameters["wait"].Value<bool>();
+                    var timeout = parameters.ContainsKey("timeout") ? parameters["timeout"].Value<double>() : 60.0;
 
-                            // Commit the transaction
-                            trans.Commit();
-                        }
-                        catch (System.Exception e)
+                    RenderJob job;
+                    lock (jobLock)
+                    {
+                        if (!jobs.TryGetValue(jobId, out job))
                         {
-                            trans.Abort();
-                            throw e;
+                            throw new System.Exception($"Unknown render job: {jobId}");
                         }
                     }
 
-                    string imagePath = @"C:\Temp\render_output.png";
-                    System.IO.Directory.CreateDirectory(Path.GetDirectoryName(imagePath));
-                    System.IO.File.Delete(imagePath);
-
-                    string renderScript = $"-RENDER\nLow\n\n\n\nYes\n{imagePath}\nRENDERWINDOWCLOSE\n";
-                    doc.SendStringToExecute(renderScript, true, false, false);
+                    if (wait)
+                    {
+                        await Task.WhenAny(job.Completion.Task, Task.Delay(TimeSpan.FromSeconds(timeout)));
+                    }
 
-                    doc.CommandEnded += OnCommandEnded;
+                    var description = JObject.FromObject(DescribeJob(job));
+                    if (job.Status == "completed")
+                    {
+                        description["imageData"] = Convert.ToBase64String(File.ReadAllBytes(job.OutputPath));
+                    }
 
-                    Log.Info($"Rendering complete. Image saved to: {imagePath}");
-                    return imagePath;
+                    return description;
                 },
-                (isSuccess) => isSuccess ? "View captured successfully!" : "Failed to capture view!"
+                (isSuccess) => isSuccess ? "Render job retrieved successfully!" : "Failed to retrieve render job!"
             );
         }
 
+        // Identifies what a render depends on besides the requested view: the drawing revision,
+        // and the lighting settings and background of the current viewport. The viewport record
+        // changes with every zoom and pan, so it is not part of the revision (see DrawingRevision),
+        // but its lighting settings are compared here. While a render job has its view applied,
+        // the settings from before are used.
+        internal static string GetRenderToken(Document doc)
+        {
+            return DrawingRevision.GetToken(doc.Database) + "/" + (originalViewportSettings ?? GetViewportSettings(doc));
+        }
+
+        private static string GetViewportSettings(Document doc)
+        {
+            var db = doc.Database;
+            var settings = new StringBuilder();
+            settings.Append(Autodesk.AutoCAD.ApplicationServices.Application.GetSystemVariable("LIGHTINGUNITS"));
+            using (var trans = db.TransactionManager.StartOpenCloseTransaction())
+            {
+                var viewportId = db.CurrentViewportTableRecordId;
+                if (!viewportId.IsNull && trans.GetObject(viewportId, OpenMode.ForRead) is ViewportTableRecord viewport)
+                {
+                    settings.Append('/').Append(viewport.DefaultLightingOn)
+                        .Append('/').Append(viewport.DefaultLightingType)
+                        .Append('/').Append(viewport.Brightness)
+                        .Append('/').Append(viewport.Contrast)
+                        .Append('/').Append(viewport.Background.Handle.Value)
+                        .Append('/').Append(viewport.SunId.Handle.Value)
+                        .Append('/').Append(viewport.VisualStyleId.Handle.Value);
+                }
+            }
+            return settings.ToString();
+        }
+
+        private static object DescribeJob(RenderJob job)
+        {
+            lock (jobLock)
+            {
+                return new {
+                    jobId = job.Id,
+                    status = job.Status,
+                    outputPath = job.OutputPath,
+                    error = job.Error,
+                    renderToken = job.RenderToken,
+                    queuePosition = job.Status == "queued" ? new List<RenderJob>(pendingJobs).IndexOf(job) : -1
+                };
+            }
+        }
+
+        private static void StartNextJob(Document doc)
+        {
+            RenderJob job;
+            lock (jobLock)
+            {
+                if (pendingJobs.Count == 0)
+                {
+                    activeJob = null;
+                    return;
+                }
+                job = pendingJobs.Dequeue();
+                activeJob = job;
+                job.Status = "rendering";
+            }
+
+            try
+            {
+                // Read in the same slice that applies the view, so it describes the state this job renders
+                var viewportSettings = GetViewportSettings(doc);
+                lock (jobLock)
+                {
+                    job.RenderToken = DrawingRevision.GetToken(doc.Database) + "/" + viewportSettings;
+                }
+                originalViewportSettings = viewportSettings;
+                ApplyView(doc, job.Parameters);
+
+                if (File.Exists(job.OutputPath))
+                {
+                    File.Delete(job.OutputPath);
+                }
+
+                doc.CommandEnded += OnCommandEnded;
+                doc.CommandCancelled += OnCommandCancelled;
+                doc.CommandFailed += OnCommandCancelled;
+
+                string renderScript = $"-RENDER\nLow\n\n\n\nYes\n{job.OutputPath}\nRENDERWINDOWCLOSE\n";
+                doc.SendStringToExecute(renderScript, true, false, false);
+            }
+            catch (System.Exception ex)
+            {
+                FinishJob(doc, ex.Message);
+            }
+        }
+
+        private static void ApplyView(Document doc, JObject parameters)
+        {
+            Editor ed = doc.Editor;
+            Database db = doc.Database;
+
+            var target = parameters["target"].ToObject<double[]>();
+            var viewHeight = parameters["viewHeight"].ToObject<double>();
+            var viewDirection = parameters["viewDirection"].ToObject<double[]>();
+            var perspectiveEnabled = parameters["perspectiveEnabled"].ToObject<bool>();
+            var lensLength = perspectiveEnabled ? parameters["lensLength"].ToObject<double>() : 0;
+
+            // The view may be applied from a command event handler, outside of any MCP command
+            using (DocumentLock docLock = doc.LockDocument())
+            using (Transaction trans = db.TransactionManager.StartTransaction())
+            {
+                try
+                {
+                    originalView = ed.GetCurrentView();
+
+                    // Create a new view definition
+                    ViewTableRecord view = new ViewTableRecord();
+
+                    // Resize the view to the new height
+                    var viewWidth = originalView.Width * viewHeight / originalView.Height;
+
+                    // Set the view direction
+                    var forwardVector = (new Vector3d(viewDirection[0], viewDirection[1], viewDirection[2])).GetNormal();
+
+                    // Set view direction and target
+                    view.ViewDirection = forwardVector;
+                    view.Target = new Point3d(target[0], target[1], target[2]);
+                    view.CenterPoint = Point2d.Origin;
+
+                    view.Height = viewHeight;
+                    view.Width = viewWidth;
+
+                    view.PerspectiveEnabled = perspectiveEnabled;
+
+                    if (perspectiveEnabled)
+                    {
+                        view.LensLength = lensLength;
+                    }
+
+                    // Apply it to the editor (model space)
+                    ed.SetCurrentView(view);
+
+                    // Commit the transaction
+                    trans.Commit();
+                }
+                catch (System.Exception e)
+                {
+                    trans.Abort();
+                    throw e;
+                }
+            }
+        }
+
         private static void OnCommandEnded(object sender, CommandEventArgs e)
         {
+            if (e.GlobalCommandName != "RENDER")
+            {
+                return;
+            }
+
             Log.Info("Command ended: " + e.GlobalCommandName);
-            // Restore the original view
-            Document doc = Autodesk.AutoCAD.ApplicationServices.Application.DocumentManager.MdiActiveDocument;
+
+            string outputPath;
+            lock (jobLock)
+            {
+                outputPath = activeJob?.OutputPath;
+            }
+
+            FinishJob(sender as Document, outputPath != null && File.Exists(outputPath) ? null : "Render did not produce an image");
+        }
+
+        private static void OnCommandCancelled(object sender, CommandEventArgs e)
+        {
+            if (e.GlobalCommandName != "RENDER")
+            {
+                return;
+            }
+
+            FinishJob(sender as Document, "Render was cancelled or failed");
+        }
+
+        private static void FinishJob(Document doc, string error)
+        {
             doc.CommandEnded -= OnCommandEnded;
+            doc.CommandCancelled -= OnCommandCancelled;
+            doc.CommandFailed -= OnCommandCancelled;
+
+            RestoreView(doc);
+            originalViewportSettings = null;
+
+            RenderJob job;
+            lock (jobLock)
+            {
+                job = activeJob;
+                activeJob = null;
+                if (job != null)
+                {
+                    job.Status = error == null ? "completed" : "failed";
+                    job.Error = error;
 
+                    // Only remember a bounded number of finished jobs
+                    finishedJobIds.Enqueue(job.Id);
+                    while (finishedJobIds.Count > MaxFinishedJobs)
+                    {
+                        jobs.Remove(finishedJobIds.Dequeue());
+                    }
+                }
+            }
+
+            if (job != null)
+            {
+                Log.Info(error == null ? $"Rendering complete. Image saved to: {job.OutputPath}" : $"Rendering failed: {error}");
+                job.Completion.TrySetResult(error == null);
+            }
+
+            StartNextJob(doc);
+        }
+
+        private static void RestoreView(Document doc)
+        {
+            if (originalView == null)
+            {
+                return;
+            }
+
+            // Restore the original view
+            using (DocumentLock docLock = doc.LockDocument())
             using (Transaction trans = doc.Database.TransactionManager.StartTransaction())
             {
                 try
@@ -113,7 +361,11 @@ namespace AutoCADMCP.Commands
                     trans.Abort();
                     Log.Error("Failed to restore view: " + ex.Message);
                 }
+                finally
+                {
+                    originalView = null;
+                }
             }
         }
     }
-}
\ No newline at end of file
+}
@@ -1,4 +1,5 @@
 using System;
+using System.Collections.Generic;
 using System.Linq;
 using Newtonsoft.Json.Linq;
 using Autodesk.AutoCAD.Runtime;
@@ -9,7 +10,7 @@ namespace AutoCADMCP.Commands
 {
     public static class WorkspaceCommands
     {
-        [MCPCommand("GET_CURRENT_WORKSPACE")]
+        [MCPCommand("GET_CURRENT_WORKSPACE", Class = CommandClass.Read)]
         public static object GetCurrentWorkspace(JObject parameters)
         {
             return CommandTemplates.Run(parameters,
@@ -20,6 +21,33 @@ namespace AutoCADMCP.Commands
             );
         }
 
+        [MCPCommand("GET_DOCUMENTS", Class = CommandClass.Read)]
+        public static object GetDocuments(JObject parameters)
+        {
+            return CommandTemplates.Run(parameters,
+                (doc, parameters) => {
+                    var active = Application.DocumentManager.MdiActiveDocument;
+                    var documents = new List<object>();
+                    foreach (Document document in Application.DocumentManager)
+                    {
+                        documents.Add(new {
+                            name = document.Name,
+                            fileName = System.IO.Path.GetFileName(document.Name),
+                            isActive = document == active,
+                            isReadOnly = document.IsReadOnly,
+                            revision = DrawingRevision.GetRevision(document.Database)
+                        });
+                    }
+
+                    return new {
+                        processId = System.Diagnostics.Process.GetCurrentProcess().Id,
+                        documents = documents
+                    };
+                },
+                (isSuccess) => isSuccess ? "Documents retrieved successfully!" : "Failed to retrieve documents!"
+            );
+        }
+
         [MCPCommand("SET_CURRENT_WORKSPACE")]
         public static object SetCurrentWorkspace(JObject parameters)
         {
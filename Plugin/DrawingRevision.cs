@@ -0,0 +1,390 @@
+using System;
+using System.Collections.Generic;
+using System.Threading;
+
+using Autodesk.AutoCAD.ApplicationServices;
+using Autodesk.AutoCAD.DatabaseServices;
+
+namespace AutoCADMCP
+{
+    public enum ChangeKind
+    {
+        Added,
+        Modified,
+        Erased
+    }
+
+    // Tracks a monotonically increasing revision per drawing database. The revision is bumped
+    // for every committed change of drawing content, whether by an MCP command or the user:
+    // entities appended, modified or erased, appends undone or redone, and changes of the
+    // symbol table records, materials, visual styles, suns and backgrounds that decide how
+    // entities look.
+    // Changes to model space entities are also recorded in a bounded log, so clients can ask for
+    // what changed since a revision instead of re-reading the whole drawing. Changes of other
+    // content, such as layers and block definitions, are not logged, but the revision of the
+    // last one is kept, so clients can tell when entities may look different without having
+    // changed themselves.
+    //
+    // Changes made inside a transaction are held back until the outermost transaction commits,
+    // and dropped if the transaction that made them is aborted, so readers never see a revision
+    // for content that is rolled back.
+    public static class DrawingRevision
+    {
+        private readonly struct Change
+        {
+            public readonly long Revision;
+            public readonly long Handle;
+            public readonly ChangeKind Kind;
+
+            public Change(long revision, long handle, ChangeKind kind)
+            {
+                Revision = revision;
+                Handle = handle;
+                Kind = kind;
+            }
+        }
+
+        // A change not yet published. Kind is null for changes that bump the revision without
+        // being logged, such as those of objects outside model space. Definition is set for
+        // changes of content outside model space.
+        private readonly struct PendingChange
+        {
+            public readonly long Handle;
+            public readonly ChangeKind? Kind;
+            public readonly bool Definition;
+
+            public PendingChange(long handle, ChangeKind? kind, bool definition)
+            {
+                Handle = handle;
+                Kind = kind;
+                Definition = definition;
+            }
+        }
+
+        private class RevisionState
+        {
+            public long Revision;
+            public string Epoch;
+            public readonly Queue<Change> Log = new();
+            // Changes up to this revision were dropped from the log
+            public long TruncatedThrough;
+            // Revision of the last change of content outside model space
+            public long DefinitionsChangedAt;
+            // Changes of every open transaction, the innermost on top
+            public readonly Stack<List<PendingChange>> Open = new();
+            public TransactionEventHandler Started;
+            public TransactionEventHandler Ended;
+            public TransactionEventHandler Aborted;
+        }
+
+        // Number of changes remembered per drawing
+        public const int ChangeLogCapacity = 100000;
+
+        // Distinguishes revisions issued by different plugin sessions
+        public static readonly string Epoch = Guid.NewGuid().ToString("N").Substring(0, 8);
+        private static int nextDatabase;
+
+        private static readonly object stateLock = new object();
+        private static readonly Dictionary<Database, RevisionState> states = new();
+
+        public static void AttachAll()
+        {
+            foreach (Document doc in Application.DocumentManager)
+            {
+                Attach(doc.Database);
+            }
+            Application.DocumentManager.DocumentCreated += OnDocumentCreated;
+        }
+
+        public static void DetachAll()
+        {
+            Application.DocumentManager.DocumentCreated -= OnDocumentCreated;
+            lock (stateLock)
+            {
+                foreach (var entry in states)
+                {
+                    var db = entry.Key;
+                    db.ObjectAppended -= OnObjectAppended;
+                    db.ObjectModified -= OnObjectModified;
+                    db.ObjectErased -= OnObjectErased;
+                    db.ObjectUnappended -= OnObjectUnappended;
+                    db.ObjectReappended -= OnObjectReappended;
+                    db.TransactionManager.TransactionStarted -= entry.Value.Started;
+                    db.TransactionManager.TransactionEnded -= entry.Value.Ended;
+                    db.TransactionManager.TransactionAborted -= entry.Value.Aborted;
+                }
+                states.Clear();
+            }
+        }
+
+        public static void Attach(Database db)
+        {
+            RevisionState state;
+            lock (stateLock)
+            {
+                if (states.ContainsKey(db))
+                {
+                    return;
+                }
+                // Every database gets its own epoch, so revisions of different documents never compare equal
+                state = states[db] = new RevisionState { Epoch = $"{Epoch}.{++nextDatabase}" };
+            }
+            state.Started = (sender, e) => OnTransactionStarted(state);
+            state.Ended = (sender, e) => OnTransactionEnded(state);
+            state.Aborted = (sender, e) => OnTransactionAborted(state);
+
+            db.ObjectAppended += OnObjectAppended;
+            db.ObjectModified += OnObjectModified;
+            db.ObjectErased += OnObjectErased;
+            db.ObjectUnappended += OnObjectUnappended;
+            db.ObjectReappended += OnObjectReappended;
+            db.TransactionManager.TransactionStarted += state.Started;
+            db.TransactionManager.TransactionEnded += state.Ended;
+            db.TransactionManager.TransactionAborted += state.Aborted;
+        }
+
+        public static long GetRevision(Database db)
+        {
+            lock (stateLock)
+            {
+                return states.TryGetValue(db, out var state) ? Interlocked.Read(ref state.Revision) : 0;
+            }
+        }
+
+        public static string GetEpoch(Database db)
+        {
+            lock (stateLock)
+            {
+                return states.TryGetValue(db, out var state) ? state.Epoch : Epoch;
+            }
+        }
+
+        public static string GetToken(Database db)
+        {
+            return $"{GetEpoch(db)}:{GetRevision(db)}";
+        }
+
+        private static void OnDocumentCreated(object sender, DocumentCollectionEventArgs e)
+        {
+            Attach(e.Document.Database);
+        }
+
+        // Returns the model space entities added, modified and erased after revision since, each
+        // handle appearing in at most one list, and whether content outside model space changed
+        // meanwhile. Returns false when the log no longer covers that revision, or when since
+        // belongs to another epoch, and the client has to re-read everything.
+        public static bool TryGetChangesSince(Database db, string since, out List<long> added, out List<long> modified, out List<long> erased,
+                                              out bool definitionsChanged)
+        {
+            added = new List<long>();
+            modified = new List<long>();
+            erased = new List<long>();
+            definitionsChanged = false;
+
+            RevisionState state;
+            lock (stateLock)
+            {
+                if (!states.TryGetValue(db, out state))
+                {
+                    return false;
+                }
+            }
+
+            int separator = since?.LastIndexOf(':') ?? -1;
+            if (separator < 0 || since.Substring(0, separator) != state.Epoch
+                || !long.TryParse(since.Substring(separator + 1), out var revision))
+            {
+                return false;
+            }
+
+            // First and last change of every handle since the revision, in order of first change
+            var first = new Dictionary<long, ChangeKind>();
+            var last = new Dictionary<long, ChangeKind>();
+            var order = new List<long>();
+            lock (state)
+            {
+                if (revision < state.TruncatedThrough || revision > state.Revision)
+                {
+                    return false;
+                }
+                definitionsChanged = state.DefinitionsChangedAt > revision;
+                foreach (var change in state.Log)
+                {
+                    if (change.Revision <= revision)
+                    {
+                        continue;
+                    }
+                    if (!first.ContainsKey(change.Handle))
+                    {
+                        first[change.Handle] = change.Kind;
+                        order.Add(change.Handle);
+                    }
+                    last[change.Handle] = change.Kind;
+                }
+            }
+
+            foreach (var handle in order)
+            {
+                bool existedBefore = first[handle] != ChangeKind.Added;
+                bool existsNow = last[handle] != ChangeKind.Erased;
+                if (existedBefore && existsNow)
+                {
+                    modified.Add(handle);
+                }
+                else if (existsNow)
+                {
+                    added.Add(handle);
+                }
+                else if (existedBefore)
+                {
+                    erased.Add(handle);
+                }
+            }
+            return true;
+        }
+
+        // Whether a change of obj can alter what the drawing looks like. Viewport records change
+        // with every zoom and pan, which the clients pass explicitly wherever it matters.
+        private static bool IsContent(DBObject obj)
+        {
+            return obj is Entity
+                || (obj is SymbolTableRecord && !(obj is ViewportTableRecord))
+                || obj is Material
+                || obj is DBVisualStyle
+                || obj is Sun
+                || obj is Background;
+        }
+
+        private static void OnObjectAppended(object sender, ObjectEventArgs e)
+        {
+            if (IsContent(e.DBObject))
+            {
+                Record(sender as Database, e.DBObject, ChangeKind.Added);
+            }
+        }
+
+        private static void OnObjectModified(object sender, ObjectEventArgs e)
+        {
+            if (IsContent(e.DBObject))
+            {
+                Record(sender as Database, e.DBObject, ChangeKind.Modified);
+            }
+        }
+
+        private static void OnObjectErased(object sender, ObjectErasedEventArgs e)
+        {
+            if (IsContent(e.DBObject))
+            {
+                // Unerasing, as undo does, brings the entity back
+                Record(sender as Database, e.DBObject, e.Erased ? ChangeKind.Erased : ChangeKind.Added);
+            }
+        }
+
+        // Undoing an append, or aborting the transaction that made it, removes the object again,
+        // so clients that heard of it must drop it like an erased one
+        private static void OnObjectUnappended(object sender, ObjectEventArgs e)
+        {
+            if (IsContent(e.DBObject))
+            {
+                Record(sender as Database, e.DBObject, ChangeKind.Erased);
+            }
+        }
+
+        // Redoing an append
+        private static void OnObjectReappended(object sender, ObjectEventArgs e)
+        {
+            if (IsContent(e.DBObject))
+            {
+                Record(sender as Database, e.DBObject, ChangeKind.Added);
+            }
+        }
+
+        private static void OnTransactionStarted(RevisionState state)
+        {
+            lock (state)
+            {
+                state.Open.Push(new List<PendingChange>());
+            }
+        }
+
+        private static void OnTransactionEnded(RevisionState state)
+        {
+            lock (state)
+            {
+                // Transactions started before the plugin attached are not tracked
+                if (state.Open.Count == 0)
+                {
+                    return;
+                }
+                var committed = state.Open.Pop();
+                if (state.Open.Count > 0)
+                {
+                    // A nested transaction's changes still depend on the enclosing one
+                    state.Open.Peek().AddRange(committed);
+                    return;
+                }
+                foreach (var change in committed)
+                {
+                    Publish(state, change);
+                }
+            }
+        }
+
+        private static void OnTransactionAborted(RevisionState state)
+        {
+            lock (state)
+            {
+                if (state.Open.Count > 0)
+                {
+                    state.Open.Pop();
+                }
+            }
+        }
+
+        private static void Record(Database db, DBObject obj, ChangeKind? kind)
+        {
+            RevisionState state;
+            lock (stateLock)
+            {
+                if (db == null || !states.TryGetValue(db, out state))
+                {
+                    return;
+                }
+            }
+
+            // Only model space entities are logged. Model space itself is modified by every append and erase.
+            var modelSpaceId = SymbolUtilityServices.GetBlockModelSpaceId(db);
+            bool inModelSpace = obj is Entity && obj.OwnerId == modelSpaceId;
+            var change = new PendingChange(obj.Handle.Value, inModelSpace ? kind : null,
+                !inModelSpace && obj.ObjectId != modelSpaceId);
+            lock (state)
+            {
+                if (state.Open.Count > 0)
+                {
+                    state.Open.Peek().Add(change);
+                    return;
+                }
+                Publish(state, change);
+            }
+        }
+
+        // Must be called holding the state's lock
+        private static void Publish(RevisionState state, PendingChange change)
+        {
+            long revision = Interlocked.Increment(ref state.Revision);
+            if (change.Definition)
+            {
+                state.DefinitionsChangedAt = revision;
+            }
+            if (change.Kind == null)
+            {
+                return;
+            }
+            state.Log.Enqueue(new Change(revision, change.Handle, change.Kind.Value));
+            while (state.Log.Count > ChangeLogCapacity)
+            {
+                state.TruncatedThrough = state.Log.Dequeue().Revision;
+            }
+        }
+    }
+}
@@ -0,0 +1,167 @@
+using System;
+using System.Collections.Concurrent;
+using System.Collections.Generic;
+using System.Linq;
+using System.Reflection;
+
+using Newtonsoft.Json.Linq;
+using Autodesk.AutoCAD.DatabaseServices;
+using Autodesk.AutoCAD.EditorInput;
+
+namespace AutoCADMCP
+{
+    // Evaluates the filter expressions compiled by the server. The part of an expression that
+    // selection filters can express arrives as a list of [code, value] DXF items; the rest is a
+    // tree of {op: and|or|not|cmp|in} nodes evaluated on each entity.
+    public static class EntityFilter
+    {
+        // Property chains resolved per entity type and dotted field name
+        private static readonly ConcurrentDictionary<(Type, string), PropertyInfo[]> properties = new();
+
+        public static SelectionFilter ToSelectionFilter(JArray items)
+        {
+            return new SelectionFilter(items.Select(item => ToTypedValue(item[0].Value<int>(), item[1])).ToArray());
+        }
+
+        private static TypedValue ToTypedValue(int code, JToken value)
+        {
+            // The value type of a group code follows from its range
+            if (code >= 10 && code <= 59)
+            {
+                return new TypedValue(code, value.Value<double>());
+            }
+            if (code >= 60 && code <= 79)
+            {
+                return new TypedValue(code, value.Value<short>());
+            }
+            if (code >= 90 && code <= 99)
+            {
+                return new TypedValue(code, value.Value<int>());
+            }
+            return new TypedValue(code, value.Value<string>());
+        }
+
+        public static bool Matches(Entity entity, JObject node)
+        {
+            switch (node["op"].Value<string>())
+            {
+                case "and":
+                    return node["args"].All(arg => Matches(entity, (JObject)arg));
+                case "or":
+                    return node["args"].Any(arg => Matches(entity, (JObject)arg));
+                case "not":
+                    return !Matches(entity, (JObject)node["arg"]);
+                case "in":
+                {
+                    var field = node["field"].Value<string>();
+                    return node["values"].Any(value => Compare(entity, field, "==", value));
+                }
+                case "cmp":
+                    return Compare(entity, node["field"].Value<string>(), node["cmp"].Value<string>(), node["value"]);
+                default:
+                    throw new ArgumentException($"Unknown filter operator: {node["op"]}");
+            }
+        }
+
+        private static bool Compare(Entity entity, string field, string op, JToken expected)
+        {
+            object actual;
+            switch (field)
+            {
+                case "type":
+                    actual = entity.GetRXClass().DxfName;
+                    break;
+                case "layer":
+                    actual = entity.Layer;
+                    break;
+                case "color":
+                    actual = entity.ColorIndex;
+                    break;
+                default:
+                    // Entities without the property never match, whatever the comparison
+                    if (!TryGetProperty(entity, field, out actual))
+                    {
+                        return false;
+                    }
+                    break;
+            }
+
+            int? order = Order(actual, expected);
+            if (order == null)
+            {
+                return op == "!=";
+            }
+            switch (op)
+            {
+                case "==": return order == 0;
+                case "!=": return order != 0;
+                case "<": return order < 0;
+                case "<=": return order <= 0;
+                case ">": return order > 0;
+                case ">=": return order >= 0;
+                default: throw new ArgumentException($"Unknown comparison: {op}");
+            }
+        }
+
+        // Orders an entity value relative to a filter value, or null if they cannot be compared
+        private static int? Order(object actual, JToken expected)
+        {
+            switch (expected.Type)
+            {
+                case JTokenType.Integer:
+                case JTokenType.Float:
+                    if (actual is IConvertible && !(actual is string) && !(actual is bool))
+                    {
+                        return Convert.ToDouble(actual).CompareTo(expected.Value<double>());
+                    }
+                    return null;
+                case JTokenType.Boolean:
+                    return actual is bool flag ? flag.CompareTo(expected.Value<bool>()) : (int?)null;
+                case JTokenType.String:
+                    return actual == null ? (int?)null
+                        : string.Compare(actual.ToString(), expected.Value<string>(), StringComparison.OrdinalIgnoreCase);
+                default:
+                    return null;
+            }
+        }
+
+        private static bool TryGetProperty(object target, string field, out object value)
+        {
+            var chain = properties.GetOrAdd((target.GetType(), field), key => Resolve(key.Item1, key.Item2));
+            value = target;
+            if (chain == null)
+            {
+                return false;
+            }
+            try
+            {
+                foreach (var property in chain)
+                {
+                    value = property.GetValue(value);
+                }
+                return true;
+            }
+            catch (TargetInvocationException)
+            {
+                // Properties such as Area throw for entities they are undefined for
+                return false;
+            }
+        }
+
+        private static PropertyInfo[] Resolve(Type type, string field)
+        {
+            var chain = new List<PropertyInfo>();
+            foreach (var name in field.Split('.'))
+            {
+                var property = type.GetProperty(name, BindingFlags.Public | BindingFlags.Instance | BindingFlags.IgnoreCase);
+                if (property == null || property.GetIndexParameters().Length > 0)
+                {
+                    return null;
+                }
+                chain.Add(property);
+                type = property.PropertyType;
+            }
+            return chain.ToArray();
+        }
+    }
+}
@@ -0,0 +1,69 @@
+using System;
+using System.Collections.Generic;
+
+namespace AutoCADMCP
+{
+    // Remembers the responses of recent mutating commands by their idempotency key, so a
+    // request retried after a dropped connection gets the original response back instead
+    // of creating its entities a second time. Bounded both in size and in age.
+    public class IdempotencyCache
+    {
+        private class Entry
+        {
+            public string Key;
+            public string Response;
+            public DateTime StoredAt;
+        }
+
+        private readonly object cacheLock = new object();
+        private readonly Dictionary<string, LinkedListNode<Entry>> entries = new();
+        private readonly LinkedList<Entry> order = new();
+        private readonly int capacity;
+        private readonly TimeSpan window;
+
+        public IdempotencyCache(int capacity, TimeSpan window)
+        {
+            this.capacity = capacity;
+            this.window = window;
+        }
+
+        public bool TryGet(string key, out string response)
+        {
+            lock (cacheLock)
+            {
+                Evict();
+                if (entries.TryGetValue(key, out var node))
+                {
+                    response = node.Value.Response;
+                    return true;
+                }
+                response = null;
+                return false;
+            }
+        }
+
+        public void Add(string key, string response)
+        {
+            lock (cacheLock)
+            {
+                if (entries.TryGetValue(key, out var existing))
+                {
+                    order.Remove(existing);
+                }
+                entries[key] = order.AddLast(new Entry { Key = key, Response = response, StoredAt = DateTime.UtcNow });
+                Evict();
+            }
+        }
+
+        // Entries are kept in insertion order, so the oldest ones are always at the front
+        private void Evict()
+        {
+            var cutoff = DateTime.UtcNow - window;
+            while (order.First != null && (order.Count > capacity || order.First.Value.StoredAt < cutoff))
+            {
+                entries.Remove(order.First.Value.Key);
+                order.RemoveFirst();
+            }
+        }
+    }
+}
@@ -0,0 +1,167 @@
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Threading.Tasks;
+
+using Newtonsoft.Json.Linq;
+
+namespace AutoCADMCP
+{
+    public class Job
+    {
+        public string Id { get; set; }
+        public string CommandType { get; set; }
+        public string Status { get; set; } = "queued";
+        public int Done { get; set; }
+        public int? Total { get; set; }
+        public List<JToken> PartialResults { get; } = new();
+        // The response the command would have sent, once the job has finished
+        public JObject Response { get; set; }
+        public bool CancelRequested { get; set; }
+        public DateTime SubmittedAt { get; } = DateTime.UtcNow;
+        // Completed, and replaced, whenever the job makes progress or finishes
+        public TaskCompletionSource<bool> Changed { get; set; } =
+            new TaskCompletionSource<bool>(TaskCreationOptions.RunContinuationsAsynchronously);
+    }
+
+    // Commands submitted as jobs run through the command queue like any other, but the client
+    // does not wait on the socket for their response. Instead it polls their status with the
+    // immediate GET_JOB command, which also returns the partial results commands report as
+    // they finish each of their items.
+    public static class Jobs
+    {
+        private const int MaxFinishedJobs = 64;
+
+        private static readonly object jobLock = new object();
+        private static readonly Dictionary<string, Job> jobs = new();
+        private static readonly Queue<string> finishedJobIds = new();
+
+        // The job of the command executing on the UI thread, set by the bridge
+        public static Job Current { get; internal set; }
+
+        public static Job Create(string id, string commandType)
+        {
+            var job = new Job { Id = id, CommandType = commandType };
+            lock (jobLock)
+            {
+                if (jobs.ContainsKey(id))
+                {
+                    throw new System.Exception($"Job {id} already exists");
+                }
+                jobs[id] = job;
+            }
+            return job;
+        }
+
+        public static bool TryGet(string id, out Job job)
+        {
+            lock (jobLock)
+            {
+                return jobs.TryGetValue(id, out job);
+            }
+        }
+
+        public static void Start(Job job)
+        {
+            Update(job, () => job.Status = "running");
+        }
+
+        public static void Finish(Job job, string responseJson)
+        {
+            Update(job, () => {
+                job.Response = JObject.Parse(responseJson);
+                bool failed = job.Response["status"]?.Value<string>() == "error"
+                    || job.Response["result"]?["success"]?.Value<bool>() == false;
+                job.Status = !failed ? "completed" : job.CancelRequested ? "cancelled" : "failed";
+
+                // Only remember a bounded number of finished jobs
+                finishedJobIds.Enqueue(job.Id);
+                while (finishedJobIds.Count > MaxFinishedJobs)
+                {
+                    jobs.Remove(finishedJobIds.Dequeue());
+                }
+            });
+        }
+
+        // Asks a running job to stop at its next progress report. Returns false for unknown or finished jobs.
+        public static bool RequestCancel(string id)
+        {
+            lock (jobLock)
+            {
+                if (!jobs.TryGetValue(id, out var job) || job.Response != null)
+                {
+                    return false;
+                }
+                job.CancelRequested = true;
+                return true;
+            }
+        }
+
+        // Called by commands after each item they finish. Outside of a job this does nothing.
+        // A cancelled job stops here, and the command's transaction is rolled back.
+        public static void ReportProgress(int done, int? total = null, object partialResult = null)
+        {
+            var job = Current;
+            if (job == null)
+            {
+                return;
+            }
+            if (job.CancelRequested)
+            {
+                throw new OperationCanceledException("Job was cancelled");
+            }
+            Update(job, () => {
+                job.Done = done;
+                job.Total = total ?? job.Total;
+                if (partialResult != null)
+                {
+                    job.PartialResults.Add(JToken.FromObject(partialResult));
+                }
+            });
+        }
+
+        public static async Task<object> Describe(Job job, int since, bool wait, double timeout)
+        {
+            // A waiting poll returns at the next change, unless there is news for it already
+            Task changed;
+            bool pending;
+            lock (jobLock)
+            {
+                changed = job.Changed.Task;
+                pending = job.Response == null && job.PartialResults.Count <= since;
+            }
+            if (wait && pending)
+            {
+                await Task.WhenAny(changed, Task.Delay(TimeSpan.FromSeconds(timeout)));
+            }
+
+            lock (jobLock)
+            {
+                return new {
+                    jobId = job.Id,
+                    command = job.CommandType,
+                    status = job.Status,
+                    done = job.Done,
+                    total = job.Total,
+                    partialResults = job.PartialResults.Skip(since).ToList(),
+                    nextIndex = job.PartialResults.Count,
+                    cancelRequested = job.CancelRequested,
+                    elapsed = (DateTime.UtcNow - job.SubmittedAt).TotalSeconds,
+                    response = job.Response
+                };
+            }
+        }
+
+        private static void Update(Job job, Action change)
+        {
+            TaskCompletionSource<bool> changed;
+            lock (jobLock)
+            {
+                change();
+                changed = job.Changed;
+                job.Changed = new TaskCompletionSource<bool>(TaskCreationOptions.RunContinuationsAsynchronously);
+            }
+            changed.TrySetResult(true);
+        }
+    }
+}
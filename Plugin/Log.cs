@@ -1,29 +1,110 @@
+using System;
+using System.Linq;
+
+using Newtonsoft.Json.Linq;
+
 using Autodesk.AutoCAD.ApplicationServices;
 using Autodesk.AutoCAD.EditorInput;
 
 namespace AutoCADMCP
 {
+    public enum LogLevel
+    {
+        Debug = 0,
+        Info = 1,
+        Warning = 2,
+        Error = 3,
+        None = 4
+    }
+
+    // Writes to the command line of the active document. Messages below Level are dropped;
+    // the overloads taking a function only build their message if it is written, which keeps
+    // per-command logging cheap. AUTOCAD_MCP_LOG_LEVEL sets the level (Info by default).
     public static class Log
     {
+        // Characters of a string parameter kept by Summarize
+        private const int SummaryLimit = 80;
+
+        public static LogLevel Level { get; set; } =
+            Enum.TryParse(Environment.GetEnvironmentVariable("AUTOCAD_MCP_LOG_LEVEL"), true, out LogLevel configured) ? configured : LogLevel.Info;
+
+        public static bool IsEnabled(LogLevel level)
+        {
+            return level >= Level;
+        }
+
+        public static void Debug(Func<string> message)
+        {
+            if (IsEnabled(LogLevel.Debug))
+            {
+                Write("DEBUG", message());
+            }
+        }
+
         public static void Info(string message)
         {
-            // Get the current document's editor to display the message
-            Editor editor = Application.DocumentManager.MdiActiveDocument.Editor;
-            editor.WriteMessage($"\n[AUTOCAD MCP] INFO: {message}");
+            if (IsEnabled(LogLevel.Info))
+            {
+                Write("INFO", message);
+            }
+        }
+
+        public static void Info(Func<string> message)
+        {
+            if (IsEnabled(LogLevel.Info))
+            {
+                Write("INFO", message());
+            }
         }
 
         public static void Warning(string message)
         {
-            // Get the current document's editor to display the message
-            Editor editor = Application.DocumentManager.MdiActiveDocument.Editor;
-            editor.WriteMessage($"\n[AUTOCAD MCP] WARNING: {message}");
+            if (IsEnabled(LogLevel.Warning))
+            {
+                Write("WARNING", message);
+            }
         }
 
         public static void Error(string message)
+        {
+            if (IsEnabled(LogLevel.Error))
+            {
+                Write("ERROR", message);
+            }
+        }
+
+        // Describes command parameters by their shape: arrays by their length and long strings
+        // truncated, so that summarising a bulk geometry command costs no more than a small one
+        public static string Summarize(JObject parameters)
+        {
+            if (parameters == null || !parameters.HasValues)
+            {
+                return "No parameters";
+            }
+            return string.Join(", ", parameters.Properties().Select(p => $"{p.Name}: {Summarize(p.Value)}"));
+        }
+
+        private static string Summarize(JToken value)
+        {
+            switch (value.Type)
+            {
+                case JTokenType.Array:
+                    return $"[{((JArray)value).Count} items]";
+                case JTokenType.Object:
+                    return $"{{{((JObject)value).Count} keys}}";
+                case JTokenType.String:
+                    var text = value.Value<string>();
+                    return text.Length <= SummaryLimit ? text : $"{text.Substring(0, SummaryLimit)}... ({text.Length} chars)";
+                default:
+                    return value.ToString();
+            }
+        }
+
+        private static void Write(string level, string message)
         {
             // Get the current document's editor to display the message
             Editor editor = Application.DocumentManager.MdiActiveDocument.Editor;
-            editor.WriteMessage($"\n[AUTOCAD MCP] ERROR: {message}");
+            editor.WriteMessage($"\n[AUTOCAD MCP] {level}: {message}");
         }
     }
 }
@@ -2,11 +2,29 @@ using System;
 
 namespace AutoCADMCP
 {
+    // Scheduling class of a command. Lower values are dispatched first.
+    public enum CommandClass
+    {
+        Read = 0,
+        Edit = 1,
+        Heavy = 2
+    }
+
     [AttributeUsage(AttributeTargets.Method)]
     public class MCPCommandAttribute : Attribute
     {
         public string CommandType { get; }
 
+        // Immediate commands are answered on the socket thread without waiting for
+        // AutoCAD to go idle. They must not touch the drawing database.
+        public bool Immediate { get; set; }
+
+        // Conditional commands accept an ifRevisionNot token and reply "not modified"
+        // without running when the drawing revision still matches it.
+        public bool Conditional { get; set; }
+
+        public CommandClass Class { get; set; } = CommandClass.Edit;
+
         public MCPCommandAttribute(string commandType)
         {
             CommandType = commandType;
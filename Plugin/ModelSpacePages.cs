@@ -0,0 +1,120 @@
+using System;
+using System.Collections.Generic;
+
+using Autodesk.AutoCAD.DatabaseServices;
+
+namespace AutoCADMCP
+{
+    // Pages through the entities of a block table record.
+    //
+    // A block table record can only be enumerated from its start, so counting off an index
+    // cursor on every page made reading a whole drawing quadratic. Instead, the first page takes
+    // a snapshot of the record's object ids, and the cursor of every further page names the
+    // snapshot, the position in it and the handle of the last object returned, so later pages
+    // continue where the previous one stopped. A cursor whose snapshot has been evicted is
+    // resumed after its last handle, at the cost of one more enumeration. Objects appended after
+    // the first page are not returned, and objects erased since are skipped; the clients compare
+    // the revisions of the pages to notice such changes.
+    public static class ModelSpacePages
+    {
+        // Snapshots of unfinished page sequences kept at once
+        private const int Capacity = 8;
+
+        private class Snapshot
+        {
+            public ObjectId Owner;
+            public ObjectId[] Ids;
+        }
+
+        private static readonly object snapshotLock = new object();
+        private static readonly Dictionary<string, Snapshot> snapshots = new();
+        private static readonly Queue<string> order = new();
+
+        // Returns the object ids of the page at cursor (null or "0" for the first page), and the
+        // cursor of the next page, or null after the last one
+        public static List<ObjectId> Next(BlockTableRecord btr, string cursor, int pageSize, out string nextCursor)
+        {
+            string snapshotId = null;
+            ObjectId[] ids = null;
+            int position = 0;
+            long? lastHandle = null;
+
+            if (!string.IsNullOrEmpty(cursor) && cursor != "0")
+            {
+                var parts = cursor.Split(':');
+                if (parts.Length != 3 || !int.TryParse(parts[1], out position) || !long.TryParse(parts[2], out var last))
+                {
+                    throw new ArgumentException($"Invalid cursor {cursor}");
+                }
+                lastHandle = last;
+                lock (snapshotLock)
+                {
+                    if (snapshots.TryGetValue(parts[0], out var snapshot) && snapshot.Owner == btr.ObjectId)
+                    {
+                        snapshotId = parts[0];
+                        ids = snapshot.Ids;
+                    }
+                }
+            }
+
+            if (ids == null)
+            {
+                // Erased objects are included, so the last handle of a cursor can still be found
+                var all = new List<ObjectId>();
+                foreach (ObjectId id in btr.IncludingErased)
+                {
+                    all.Add(id);
+                }
+                ids = all.ToArray();
+                position = 0;
+                if (lastHandle != null)
+                {
+                    position = Array.FindIndex(ids, id => id.Handle.Value == lastHandle.Value) + 1;
+                    if (position == 0)
+                    {
+                        throw new ArgumentException($"Cursor {cursor} has expired, start again from the first page");
+                    }
+                }
+            }
+
+            var page = new List<ObjectId>();
+            while (position < ids.Length && page.Count < pageSize)
+            {
+                var id = ids[position++];
+                if (!id.IsErased)
+                {
+                    page.Add(id);
+                }
+            }
+
+            if (position >= ids.Length)
+            {
+                nextCursor = null;
+                if (snapshotId != null)
+                {
+                    lock (snapshotLock)
+                    {
+                        snapshots.Remove(snapshotId);
+                    }
+                }
+                return page;
+            }
+
+            if (snapshotId == null)
+            {
+                snapshotId = Guid.NewGuid().ToString("N");
+                lock (snapshotLock)
+                {
+                    snapshots[snapshotId] = new Snapshot { Owner = btr.ObjectId, Ids = ids };
+                    order.Enqueue(snapshotId);
+                    while (order.Count > Capacity)
+                    {
+                        snapshots.Remove(order.Dequeue());
+                    }
+                }
+            }
+            nextCursor = $"{snapshotId}:{position}:{ids[position - 1].Handle.Value}";
+            return page;
+        }
+    }
+}
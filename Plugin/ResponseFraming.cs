@@ -0,0 +1,79 @@
+using System;
+using System.IO;
+using System.IO.Compression;
+using System.Text;
+using System.Threading.Tasks;
+
+using Newtonsoft.Json.Linq;
+
+namespace AutoCADMCP
+{
+    // How responses are written to one client connection. Until the client negotiates
+    // otherwise with HELLO, responses are bare JSON. After that every response is a frame:
+    // one encoding byte (0 = JSON, 1 = raw deflate compressed JSON), the payload length as
+    // a 4-byte big-endian integer, and the payload. Responses at or above the negotiated
+    // threshold are compressed; property dumps of large selections shrink many times over.
+    public class ResponseFraming
+    {
+        private const byte PlainEncoding = 0;
+        private const byte DeflateEncoding = 1;
+        private const int MinimumThreshold = 1024;
+
+        public bool Framed { get; private set; }
+        public bool Compress { get; private set; }
+        public int Threshold { get; private set; } = int.MaxValue;
+
+        // Applies the client's HELLO parameters and returns the negotiated settings
+        public object Negotiate(JObject parameters)
+        {
+            Framed = parameters?["framing"]?.Value<string>() == "length-prefixed";
+            var offered = parameters?["compression"]?.ToObject<string[]>() ?? new string[0];
+            Compress = Framed && Array.IndexOf(offered, "deflate") >= 0;
+            Threshold = Math.Max(MinimumThreshold, parameters?["threshold"]?.Value<int>() ?? 65536);
+
+            return new
+            {
+                status = "success",
+                result = new
+                {
+                    framing = Framed ? "length-prefixed" : null,
+                    compression = Compress ? "deflate" : null,
+                    threshold = Threshold
+                }
+            };
+        }
+
+        public async Task WriteAsync(Stream stream, string response)
+        {
+            byte[] payload = Encoding.UTF8.GetBytes(response);
+            if (!Framed)
+            {
+                await stream.WriteAsync(payload, 0, payload.Length);
+                return;
+            }
+
+            byte encoding = PlainEncoding;
+            if (Compress && payload.Length >= Threshold)
+            {
+                using (var compressed = new MemoryStream())
+                {
+                    using (var deflate = new DeflateStream(compressed, CompressionLevel.Fastest, true))
+                    {
+                        deflate.Write(payload, 0, payload.Length);
+                    }
+                    payload = compressed.ToArray();
+                    encoding = DeflateEncoding;
+                }
+            }
+
+            var header = new byte[5];
+            header[0] = encoding;
+            header[1] = (byte)(payload.Length >> 24);
+            header[2] = (byte)(payload.Length >> 16);
+            header[3] = (byte)(payload.Length >> 8);
+            header[4] = (byte)payload.Length;
+            await stream.WriteAsync(header, 0, header.Length);
+            await stream.WriteAsync(payload, 0, payload.Length);
+        }
+    }
+}
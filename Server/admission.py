@@ -0,0 +1,140 @@
+"""
+Admission control of bridge commands.
+
+Every command a bridge runs, runs on AutoCAD's UI thread, the thread that also
+serves the person at the workstation. Before a command is queued on a
+connection, it has to pass three checks configured per command class:
+
+    queue depth    At most max_queue_depth commands of the class may wait for
+                   the connection's sockets.
+    rate           A token bucket per class refills at rate_limits commands per
+                   second, up to rate_bursts tokens. A command that would wait
+                   up to admission_max_wait for its token sleeps that long, which
+                   paces loops of small commands; longer waits are rejected.
+    queue wait     The bridge reports how long every command waited for the UI
+                   thread. While the recent queue wait, averaged over reports and
+                   decaying while none arrive, exceeds the class's
+                   shed_queue_wait_ms, commands of the class are shed.
+
+A rejected command raises OverloadedError, whose retry_after says in how many
+seconds it is worth trying again. The backlog in AutoCAD therefore stays
+bounded however many commands agents send.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import config
+from scheduler import CommandClass, classify
+from timeouts import timeouts
+
+# Weight of a new queue wait report in the average
+_QUEUE_WAIT_SMOOTHING = 0.3
+# Seconds in which the average queue wait halves while no reports arrive
+_QUEUE_WAIT_HALF_LIFE = 5.0
+# Shortest retry-after hint, in seconds
+_MIN_RETRY_AFTER = 0.5
+
+class OverloadedError(Exception):
+    """Raised when a command is not admitted to a bridge. retry_after is a hint in seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        self.retry_after = max(_MIN_RETRY_AFTER, math.ceil(retry_after * 10) / 10)
+        super().__init__(f"AutoCAD is overloaded, {reason}. Retry after {self.retry_after:.1f}s")
+
+def _setting(settings: Dict[str, Any], command_class: CommandClass) -> Optional[float]:
+    """The setting of a command class, None if it is not limited."""
+    value = settings.get(command_class.name.lower())
+    return float(value) if value is not None and value > 0 else None
+
+class TokenBucket:
+    """Tokens refilling at rate per second up to burst. Not thread-safe."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def reserve(self, max_wait: float) -> float:
+        """Take a token, returning how long to wait until it is due, or raise if that is longer than max_wait.
+
+        Tokens may be taken ahead of time, so waiting callers are served in order.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = (1.0 - self.tokens) / self.rate if self.tokens < 1.0 else 0.0
+        if wait > max_wait:
+            raise OverloadedError(f"rate limit of {self.rate:g} commands per second reached", wait - max_wait)
+        self.tokens -= 1.0
+        return wait
+
+class AdmissionControl:
+    """Admission of the commands of one bridge connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[CommandClass, TokenBucket] = {}
+        self._queue_wait_ms = 0.0
+        self._reported_at = time.monotonic()
+        self._rejected: Dict[CommandClass, int] = {command_class: 0 for command_class in CommandClass}
+
+    def observe(self, queue_wait_ms: float):
+        """Record the queue wait the bridge reported for a command."""
+        with self._lock:
+            self._queue_wait_ms = self._decayed() * (1 - _QUEUE_WAIT_SMOOTHING) + queue_wait_ms * _QUEUE_WAIT_SMOOTHING
+            self._reported_at = time.monotonic()
+
+    def _decayed(self) -> float:
+        elapsed = time.monotonic() - self._reported_at
+        return self._queue_wait_ms * 0.5 ** (elapsed / _QUEUE_WAIT_HALF_LIFE)
+
+    def admit(self, command_type: str, waiting: int):
+        """Admit a command, with waiting commands of its class queued on the connection already.
+
+        Sleeps off a short wait for a rate limit token, and raises OverloadedError if the command is rejected.
+        """
+        command_class = classify(command_type)
+        try:
+            with self._lock:
+                wait = self._check(command_type, command_class, waiting)
+        except OverloadedError:
+            with self._lock:
+                self._rejected[command_class] += 1
+            raise
+        if wait > 0:
+            time.sleep(wait)
+
+    def _check(self, command_type: str, command_class: CommandClass, waiting: int) -> float:
+        name = command_class.name.lower()
+        max_depth = _setting(config.max_queue_depth, command_class)
+        if max_depth is not None and waiting >= max_depth:
+            # The commands ahead have to be worked off first
+            typical = timeouts.percentile(command_type, 50) or 1.0
+            raise OverloadedError(f"{waiting} {name} commands are already waiting", (waiting - max_depth + 1) * typical)
+
+        threshold = _setting(config.shed_queue_wait_ms, command_class)
+        queue_wait = self._decayed()
+        if threshold is not None and queue_wait > threshold:
+            # Until the average has decayed below the threshold, unless new reports bring it down sooner
+            recovery = _QUEUE_WAIT_HALF_LIFE * math.log2(queue_wait / threshold)
+            raise OverloadedError(f"commands wait {queue_wait:.0f}ms for AutoCAD's UI thread", recovery)
+
+        rate = _setting(config.rate_limits, command_class)
+        if rate is None:
+            return 0.0
+        bucket = self._buckets.get(command_class)
+        if bucket is None or bucket.rate != rate:
+            bucket = self._buckets[command_class] = TokenBucket(rate, _setting(config.rate_bursts, command_class) or 1.0)
+        return bucket.reserve(config.admission_max_wait)
+
+    def describe(self) -> Dict[str, Any]:
+        """The average queue wait, and the commands rejected per class."""
+        with self._lock:
+            return {
+                "queueWaitMs": round(self._decayed(), 1),
+                "rejected": {command_class.name.lower(): count for command_class, count in self._rejected.items()},
+            }
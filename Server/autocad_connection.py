@@ -1,9 +1,25 @@
 import socket
 import json
 import logging
-from dataclasses import dataclass
-from typing import Dict, Any
+import select
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from config import config
+from scheduler import CommandScheduler, CommandClass, READ_COMMANDS, classify
+from admission import AdmissionControl
+from timeouts import timeouts
+from cancellation import CommandCancelledError, current_scope
+from jobs import Job, current_job
+from targets import ANY_ENDPOINT, current_target
+from clients import current_client
+from request_log import Lazy, RequestRecord, request_log, summarize
 
 # Configure logging using settings from config
 logging.basicConfig(
@@ -12,20 +28,88 @@ logging.basicConfig(
 )
 logger = logging.getLogger("AutoCADMCP")
 
+class CommandTimeoutError(Exception):
+    """Raised when AutoCAD does not answer a command within its timeout."""
+    withdrawn = False  # Whether the command was withdrawn from the bridge's queue already
+
+class SessionBusyError(Exception):
+    """Raised when a client sends a mutating command while another client's transaction session is open."""
+
+# Requests are newline-delimited; json.dumps never writes a raw newline
+REQUEST_DELIMITER = b"\n"
+
+# Encodings of framed responses
+FRAME_PLAIN = 0
+FRAME_DEFLATE = 1
+
+# Number of read results remembered for conditional (not-modified) reads
+CONDITIONAL_CACHE_SIZE = 32
+
+class BridgeResponse(dict):
+    """The plugin's response to a command, with the drawing revision it was produced at.
+
+    revision_token belongs to this response alone. Other commands in flight on the same
+    connection may report newer revisions meanwhile, so caches must be keyed on it rather
+    than on the connection's revision_token.
+    """
+    revision_token: Optional[str] = None
+
+def _revision_token(epoch: Any, revision: Any) -> Optional[str]:
+    if epoch is None or revision is None:
+        return None
+    return f"{epoch}:{revision}"
+
 @dataclass
 class AutoCADConnection:
-    """Manages the socket connection to the AutoCAD Editor."""
+    """Manages the socket connection to the AutoCAD Editor.
+
+    The connection keeps up to config.bridge_pool_size sockets to the bridge, so that
+    commands of different callers can be in flight at once; the scheduler grants each
+    command one of them. sock is the primary socket, the others are opened on demand.
+    """
     host: str = config.autocad_host
     port: int = config.autocad_port
     sock: socket.socket = None  # Socket for AutoCAD communication
+    # Drawing revision and epoch last reported for each targeted document (None is the active document)
+    _revisions: Dict[Optional[str], Tuple[str, int]] = field(default_factory=dict)
+    session_id: Optional[str] = None  # Transaction session whose commands must stay in order
+    session_owner: Optional[str] = None  # Id of the client that began the session
+    # Seconds of inactivity after which the bridge aborts the session, and when its owner last used it
+    _session_timeout: float = 0.0
+    _session_active_at: float = 0.0
+    scheduler: CommandScheduler = field(default_factory=CommandScheduler)
+    admission: AdmissionControl = field(default_factory=AdmissionControl)
+    _conditional_cache: "OrderedDict[Tuple[Optional[str], str, str], Tuple[str, Dict[str, Any]]]" = field(default_factory=OrderedDict)
+    _cache_lock: threading.Lock = field(default_factory=threading.Lock)
+    # Columnar mirrors of the targeted documents, loaded on demand by mirror.get_mirror
+    mirrors: Dict[Optional[str], Any] = field(default_factory=dict)
+    _mirror_lock: threading.Lock = field(default_factory=threading.Lock)
+    # Memoised measurements of the targeted documents, kept by measurements.measure
+    measurements: Dict[Optional[str], Any] = field(default_factory=dict)
+    _measure_lock: threading.Lock = field(default_factory=threading.Lock)
+    # Snap point indexes of the targeted documents, kept by snapping.get_snap_index
+    snap_indexes: Dict[Optional[str], Any] = field(default_factory=dict)
+    _snap_lock: threading.Lock = field(default_factory=threading.Lock)
+    _framed: bool = False  # Whether responses on sock arrive as length-prefixed frames
+    # Idle further sockets and whether their responses are framed, the socket of the command holding sock,
+    # and a counter of disconnects so sockets leased before one are closed when they are returned
+    _pool: List[Tuple[socket.socket, bool]] = field(default_factory=list)
+    _leased_primary: Optional[socket.socket] = None
+    _generation: int = 0
+    _pool_lock: threading.Lock = field(default_factory=threading.Lock)
+    # Reported by the bridge with every queued command: how long it waited for the UI thread,
+    # and how many commands were still waiting when it started
+    bridge_queue_wait_ms: float = 0.0
+    bridge_queue_depth: int = 0
 
     def connect(self) -> bool:
         """Establish a connection to the AutoCAD Editor."""
         if self.sock:
             return True
         try:
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.connect((self.host, self.port))
+            sock, framed = self._open()
+            with self._pool_lock:
+                self.sock, self._framed = sock, framed
             logger.info(f"Connected to AutoCAD at {self.host}:{self.port}")
             return True
         except Exception as e:
@@ -35,24 +119,174 @@ class AutoCADConnection:
 
     def disconnect(self):
         """Close the connection to the AutoCAD Editor."""
-        if self.sock:
+        with self._pool_lock:
+            sockets = [sock for sock, _ in self._pool]
+            if self.sock and self.sock is not self._leased_primary:
+                sockets.append(self.sock)
+            self.sock, self._pool = None, []
+            self._generation += 1
+        for sock in sockets:
             try:
-                self.sock.close()
+                sock.close()
             except Exception as e:
                 logger.error(f"Error disconnecting from AutoCAD: {str(e)}")
-            finally:
-                self.sock = None
 
-    def receive_full_response(self, sock, buffer_size=config.buffer_size) -> bytes:
+    def _open(self) -> Tuple[socket.socket, bool]:
+        """Open a socket to the bridge and negotiate its framing."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.connect((self.host, self.port))
+            return sock, self._negotiate(sock)
+        except BaseException:
+            sock.close()
+            raise
+
+    @contextmanager
+    def _lease(self) -> Iterator[Tuple[socket.socket, bool]]:
+        """A socket for one command, and whether its responses are framed.
+
+        The primary socket is used if it is free, otherwise an idle one of the pool or a
+        new one. A socket whose command fails is closed rather than returned, as it may
+        still carry the response of an abandoned command.
+        """
+        with self._pool_lock:
+            generation = self._generation
+            if self.sock is not None and self._leased_primary is None:
+                sock, framed = self.sock, self._framed
+                self._leased_primary = sock
+            elif self._pool:
+                sock, framed = self._pool.pop()
+            else:
+                sock = None
+        if sock is None:
+            try:
+                sock, framed = self._open()
+            except Exception as e:
+                logger.error(f"Failed to connect to AutoCAD: {str(e)}")
+                raise ConnectionError("Not connected to AutoCAD")
+            with self._pool_lock:
+                # A new socket takes the place of a broken primary socket
+                if self.sock is None and generation == self._generation:
+                    self.sock, self._framed, self._leased_primary = sock, framed, sock
+
+        broken = True
+        try:
+            yield sock, framed
+            broken = False
+        except CommandCancelledError:
+            # Raised before anything was sent
+            broken = False
+            raise
+        finally:
+            with self._pool_lock:
+                primary = sock is self._leased_primary
+                if primary:
+                    self._leased_primary = None
+                    if broken and self.sock is sock:
+                        self.sock = None
+                keep = not broken and generation == self._generation
+                if keep and not primary:
+                    keep = len(self._pool) < config.bridge_pool_size
+                    if keep:
+                        self._pool.append((sock, framed))
+            if not keep:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+
+    def _negotiate(self, sock) -> bool:
+        """Agree on response framing and compression with the bridge, and authenticate with the
+        configured token. Returns whether responses are framed.
+
+        Bridges that do not know the handshake answer it with an error, and keep sending bare JSON.
+        With a token configured, a failed handshake means the bridge rejected it.
+        """
+        token = config.bridge_token
+        if config.compression == "none" and token is None:
+            return False
+        parameters = {}
+        if config.compression != "none":
+            parameters.update({
+                "framing": "length-prefixed",
+                "compression": [config.compression],
+                "threshold": config.compression_threshold
+            })
+        if token is not None:
+            parameters["token"] = token
+        hello = {"Type": "HELLO", "Parameters": parameters}
+        try:
+            sock.sendall(json.dumps(hello).encode('utf-8') + REQUEST_DELIMITER)
+            response = json.loads(self.receive_full_response(sock, timeout=config.cancel_timeout).decode('utf-8'))
+        except CommandTimeoutError:
+            raise ConnectionError("No answer to the handshake")
+        if response.get("status") != "success" and token is not None:
+            raise ConnectionError(f"Bridge rejected the handshake: {response.get('error', 'Unknown error')}")
+        result = response.get("result") or {}
+        if response.get("status") != "success" or result.get("framing") != "length-prefixed":
+            logger.info("Bridge does not support framed responses")
+            return False
+        logger.info(f"Negotiated framed responses with compression {result.get('compression')} above {result.get('threshold')} bytes")
+        return True
+
+    def _receive(self, sock, framed: bool, timeout: float = None) -> bytes:
+        """Receive one response in the format negotiated for sock."""
+        if framed:
+            return self.receive_frame(sock, timeout=timeout)
+        return self.receive_full_response(sock, timeout=timeout)
+
+    def receive_frame(self, sock, buffer_size=config.buffer_size, timeout: float = None) -> bytes:
+        """Receive a length-prefixed response frame, inflating compressed payloads as they stream in."""
+        sock.settimeout(timeout or config.connection_timeout)
+        try:
+            header = self._receive_exactly(sock, 5)
+            encoding, length = header[0], struct.unpack(">I", header[1:])[0]
+            if encoding not in (FRAME_PLAIN, FRAME_DEFLATE):
+                raise ConnectionError(f"Unknown response encoding {encoding}")
+
+            # Raw deflate (no zlib header), as written by .NET's DeflateStream
+            decompressor = zlib.decompressobj(wbits=-15) if encoding == FRAME_DEFLATE else None
+            chunks = []
+            remaining = length
+            while remaining:
+                chunk = sock.recv(min(buffer_size, remaining))
+                if not chunk:
+                    raise ConnectionError("Connection closed in the middle of a response")
+                remaining -= len(chunk)
+                chunks.append(decompressor.decompress(chunk) if decompressor else chunk)
+            if decompressor:
+                chunks.append(decompressor.flush())
+
+            data = b''.join(chunks)
+            if decompressor:
+                logger.debug("Received complete response (%d bytes, %d inflated)", length, len(data))
+            else:
+                logger.debug("Received complete response (%d bytes)", length)
+            return data
+        except socket.timeout:
+            logger.warning("Socket timeout during receive")
+            raise CommandTimeoutError("Timeout receiving AutoCAD response")
+
+    @staticmethod
+    def _receive_exactly(sock, size: int) -> bytes:
+        data = b''
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Connection closed before receiving data")
+            data += chunk
+        return data
+
+    def receive_full_response(self, sock, buffer_size=config.buffer_size, timeout: float = None) -> bytes:
         """Receive a complete response from AutoCAD, handling chunked data."""
         chunks = []
-        sock.settimeout(config.connection_timeout)  # Use timeout from config
+        sock.settimeout(timeout or config.connection_timeout)  # Use timeout from config unless given
         try:
             while True:
                 chunk = sock.recv(buffer_size)
                 if not chunk:
                     if not chunks:
-                        raise Exception("Connection closed before receiving data")
+                        raise ConnectionError("Connection closed before receiving data")
                     break
                 chunks.append(chunk)
                 
@@ -82,7 +316,7 @@ class AutoCADConnection:
                     json.loads(decoded_data)
                     
                     # If we get here, we have valid JSON
-                    logger.info(f"Received complete response ({len(data)} bytes)")
+                    logger.debug("Received complete response (%d bytes)", len(data))
                     return data
                 except json.JSONDecodeError:
                     # We haven't received a complete valid JSON response yet
@@ -93,92 +327,517 @@ class AutoCADConnection:
                     continue
         except socket.timeout:
             logger.warning("Socket timeout during receive")
-            raise Exception("Timeout receiving AutoCAD response")
+            raise CommandTimeoutError("Timeout receiving AutoCAD response")
         except Exception as e:
             logger.error(f"Error during receive: {str(e)}")
             raise
 
-    def send_command(self, command_type: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Send a command to AutoCAD and return its response."""
-        if not self.sock and not self.connect():
-            raise ConnectionError("Not connected to AutoCAD")
-        
+    def send_command(self, command_type: str, params: Dict[str, Any] = None, timeout: float = None) -> Dict[str, Any]:
+        """Send a command to AutoCAD and return its response.
+
+        Concurrent callers are served one at a time by the connection's scheduler,
+        cheap reads first and commands of the active session in order. Unless a
+        timeout is given, the adaptive timeout of the command type applies to its
+        wait in the bridge's queue, and the budget of its class once AutoCAD runs it.
+
+        Commands that fail because the connection broke are retried with exponential
+        backoff. Mutating commands carry an idempotency key that stays the same across
+        retries, so the plugin replays its original response instead of running them twice.
+
+        Within a background job, mutating commands run as plugin jobs instead (see _send_as_job).
+
+        Commands beyond the connection's rate limits and queue depths, or sent while the bridge
+        reports a long queue wait, are rejected with an OverloadedError (see admission).
+        """
+        command_class = classify(command_type)
+        session = self._session_of(command_type)
+        # A ping is the connection probe and is never rejected
+        if command_type != "ping":
+            self.admission.admit(command_type, self.scheduler.waiting(command_class))
+        idempotency_key = uuid.uuid4().hex if command_class != CommandClass.READ else None
+        job = current_job()
+        if job is not None and command_class != CommandClass.READ:
+            return self._send_as_job(command_type, params, idempotency_key, job, session)
+        # A ping is itself the connection probe, so its failure is reported immediately
+        retries = 0 if command_type == "ping" else config.max_retries
+        for attempt in range(retries + 1):
+            try:
+                # The slot is given up while backing off, so other commands can use the socket
+                with self.scheduler.slot(command_type, session):
+                    started = time.monotonic()
+                    with self._lease() as (sock, framed):
+                        result = self._send_command(sock, framed, command_type, params,
+                                                    timeout or timeouts.timeout_for(command_type), idempotency_key,
+                                                    budget=timeout or timeouts.budget(command_type))
+                    timeouts.record(command_type, time.monotonic() - started)
+                    return result
+            except ConnectionError as e:
+                if attempt == retries:
+                    raise
+                delay = config.retry_delay * (2 ** attempt)
+                logger.warning(f"{command_type} failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def begin_session(self, session_id: str, timeout: float):
+        """Record a transaction session begun by the current client."""
+        self.session_owner = current_client().id
+        self._session_timeout = timeout
+        self._session_active_at = time.monotonic()
+        self.session_id = session_id
+
+    def end_session(self):
+        """Forget the transaction session after it was committed or aborted."""
+        self.session_id = None
+        self.session_owner = None
+
+    def _session_of(self, command_type: str) -> Optional[str]:
+        """The session a command of the current client belongs to, if any.
+
+        The bridge's session is a single transaction shared by every command it runs, so while
+        it is open, other clients' mutating commands would be committed or discarded with it.
+        They are rejected instead; their reads run outside the session's lane.
+        """
+        session_id = self.session_id
+        if session_id is None:
+            return None
+        if self.session_owner == current_client().id:
+            self._session_active_at = time.monotonic()
+            return session_id
+        if time.monotonic() - self._session_active_at > self._session_timeout:
+            # The bridge has aborted the abandoned session by now
+            logger.warning(f"Session {session_id} of {self.session_owner} expired, forgetting it")
+            self.end_session()
+            return None
+        if command_type not in READ_COMMANDS:
+            raise SessionBusyError(f"AutoCAD is in transaction session {session_id} of another client, "
+                                   f"which has to be committed or aborted before {command_type} can run")
+        return None
+
+    def _send_command(self, sock: socket.socket, framed: bool, command_type: str, params: Dict[str, Any] = None,
+                      timeout: float = None, idempotency_key: str = None, budget: float = None) -> Dict[str, Any]:
+        """Send a command over a socket leased from the pool. The caller must hold a scheduler slot.
+
+        A command still queued in the bridge after timeout is withdrawn; one that AutoCAD is
+        executing by then is waited for until budget (see _await_response).
+        """
+        budget = max(budget or 0, timeout or 0) or None
         # Special handling for ping command
         if command_type == "ping":
             try:
                 logger.debug("Sending ping to verify connection")
-                self.sock.sendall(b"ping")
-                response_data = self.receive_full_response(self.sock)
+                sock.sendall(b"ping" + REQUEST_DELIMITER)
+                response_data = self._receive(sock, framed, timeout=timeout)
                 response = json.loads(response_data.decode('utf-8'))
                 
                 if response.get("status") != "success":
                     logger.warning("Ping response was not successful")
-                    self.sock = None
                     raise ConnectionError("Connection verification failed")
                     
                 return {"message": "pong"}
             except Exception as e:
                 logger.error(f"Ping error: {str(e)}")
-                self.sock = None
                 raise ConnectionError(f"Connection verification failed: {str(e)}")
         
         # Normal command handling
-        command = {"Type": command_type, "Parameters": params or {}}
+        command_id = uuid.uuid4().hex
+        command = {"Id": command_id, "Type": command_type, "Parameters": params or {}}
+        document = current_target().document
+        if document:
+            command["Document"] = document
+        if idempotency_key:
+            command["IdempotencyKey"] = idempotency_key
+        scope = current_scope()
+        if scope is not None:
+            scope.register(self, command_id)
+        record = RequestRecord(command_id, command_type, f"{self.host}:{self.port}", document,
+                               summarize(params), time.time(), 0.0, "error", client=current_client().id)
+        started = time.monotonic()
         try:
-            logger.info(f"Sending command: {command_type} with parameters: {params}")
-            self.sock.sendall(json.dumps(command).encode('utf-8'))
-            response_data = self.receive_full_response(self.sock)
-            response = json.loads(response_data.decode('utf-8'))
-            
-            if response.get("status") == "error":
-                error_message = response.get("error") or response.get("message", "Unknown AutoCAD error")
-                logger.error(f"AutoCAD error: {error_message}")
-                raise Exception(error_message)
-            
-            return response.get("result", {})
+            if logger.isEnabledFor(logging.INFO) and request_log.sampled(command_type):
+                logger.info("Sending command: %s with parameters: %s", command_type, Lazy(lambda: record.parameters))
+            sock.sendall(json.dumps(command).encode('utf-8') + REQUEST_DELIMITER)
+            self._await_response(sock, command_id, command_type, timeout, budget)
+            response_data = self._receive(sock, framed, timeout=budget)
+            record.response_bytes = len(response_data)
+            response = self._handle_response(response_data, document, record)
+            record.outcome = "ok"
+            return response
+        except CommandTimeoutError as e:
+            record.outcome, record.error = "timeout", str(e)
+            # Withdraw the command if it is still queued, so abandoned work never reaches AutoCAD
+            logger.error(f"{command_type} timed out after {time.monotonic() - started:.1f}s")
+            if not e.withdrawn:
+                try:
+                    self.cancel([command_id])
+                except Exception as cancel_error:
+                    logger.warning(f"Could not cancel {command_type}: {str(cancel_error)}")
+            raise Exception(f"Failed to communicate with AutoCAD: {str(e)}")
+        except OSError as e:
+            record.outcome, record.error = "connection", str(e)
+            # The connection broke; the caller may reconnect and retry
+            logger.error(f"Connection error with AutoCAD: {str(e)}")
+            raise ConnectionError(f"Failed to communicate with AutoCAD: {str(e)}")
         except Exception as e:
+            record.error = str(e)
             logger.error(f"Communication error with AutoCAD: {str(e)}")
-            self.sock = None
             raise Exception(f"Failed to communicate with AutoCAD: {str(e)}")
+        finally:
+            record.duration = time.monotonic() - started
+            request_log.record(record)
+            if scope is not None:
+                scope.complete(self, command_id)
+
+    def _await_response(self, sock: socket.socket, command_id: str, command_type: str, timeout: float, budget: float):
+        """Wait until the response to a command starts arriving.
+
+        After timeout the command is withdrawn if it is still queued in the bridge. AutoCAD
+        cannot stop a command it is already executing, and giving up on it would only report
+        a failure for work that still happens, so such a command is waited for until budget.
+        """
+        if not timeout or not budget or budget <= timeout:
+            return
+        started = time.monotonic()
+        if select.select([sock], [], [], timeout)[0]:
+            return
+        try:
+            result = self.cancel([command_id]).get("result") or {}
+        except Exception as e:
+            # Without an answer the command may be running, so it is given its budget
+            logger.warning(f"Could not cancel {command_type}: {str(e)}")
+            result = {}
+        if command_id in result.get("cancelled", ()):
+            error = CommandTimeoutError(f"{command_type} was still queued after {timeout:.1f}s and was withdrawn")
+            error.withdrawn = True
+            raise error
+        logger.info(f"{command_type} is running longer than its adaptive timeout of {timeout:.1f}s, waiting up to {budget:.0f}s")
+        if not select.select([sock], [], [], max(0.0, budget - (time.monotonic() - started)))[0]:
+            raise CommandTimeoutError(f"Timeout receiving AutoCAD response after {budget:.1f}s")
+
+    def _send_as_job(self, command_type: str, params: Dict[str, Any], idempotency_key: str, job: Job,
+                     session: Optional[str] = None) -> Dict[str, Any]:
+        """Submit a command as a plugin job and follow it to completion over side connections.
+
+        The command does not hold a socket while it runs, so no single receive has to outlast
+        it. It does hold a scheduler slot until it completes, like any other command keeping
+        AutoCAD busy, so it keeps its place in its session's order and its client is charged for
+        it under fair sharing and the client's limit of commands. Its progress and partial
+        results are recorded on job as they arrive.
+        """
+        command_id = uuid.uuid4().hex
+        document = current_target().document
+        scope = current_scope()
+        if scope is not None:
+            scope.register(self, command_id)
+        try:
+            with self.scheduler.slot(command_type, session):
+                return self._follow_job(command_type, params, idempotency_key, job, command_id, document, scope)
+        finally:
+            if scope is not None:
+                scope.complete(self, command_id)
+
+    def _follow_job(self, command_type: str, params: Dict[str, Any], idempotency_key: str, job: Job,
+                    command_id: str, document: Optional[str], scope) -> Dict[str, Any]:
+        """Submit a command as a plugin job, holding a scheduler slot, and poll it until it completes."""
+        self._unwrap(self.send_immediate("SUBMIT_JOB", {
+            "jobId": command_id,
+            "command": command_type,
+            "parameters": params or {},
+            "document": document,
+            "idempotencyKey": idempotency_key
+        }))
+        logger.info(f"Submitted {command_type} as plugin job {command_id}")
+
+        seen = 0
+        while True:
+            if scope is not None and scope.cancelled:
+                raise CommandCancelledError(f"{command_type} was cancelled")
+            status = self._unwrap(self.send_immediate("GET_JOB", {
+                "jobId": command_id,
+                "since": seen,
+                "wait": True,
+                "timeout": config.job_poll_timeout
+            }, timeout=config.job_poll_timeout + config.cancel_timeout))
+            partial_results = status.get("partialResults", [])
+            seen += len(partial_results)
+            job.report(command_type, status.get("done"), status.get("total"), partial_results)
+            if status.get("response") is not None:
+                return self._decode_response(status["response"], document)
+
+    @staticmethod
+    def _unwrap(response: Dict[str, Any]) -> Dict[str, Any]:
+        """The result of an immediate command's response, raising if it failed."""
+        if not response.get("success", False):
+            raise Exception(response.get("error", "Unknown error"))
+        return response.get("result", {})
+
+    def _handle_response(self, response_data: bytes, document: Optional[str] = None,
+                         record: Optional[RequestRecord] = None) -> Dict[str, Any]:
+        """Decode a bridge response, raising on errors and recording the drawing revision."""
+        return self._decode_response(json.loads(response_data.decode('utf-8')), document, record)
+
+    def _decode_response(self, response: Dict[str, Any], document: Optional[str] = None,
+                         record: Optional[RequestRecord] = None) -> Dict[str, Any]:
+        if "queueWaitMs" in response:
+            if record is not None:
+                record.queue_wait_ms = response["queueWaitMs"]
+            self.bridge_queue_wait_ms = response["queueWaitMs"]
+            self.bridge_queue_depth = response.get("queueDepth", 0)
+            self.admission.observe(self.bridge_queue_wait_ms)
+            logger.debug(f"Command waited {self.bridge_queue_wait_ms:.1f}ms in the bridge queue, {self.bridge_queue_depth} still waiting")
+
+        if response.get("status") == "error":
+            error_message = response.get("error") or response.get("message", "Unknown AutoCAD error")
+            logger.error(f"AutoCAD error: {error_message}")
+            raise Exception(error_message)
+
+        result = response.get("result", {})
+        if isinstance(result, dict):
+            result = BridgeResponse(result)
+        if "revision" in response:
+            epoch, revision = response.get("epoch"), response["revision"]
+            # Responses on different sockets may arrive out of order; never step back to an older revision
+            with self._cache_lock:
+                previous = self._revisions.get(document)
+                if previous is None or previous[0] != epoch or previous[1] is None or (revision or 0) >= previous[1]:
+                    self._revisions[document] = (epoch, revision)
+            if isinstance(result, BridgeResponse):
+                result.revision_token = _revision_token(response.get("epoch"), response["revision"])
+        return result
+
+    def send_immediate(self, command_type: str, params: Dict[str, Any] = None, timeout: float = None) -> Dict[str, Any]:
+        """Send an immediate command (answered off AutoCAD's UI thread) over a separate short-lived socket.
+
+        This never waits behind the command in flight on the main connection, which makes it
+        suitable for cancellation, status polling, and long waits on render jobs.
+        """
+        command = {"Id": uuid.uuid4().hex, "Type": command_type, "Parameters": params or {}}
+        record = RequestRecord(command["Id"], command_type, f"{self.host}:{self.port}", None,
+                               summarize(params), time.time(), 0.0, "error", client=current_client().id)
+        started = time.monotonic()
+        try:
+            with socket.create_connection((self.host, self.port), timeout=config.cancel_timeout) as sock:
+                framed = self._negotiate(sock)
+                sock.sendall(json.dumps(command).encode('utf-8') + REQUEST_DELIMITER)
+                response_data = self._receive(sock, framed, timeout=timeout or config.cancel_timeout)
+            record.response_bytes = len(response_data)
+            response = self._handle_response(response_data)
+            record.outcome = "ok"
+            return response
+        except Exception as e:
+            record.outcome = "timeout" if isinstance(e, (CommandTimeoutError, socket.timeout)) else "error"
+            record.error = str(e)
+            raise
+        finally:
+            record.duration = time.monotonic() - started
+            request_log.record(record)
+
+    def cancel(self, command_ids: List[str]) -> Dict[str, Any]:
+        """Remove commands that are still queued in the bridge. Commands already executing run to completion."""
+        logger.info(f"Cancelling commands: {command_ids}")
+        return self.send_immediate("CANCEL", {"commandIds": command_ids})
+
+    @property
+    def revision_token(self) -> Optional[str]:
+        """The latest revision token reported for the targeted drawing, or None if not yet known.
+
+        This is only a hint of what a cache may hold: content must be tagged with the
+        revision_token of the response that carried it.
+        """
+        epoch, revision = self._revisions.get(current_target().document, (None, None))
+        return _revision_token(epoch, revision)
+
+    def send_conditional(self, command_type: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Send a read command, reusing the previous result if the drawing has not changed since."""
+        key = (current_target().document, command_type, json.dumps(params, sort_keys=True))
+        with self._cache_lock:
+            cached = self._conditional_cache.get(key)
+
+        conditional_params = dict(params or {})
+        if cached is not None:
+            conditional_params["ifRevisionNot"] = cached[0]
 
-# Global AutoCAD connection
-_autocad_connection = None
+        response = self.send_command(command_type, conditional_params)
+        if response.get("notModified") and cached is not None:
+            logger.debug(f"{command_type} not modified since revision {cached[0]}")
+            return cached[1]
+
+        token = getattr(response, "revision_token", None)
+        if response.get("success", False) and token is not None:
+            with self._cache_lock:
+                self._conditional_cache[key] = (token, response)
+                self._conditional_cache.move_to_end(key)
+                while len(self._conditional_cache) > CONDITIONAL_CACHE_SIZE:
+                    self._conditional_cache.popitem(last=False)
+        return response
+
+@dataclass
+class Endpoint:
+    """A registered AutoCAD bridge and its connection."""
+    name: str
+    host: str
+    port: int
+    connection: Optional[AutoCADConnection] = None
+    reserved: int = 0  # Calls placed on this endpoint that have not finished yet
+    failed_at: Optional[float] = None  # When connecting last failed
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def load(self) -> int:
+        """Calls placed on or waiting for this endpoint."""
+        scheduler_load = self.connection.scheduler.load if self.connection else 0
+        return max(self.reserved, scheduler_load)
+
+class EndpointRegistry:
+    """The AutoCAD bridges the server can route tool calls to."""
+
+    # Endpoints that failed to connect are avoided by placement for this long
+    FAILURE_BACKOFF = 30.0
+
+    def __init__(self):
+        self._endpoints: "OrderedDict[str, Endpoint]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def default(self) -> str:
+        """Name of the endpoint used when a call does not name one."""
+        with self._lock:
+            return next(iter(self._endpoints), None)
+
+    def add(self, name: str, host: str, port: int) -> Endpoint:
+        """Register an endpoint, replacing any endpoint of the same name."""
+        endpoint = Endpoint(name, host, port)
+        with self._lock:
+            previous = self._endpoints.get(name)
+            self._endpoints[name] = endpoint
+        if previous and previous.connection:
+            previous.connection.disconnect()
+        logger.info(f"Registered AutoCAD endpoint {name} at {host}:{port}")
+        return endpoint
+
+    def remove(self, name: str) -> bool:
+        """Unregister an endpoint and close its connection."""
+        with self._lock:
+            endpoint = self._endpoints.pop(name, None)
+        if endpoint is None:
+            return False
+        if endpoint.connection:
+            endpoint.connection.disconnect()
+        return True
+
+    def get(self, name: Optional[str] = None) -> Endpoint:
+        """The endpoint called name, or the default endpoint."""
+        with self._lock:
+            if name is None:
+                name = next(iter(self._endpoints), None)
+            endpoint = self._endpoints.get(name)
+        if endpoint is None:
+            raise ValueError(f"Unknown AutoCAD endpoint: {name}")
+        return endpoint
+
+    def endpoints(self) -> List[Endpoint]:
+        """All registered endpoints, the default first."""
+        with self._lock:
+            return list(self._endpoints.values())
+
+    def find(self, host: str, port: int) -> Optional[Endpoint]:
+        """The endpoint registered for host:port, if any."""
+        return next((e for e in self.endpoints() if e.host == host and e.port == port), None)
+
+    @contextmanager
+    def place(self, candidates: List[str] = None) -> Iterator[str]:
+        """Reserve the least loaded endpoint for the duration of the block and yield its name.
+
+        Reservations count towards the load, so calls placed at the same moment spread
+        over the endpoints instead of all landing on the one that was idle.
+        """
+        now = time.monotonic()
+        with self._lock:
+            endpoints = [e for name, e in self._endpoints.items() if candidates is None or name in candidates]
+            if not endpoints:
+                raise ValueError("No AutoCAD endpoints to place the call on")
+            healthy = [e for e in endpoints if e.failed_at is None or now - e.failed_at > self.FAILURE_BACKOFF]
+            endpoint = min(healthy or endpoints, key=lambda e: e.load)
+            endpoint.reserved += 1
+        try:
+            yield endpoint.name
+        finally:
+            with self._lock:
+                endpoint.reserved -= 1
+
+    def disconnect_all(self):
+        """Close the connections of all endpoints."""
+        for endpoint in self.endpoints():
+            if endpoint.connection:
+                endpoint.connection.disconnect()
+
+def _parse_endpoint(spec: str) -> Tuple[str, str, int]:
+    """Parse a "name=host:port" or "host:port" endpoint specification."""
+    name, _, address = spec.rpartition("=")
+    host, _, port = address.rpartition(":")
+    host = host or config.autocad_host
+    return name or f"{host}:{port}", host, int(port)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> EndpointRegistry:
+    """The endpoint registry, created from the configuration on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = EndpointRegistry()
+            _registry.add("default", config.autocad_host, config.autocad_port)
+            for spec in config.autocad_endpoints:
+                _registry.add(*_parse_endpoint(spec))
+        return _registry
 
 def get_autocad_connection() -> AutoCADConnection:
-    """Retrieve or establish a persistent AutoCAD connection."""
-    global _autocad_connection
-    if _autocad_connection is not None:
+    """Retrieve or establish a persistent connection to the endpoint targeted by the current tool call."""
+    endpoint_name = current_target().endpoint
+    if endpoint_name == ANY_ENDPOINT:
+        raise ValueError("Target 'any' must be placed on an endpoint before connecting")
+    endpoint = get_registry().get(endpoint_name)
+    with endpoint.lock:
+        try:
+            endpoint.connection = _verify_connection(endpoint)
+            endpoint.failed_at = None
+            return endpoint.connection
+        except Exception:
+            endpoint.failed_at = time.monotonic()
+            endpoint.connection = None
+            raise
+
+def _verify_connection(endpoint: Endpoint) -> AutoCADConnection:
+    connection = endpoint.connection
+    if connection is not None:
         try:
             # Try to ping with a short timeout to verify connection
-            result = _autocad_connection.send_command("ping")
+            result = connection.send_command("ping")
             # If we get here, the connection is still valid
-            logger.debug("Reusing existing AutoCAD connection")
-            return _autocad_connection
+            logger.debug(f"Reusing existing AutoCAD connection to {endpoint.name}")
+            return connection
         except Exception as e:
-            logger.warning(f"Existing connection failed: {str(e)}")
+            logger.warning(f"Existing connection to {endpoint.name} failed: {str(e)}")
             try:
-                _autocad_connection.disconnect()
+                connection.disconnect()
             except:
                 pass
-            _autocad_connection = None
     
     # Create a new connection
-    logger.info("Creating new AutoCAD connection")
-    _autocad_connection = AutoCADConnection()
-    if not _autocad_connection.connect():
-        _autocad_connection = None
-        raise ConnectionError("Could not connect to AutoCAD. Ensure the AutoCAD Editor and MCP Bridge are running.")
+    logger.info(f"Creating new AutoCAD connection to {endpoint.name}")
+    connection = AutoCADConnection(host=endpoint.host, port=endpoint.port)
+    if not connection.connect():
+        raise ConnectionError(f"Could not connect to AutoCAD at {endpoint.host}:{endpoint.port}. Ensure the AutoCAD Editor and MCP Bridge are running.")
     
     try:
         # Verify the new connection works
-        _autocad_connection.send_command("ping")
-        logger.info("Successfully established new AutoCAD connection")
-        return _autocad_connection
+        connection.send_command("ping")
+        logger.info(f"Successfully established new AutoCAD connection to {endpoint.name}")
+        return connection
     except Exception as e:
         logger.error(f"Could not verify new connection: {str(e)}")
         try:
-            _autocad_connection.disconnect()
+            connection.disconnect()
         except:
             pass
-        _autocad_connection = None
-        raise ConnectionError(f"Could not establish valid AutoCAD connection: {str(e)}") 
\ No newline at end of file
+        raise ConnectionError(f"Could not establish valid AutoCAD connection: {str(e)}")
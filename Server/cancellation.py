@@ -0,0 +1,86 @@
+"""
+Cancellation of bridge commands issued by a tool call.
+
+Synchronous tools run in worker threads inside a CallScope. Every bridge
+command sent from the scope is recorded, so when the MCP client cancels the
+request the commands still queued in the plugin can be withdrawn with a CANCEL
+message, and the worker thread is prevented from sending anything further.
+"""
+
+import contextvars
+import functools
+import logging
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+import anyio
+
+logger = logging.getLogger("AutoCADMCP")
+
+class CommandCancelledError(Exception):
+    """Raised when a command is issued or awaited on behalf of a cancelled tool call."""
+
+class CallScope:
+    """The bridge commands issued by one tool call."""
+
+    def __init__(self):
+        self.cancelled = False
+        self._commands: List[Tuple[Any, str]] = []
+        self._lock = threading.Lock()
+
+    def register(self, connection, command_id: str):
+        """Record a command sent on connection, failing if the call was already cancelled."""
+        with self._lock:
+            if self.cancelled:
+                raise CommandCancelledError("Tool call was cancelled")
+            self._commands.append((connection, command_id))
+
+    def complete(self, connection, command_id: str):
+        """Forget a command once its response has arrived."""
+        with self._lock:
+            try:
+                self._commands.remove((connection, command_id))
+            except ValueError:
+                pass
+
+    def cancel(self):
+        """Withdraw every outstanding command of this call from the bridge."""
+        with self._lock:
+            self.cancelled = True
+            outstanding, self._commands = self._commands, []
+
+        by_connection = {}
+        for connection, command_id in outstanding:
+            by_connection.setdefault(id(connection), (connection, []))[1].append(command_id)
+        for connection, command_ids in by_connection.values():
+            try:
+                connection.cancel(command_ids)
+            except Exception as e:
+                logger.warning(f"Could not cancel commands {command_ids}: {str(e)}")
+            connection.scheduler.wake()
+
+_current_scope: contextvars.ContextVar[Optional[CallScope]] = contextvars.ContextVar("autocad_call_scope", default=None)
+
+def current_scope() -> Optional[CallScope]:
+    """The call scope of the running tool call, if any."""
+    return _current_scope.get()
+
+def cancellable(fn: Callable) -> Callable:
+    """Run a synchronous tool in a worker thread, cancelling its bridge commands if the request is cancelled."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        scope = CallScope()
+        token = _current_scope.set(scope)
+        try:
+            return await anyio.to_thread.run_sync(
+                functools.partial(fn, *args, **kwargs),
+                abandon_on_cancel=True
+            )
+        except anyio.get_cancelled_exc_class():
+            logger.info(f"Tool call {fn.__name__} was cancelled")
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(scope.cancel)
+            raise
+        finally:
+            _current_scope.reset(token)
+    return wrapper
@@ -0,0 +1,99 @@
+"""
+MCP clients sharing the server.
+
+Over the streamable HTTP and SSE transports one server process serves many MCP
+clients, which share its bridge connections. Every tool call is attributed to
+the client session it arrived on, so that the bridge schedulers can share the
+connections fairly between clients (see scheduler.CommandScheduler), and the
+number of tool calls a client runs at once can be limited: its further calls
+wait for one to finish instead of taking up the worker threads other clients
+need.
+
+A client's weight, its share of bridge time relative to other clients, is
+looked up by the name the client reported when it initialised the session.
+Calls made outside of a session, such as during startup, belong to the local
+client.
+"""
+
+import contextvars
+import functools
+import itertools
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+import anyio
+
+from config import config
+
+@dataclass(eq=False)
+class Client:
+    """An MCP client session."""
+    id: str
+    name: str
+    weight: float = 1.0
+    # Tool calls of the client running in worker threads at once
+    calls: anyio.CapacityLimiter = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.calls is None:
+            self.calls = anyio.CapacityLimiter(max(1, config.client_max_calls))
+
+    def describe(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "weight": self.weight,
+            "runningCalls": self.calls.borrowed_tokens,
+            "waitingCalls": self.calls.statistics().tasks_waiting,
+        }
+
+LOCAL_CLIENT = Client("local", "local")
+
+_current_client: contextvars.ContextVar[Client] = contextvars.ContextVar("autocad_client", default=LOCAL_CLIENT)
+
+def current_client() -> Client:
+    """The client of the running tool call."""
+    return _current_client.get()
+
+# Clients by their session, forgotten when the session is
+_clients: "weakref.WeakKeyDictionary[Any, Client]" = weakref.WeakKeyDictionary()
+_client_ids = itertools.count(1)
+
+def client_of(session) -> Client:
+    """The client of an MCP session, registered on its first tool call."""
+    client = _clients.get(session)
+    if client is None:
+        params = getattr(session, "client_params", None)
+        info = getattr(params, "clientInfo", None)
+        name = getattr(info, "name", None) or "unknown"
+        client = _clients[session] = Client(f"client-{next(_client_ids)}", name, config.client_weights.get(name, 1.0))
+    return client
+
+def clients() -> list:
+    """The clients with a live session."""
+    return list(_clients.values())
+
+def identified(fn: Callable[..., Awaitable[Any]], context: Callable[[], Any], limited: bool) -> Callable[..., Awaitable[Any]]:
+    """Attribute the calls of an async tool to the client of the request being handled.
+
+    context returns the FastMCP context of the request. Calls made without one,
+    such as those of a background job, keep the client they inherited. With
+    limited, the call counts towards the client's limit of running calls.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        client = current_client()
+        try:
+            client = client_of(context().session)
+        except (LookupError, ValueError):
+            pass
+        token = _current_client.set(client)
+        try:
+            if not limited:
+                return await fn(*args, **kwargs)
+            async with client.calls:
+                return await fn(*args, **kwargs)
+        finally:
+            _current_client.reset(token)
+    return wrapper
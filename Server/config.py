@@ -3,7 +3,28 @@ Configuration settings for the AutoCAD MCP Server.
 This file contains all configurable parameters for the server.
 """
 
-from dataclasses import dataclass
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+def _env(name: str, default: Any, cast: Callable[[str], Any] = str) -> Any:
+    """A setting's default, overridden by the environment variable AUTOCAD_MCP_<NAME> if set."""
+    value = os.environ.get(f"AUTOCAD_MCP_{name.upper()}")
+    return default if value is None else cast(value)
+
+def _names(value: str) -> List[str]:
+    """A comma separated list of names."""
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+def _numbers(value: str) -> Dict[str, float]:
+    """A comma separated list of name=number pairs."""
+    pairs = (item.partition("=") for item in value.split(",") if item.strip())
+    return {name.strip(): float(number) for name, _, number in pairs}
+
+def _per_class(name: str, **defaults: float) -> Dict[str, float]:
+    """Per command class settings, overridden class by class by AUTOCAD_MCP_<NAME>, e.g. "edit=10,heavy=1"."""
+    return {**defaults, **_env(name, {}, _numbers)}
 
 @dataclass
 class ServerConfig:
@@ -12,15 +33,79 @@ class ServerConfig:
     # Network settings
     autocad_host: str = "localhost"
     autocad_port: int = 6400
-    mcp_port: int = 6500
+    transport: str = _env("transport", "stdio")  # "stdio", or "streamable-http" or "sse" to serve many clients
+    mcp_host: str = _env("mcp_host", "127.0.0.1")  # Address the HTTP transports listen on
+    mcp_port: int = _env("mcp_port", 6500, int)
+    # Further bridges as "name=host:port", e.g. AUTOCAD_MCP_ENDPOINTS="cad2=localhost:6401,office=10.0.0.5:6400"
+    autocad_endpoints: List[str] = field(default_factory=lambda: _env("endpoints", [], _names))
+    bridge_token: str = _env("token", None)  # Sent in the handshake; bridges listening beyond localhost require it
+    endpoint_scan_ports: int = 10  # Ports above autocad_port probed by discover_targets
     
     # Connection settings
     connection_timeout: float = 300.0  # 5 minutes timeout
+    bridge_pool_size: int = _env("bridge_pool_size", 2, int)  # Sockets per bridge, i.e. commands in flight at once
+    cancel_timeout: float = 5.0  # Timeout for out-of-band messages such as CANCEL
+    
+    # Timeout budgets per command class, adapted down from observed latencies
+    read_timeout: float = 30.0
+    edit_timeout: float = 120.0
+    heavy_timeout: float = 300.0
+    timeout_percentile: float = 99.0  # Latency percentile the adaptive timeout is based on
+    timeout_multiplier: float = 4.0  # Headroom applied to that percentile
+    min_timeout: float = 5.0  # Adaptive timeouts never drop below this
     buffer_size: int = 1024 * 1024  # 1MB buffer for localhost
+    compression: str = "deflate"  # Response compression offered to the bridge, or "none"
+    compression_threshold: int = 64 * 1024  # Responses smaller than this are sent uncompressed
+    
+    # Render settings
+    render_output_dir: str = None  # None lets the plugin use a temporary directory
+    render_timeout: float = 120.0  # Seconds to wait for a render job when waiting in-band
+    render_cache_dir: str = os.path.join(tempfile.gettempdir(), "autocad_mcp_render_cache")
+    render_cache_memory_bytes: int = 64 * 1024 * 1024  # 64MB of images kept in memory
+    render_cache_disk_bytes: int = 512 * 1024 * 1024  # 512MB of images kept on disk
+    
+    # Mirror settings
+    mirror_page_size: int = 5000  # Entities fetched per request when loading a drawing mirror
+    measure_memo_size: int = 100000  # Entity measurements remembered per document
+    snap_buffer_size: int = 4096  # Snap points added before the KD-tree is rebuilt (at least 1/8 of its size)
+    
+    # Startup settings
+    connect_backoff_initial: float = 1.0  # Seconds before retrying a bridge that was not reachable at startup
+    connect_backoff_max: float = 30.0  # The retry delay doubles up to this
+    # Caches prefetched once a bridge is connected, any of "mirror" and "snaps"; empty disables the warm-up
+    warmup: List[str] = field(default_factory=lambda: _env("warmup", ["mirror"], _names))
+    
+    # Job settings
+    job_poll_timeout: float = 10.0  # Seconds a job status poll waits for progress before returning
+    job_progress_interval: float = 1.0  # Seconds between progress notifications while awaiting a job
+    
+    # Session settings
+    session_timeout: float = 600.0  # Sessions are aborted after 10 minutes of inactivity
+    
+    # Scheduling settings
+    scheduler_aging_seconds: float = 10.0  # Waiting commands gain one priority class every 10 seconds
+    
+    # Admission settings per command class ("read", "edit" and "heavy"), protecting AutoCAD's UI thread.
+    # Commands beyond them are rejected with a retry-after hint; a value of 0 lifts the limit
+    rate_limits: Dict[str, float] = field(default_factory=lambda: _per_class("rate_limits", read=100, edit=20, heavy=2))  # Commands per second sent to a bridge
+    rate_bursts: Dict[str, float] = field(default_factory=lambda: _per_class("rate_bursts", read=200, edit=50, heavy=5))  # Commands sent at once before the rate applies
+    max_queue_depth: Dict[str, float] = field(default_factory=lambda: _per_class("max_queue_depth", read=256, edit=64, heavy=8))  # Commands waiting for a bridge socket
+    # Average wait for the UI thread reported by the bridge above which commands are shed
+    shed_queue_wait_ms: Dict[str, float] = field(default_factory=lambda: _per_class("shed_queue_wait_ms", read=10000, edit=3000, heavy=1000))
+    admission_max_wait: float = _env("admission_max_wait", 1.0, float)  # Seconds a command may wait for a rate limit token
+    
+    # Client settings, for the HTTP transports
+    client_max_calls: int = _env("client_max_calls", 8, int)  # Tool calls a client runs at once, further calls wait
+    client_max_commands: int = _env("client_max_commands", 1, int)  # Sockets of a bridge one client holds at once
+    # Share of bridge time of clients by the name they report, relative to the default of 1
+    client_weights: Dict[str, float] = field(default_factory=lambda: _env("client_weights", {}, _numbers))
     
     # Logging settings
-    log_level: str = "INFO"
-    log_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    log_level: str = _env("log_level", "INFO", str.upper)
+    log_format: str = _env("log_format", "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    log_sample_every: int = _env("log_sample_every", 20, int)  # Of every command type, the first and every 20th is logged
+    log_payload_limit: int = _env("log_payload_limit", 200, int)  # Characters of a string parameter kept in logs
+    request_log_size: int = _env("request_log_size", 1000, int)  # Recent requests kept for get_diagnostics
     
     # Server settings
     max_retries: int = 3
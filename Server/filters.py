@@ -0,0 +1,294 @@
+"""
+Entity filter expressions.
+
+A filter expression combines comparisons with and, or, not and parentheses:
+
+    type == Circle and layer == "HOLES" and radius < 5
+    not (color in (1, 2) or layer != "0")
+    type in (Line, Arc) and StartPoint.Z > 0
+
+The special fields type, layer and color match the entity type, layer and
+color index. Any other field names an entity property, such as Radius, Length
+or Area, or a property of one, such as StartPoint.X. Names are
+case-insensitive. Values are numbers, true or false, and strings, which may
+be left unquoted if they are plain words. Type names can be .NET class names
+(Circle, Polyline, DBText) or DXF names (CIRCLE, LWPOLYLINE, TEXT).
+
+An expression is parsed and validated in the server, then compiled in two
+parts. The first part is the top-level conjuncts that AutoCAD's selection
+filters can express, as a DXF filter list. The second part is a residual
+tree that the plugin evaluates on the entities the filter selects. The full
+tree is sent as well, for documents that cannot use editor selection.
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# .NET entity class names and their DXF names
+DXF_TYPE_NAMES = {
+    "line": "LINE",
+    "circle": "CIRCLE",
+    "arc": "ARC",
+    "ellipse": "ELLIPSE",
+    "polyline": "LWPOLYLINE",
+    "polyline2d": "POLYLINE",
+    "polyline3d": "POLYLINE",
+    "point": "POINT",
+    "dbpoint": "POINT",
+    "text": "TEXT",
+    "dbtext": "TEXT",
+    "mtext": "MTEXT",
+    "spline": "SPLINE",
+    "solid3d": "3DSOLID",
+    "region": "REGION",
+    "blockreference": "INSERT",
+    "hatch": "HATCH",
+    "dimension": "DIMENSION",
+    "leader": "LEADER",
+    "mleader": "MULTILEADER",
+    "ray": "RAY",
+    "xline": "XLINE",
+    "face": "3DFACE",
+    "solid": "SOLID",
+}
+
+# Properties with a DXF group code, and the DXF types the code means that property for
+DXF_PROPERTY_CODES = {
+    "radius": (40, {"CIRCLE", "ARC"}),
+    "elevation": (38, {"LWPOLYLINE"}),
+}
+
+# Group code of the layout an entity belongs to; selections are limited to model space
+_LAYOUT_CODE = 410
+_COLOR_BYLAYER = 256
+
+_SYMBOLIC_FIELDS = {"type", "layer"}
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<operator>==|!=|<>|<=|>=|=|<|>)
+      | (?P<punctuation>[(),])
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*)
+    )""", re.VERBOSE)
+
+_KEYWORDS = {"and", "or", "not", "in", "true", "false"}
+
+class _Token(NamedTuple):
+    kind: str
+    value: Any
+    position: int
+
+def _tokenize(text: str) -> List[_Token]:
+    tokens = []
+    position = 0
+    while position < len(text):
+        if text[position:].strip() == "":
+            break
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"Unexpected character {text[position:].lstrip()[0]!r} at position {position}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        start = match.start(kind)
+        if kind == "number":
+            value = float(value) if re.search(r"[.eE]", value) else int(value)
+        elif kind == "string":
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        elif kind == "operator":
+            value = {"=": "==", "<>": "!="}.get(value, value)
+        elif kind == "name" and value.lower() in _KEYWORDS:
+            kind, value = "keyword", value.lower()
+        tokens.append(_Token(kind, value, start))
+        position = match.end()
+    tokens.append(_Token("end", None, len(text)))
+    return tokens
+
+class _Parser:
+    """Recursive descent parser producing the expression tree sent to the plugin."""
+
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.index = 0
+
+    @property
+    def token(self) -> _Token:
+        return self.tokens[self.index]
+
+    def _accept(self, kind: str, value: Any = None) -> Optional[_Token]:
+        token = self.token
+        if token.kind == kind and (value is None or token.value == value):
+            self.index += 1
+            return token
+        return None
+
+    def _expect(self, kind: str, value: Any = None) -> _Token:
+        token = self._accept(kind, value)
+        if token is None:
+            found = "end of expression" if self.token.kind == "end" else repr(self.token.value)
+            raise ValueError(f"Expected {value or kind} but found {found} at position {self.token.position}")
+        return token
+
+    def parse(self) -> Dict[str, Any]:
+        node = self._or()
+        self._expect("end")
+        return node
+
+    def _or(self) -> Dict[str, Any]:
+        args = [self._and()]
+        while self._accept("keyword", "or"):
+            args.append(self._and())
+        return args[0] if len(args) == 1 else {"op": "or", "args": args}
+
+    def _and(self) -> Dict[str, Any]:
+        args = [self._not()]
+        while self._accept("keyword", "and"):
+            args.append(self._not())
+        return args[0] if len(args) == 1 else {"op": "and", "args": args}
+
+    def _not(self) -> Dict[str, Any]:
+        if self._accept("keyword", "not"):
+            return {"op": "not", "arg": self._not()}
+        if self._accept("punctuation", "("):
+            node = self._or()
+            self._expect("punctuation", ")")
+            return node
+        return self._comparison()
+
+    def _comparison(self) -> Dict[str, Any]:
+        field = self._expect("name")
+        name = field.value.lower()
+        negated = self._accept("keyword", "not") is not None
+        if negated or self._accept("keyword", "in"):
+            if negated:
+                self._expect("keyword", "in")
+            self._expect("punctuation", "(")
+            values = [self._literal()]
+            while self._accept("punctuation", ","):
+                values.append(self._literal())
+            self._expect("punctuation", ")")
+            node = {"op": "in", "field": name, "values": [_normalise(name, v, field) for v in values]}
+            return {"op": "not", "arg": node} if negated else node
+
+        operator = self._expect("operator").value
+        value = _normalise(name, self._literal(), field)
+        if name in _SYMBOLIC_FIELDS and operator not in ("==", "!="):
+            raise ValueError(f"{field.value} can only be compared with ==, != or in (position {field.position})")
+        return {"op": "cmp", "field": name, "cmp": operator, "value": value}
+
+    def _literal(self) -> Any:
+        token = self.token
+        if token.kind in ("number", "string", "name"):
+            self.index += 1
+            return token.value
+        if token.kind == "keyword" and token.value in ("true", "false"):
+            self.index += 1
+            return token.value == "true"
+        found = "end of expression" if token.kind == "end" else repr(token.value)
+        raise ValueError(f"Expected a value but found {found} at position {token.position}")
+
+def _normalise(field: str, value: Any, token: _Token) -> Any:
+    """Check a value against its field and bring it into the form the plugin compares."""
+    if field in _SYMBOLIC_FIELDS and not isinstance(value, str):
+        raise ValueError(f"{token.value} must be compared with a name (position {token.position})")
+    if field == "type":
+        return DXF_TYPE_NAMES.get(value.lower(), value.upper())
+    if field == "color" and (isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 256):
+        raise ValueError(f"color must be compared with a color index from 0 to 256 (position {token.position})")
+    return value
+
+def parse_filter(text: str) -> Dict[str, Any]:
+    """Parse a filter expression into its expression tree, raising ValueError on invalid expressions."""
+    if not text or not text.strip():
+        raise ValueError("The filter expression is empty")
+    return _Parser(text).parse()
+
+# Characters with a special meaning in selection filter patterns, escaped with a backquote
+_WILDCARDS = re.compile(r"([#@.*?~\[\]\-,`])")
+
+def _pattern(values: List[str]) -> str:
+    return ",".join(_WILDCARDS.sub(r"`\1", value) for value in values)
+
+def _dxf(node: Dict[str, Any], types: Optional[set]) -> Optional[List[List[Any]]]:
+    """DXF filter items equivalent to a node, or None if selection filters cannot express it."""
+    op = node["op"]
+    if op == "not":
+        inner = _dxf(node["arg"], types)
+        return None if inner is None else [[-4, "<not"], *_grouped(inner), [-4, "not>"]]
+    if op in ("and", "or"):
+        parts = [_dxf(arg, types) for arg in node["args"]]
+        if any(part is None for part in parts):
+            return None
+        return [[-4, f"<{op}"], *[item for part in parts for item in part], [-4, f"{op}>"]]
+
+    field = node["field"]
+    values = node["values"] if op == "in" else [node["value"]]
+    equality = op == "in" or node["cmp"] == "=="
+    if field in _SYMBOLIC_FIELDS:
+        items = [[0 if field == "type" else 8, _pattern(values)]]
+        return items if equality else [[-4, "<not"], *items, [-4, "not>"]]
+    if field == "color":
+        # ByLayer entities carry no color group at all, so only explicit colors are matched by filters
+        if not equality or _COLOR_BYLAYER in values:
+            return None
+        items = [[62, value] for value in values]
+        return items if len(items) == 1 else [[-4, "<or"], *items, [-4, "or>"]]
+    if field in DXF_PROPERTY_CODES and op == "cmp" and isinstance(node["value"], (int, float)) \
+            and not isinstance(node["value"], bool):
+        code, applies_to = DXF_PROPERTY_CODES[field]
+        # A group code only means this property for some types, so the types must be restricted to those
+        if types is not None and types <= applies_to:
+            return [[-4, node["cmp"].replace("==", "=")], [code, float(node["value"])]]
+    return None
+
+def _grouped(items: List[List[Any]]) -> List[List[Any]]:
+    """Items as a single operand, as <not takes exactly one."""
+    return items if len(items) == 1 else [[-4, "<and"], *items, [-4, "and>"]]
+
+def _restricted_types(conjuncts: List[Dict[str, Any]]) -> Optional[set]:
+    """The DXF types a conjunction restricts entities to, or None if it does not."""
+    types = None
+    for node in conjuncts:
+        if node.get("field") != "type":
+            continue
+        if node["op"] == "in":
+            allowed = set(node["values"])
+        elif node["cmp"] == "==":
+            allowed = {node["value"]}
+        else:
+            continue
+        types = allowed if types is None else types & allowed
+    return types
+
+class CompiledFilter(NamedTuple):
+    """A filter expression split into a DXF selection filter and the residual evaluated per entity."""
+    dxf: List[List[Any]]
+    residual: Optional[Dict[str, Any]]
+    expression: Dict[str, Any]
+
+    def to_params(self) -> Dict[str, Any]:
+        return {"filter": self.dxf, "residual": self.residual, "expression": self.expression}
+
+def compile_filter(text: str) -> CompiledFilter:
+    """Parse a filter expression and split it into a selection filter and a residual expression."""
+    expression = parse_filter(text)
+    conjuncts = expression["args"] if expression["op"] == "and" else [expression]
+    types = _restricted_types(conjuncts)
+
+    dxf = [[_LAYOUT_CODE, "Model"]]
+    residual = []
+    for node in conjuncts:
+        items = _dxf(node, types)
+        if items is None:
+            residual.append(node)
+        else:
+            dxf.extend(items)
+
+    if not residual:
+        residual_node = None
+    elif len(residual) == 1:
+        residual_node = residual[0]
+    else:
+        residual_node = {"op": "and", "args": residual}
+    return CompiledFilter(dxf, residual_node, expression)
@@ -0,0 +1,576 @@
+"""
+Streaming bulk geometry import and export.
+
+Geometry files are read lazily and turned into chunks of bulk creation
+requests. A chunk holds groups of entities of the same type whose coordinates
+are packed into one base64 blob of little-endian float64 values, so thousands
+of entities travel in a single BULK_CREATE command.
+
+Supported inputs:
+
+* CSV with a header row. The type column (or the default type) selects the
+  entity and the remaining columns its geometry: x, y, z for points and for the
+  vertices of polylines (consecutive rows sharing an id form one polyline);
+  x1, y1, z1, x2, y2, z2 for lines; x, y, z, radius for circles; and x, y, z,
+  length, width, height for boxes. An optional layer column sets the layer.
+* JSON lines, one record per line: {"type": "point", "position": [...]},
+  {"type": "line", "start": [...], "end": [...]}, {"type": "polyline",
+  "points": [[...], ...], "closed": false}, {"type": "circle", "center": [...],
+  "radius": r} or {"type": "box", "center": [...], "size": [l, w, h]}, each
+  with an optional "layer".
+* NPZ archives with any of the arrays points (n, 2|3), lines (n, 6),
+  circles (n, 4), boxes (n, 6), and polylines / polylines3d vertex arrays
+  (m, 2|3) with polyline_offsets / polyline3d_offsets of length n + 1 and an
+  optional polyline_closed flag per polyline. Arrays are streamed from the
+  archive without loading them whole.
+
+Exports go the other way: pages of EXPORT_ENTITIES_PAGE results are appended
+to one columnar table per entity type, either as a directory of .npy columns
+that can be memory-mapped with np.load(..., mmap_mode="r"), or as Parquet files
+when pyarrow is installed. Only one page is held in memory at a time.
+"""
+
+import base64
+import csv
+import io
+import json
+import os
+import queue
+import threading
+import zipfile
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Number of float64 values describing one entity of each type; polylines are variable-length
+VALUES_PER_ENTITY = {
+    "point": 3,
+    "line": 6,
+    "circle": 4,
+    "box": 6,
+}
+POLYLINE_TYPES = ("polyline", "polyline3d")
+ENTITY_TYPES = tuple(VALUES_PER_ENTITY) + POLYLINE_TYPES
+
+@dataclass
+class Group:
+    """Entities of one type, packed for a BULK_CREATE command."""
+    type: str
+    values: np.ndarray  # (count, VALUES_PER_ENTITY) or, for polylines, (vertices, 3)
+    offsets: Optional[np.ndarray] = None  # Polylines only: vertex offsets of length count + 1
+    closed: Optional[List[bool]] = None  # Polylines only
+    layers: Optional[List[Optional[str]]] = None
+
+    @property
+    def count(self) -> int:
+        return len(self.offsets) - 1 if self.offsets is not None else len(self.values)
+
+    def encode(self) -> Dict[str, Any]:
+        """The group as BULK_CREATE parameters."""
+        encoded = {
+            "type": self.type,
+            "count": self.count,
+            "values": base64.b64encode(np.ascontiguousarray(self.values, dtype="<f8").tobytes()).decode("ascii"),
+        }
+        if self.offsets is not None:
+            encoded["offsets"] = base64.b64encode(np.ascontiguousarray(self.offsets, dtype="<i4").tobytes()).decode("ascii")
+            encoded["closed"] = self.closed or [False] * self.count
+        if self.layers is not None and any(self.layers):
+            encoded["layers"] = self.layers
+        return encoded
+
+@dataclass
+class Chunk:
+    """A batch of groups read from the file, and how far into the file it reaches."""
+    groups: List[Group]
+    position: int
+    total: int
+
+    @property
+    def count(self) -> int:
+        return sum(group.count for group in self.groups)
+
+def _point(values: Iterable[Any], name: str) -> List[float]:
+    values = [float(v) for v in values]
+    if not 2 <= len(values) <= 3:
+        raise ValueError(f"{name} must be [x, y] or [x, y, z]")
+    return values + [0.0] * (3 - len(values))
+
+def _number(row: Dict[str, Any], key: str, default: float = None) -> float:
+    value = row.get(key)
+    if value is None or value == "":
+        if default is None:
+            raise ValueError(f"Missing value for {key}")
+        return default
+    return float(value)
+
+def _pack_records(records: List[Dict[str, Any]]) -> List[Group]:
+    """Group normalised records by entity type and pack their geometry."""
+    by_type: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_type.setdefault(record["type"], []).append(record)
+
+    groups = []
+    for entity_type, members in by_type.items():
+        layers = [member.get("layer") for member in members]
+        if entity_type in POLYLINE_TYPES:
+            counts = [len(member["points"]) for member in members]
+            offsets = np.zeros(len(members) + 1, dtype=np.int32)
+            np.cumsum(counts, out=offsets[1:])
+            values = np.array([point for member in members for point in member["points"]], dtype=np.float64).reshape(-1, 3)
+            closed = [bool(member.get("closed", False)) for member in members]
+            groups.append(Group(entity_type, values, offsets, closed, layers))
+        else:
+            values = np.array([member["values"] for member in members], dtype=np.float64)
+            groups.append(Group(entity_type, values, layers=layers))
+    return groups
+
+def _normalise_json(record: Dict[str, Any], default_type: str) -> Dict[str, Any]:
+    """Convert a JSON-lines record into the packed value layout of its type."""
+    entity_type = record.get("type", default_type)
+    layer = record.get("layer")
+    if entity_type == "point":
+        values = _point(record["position"], "position")
+    elif entity_type == "line":
+        values = _point(record["start"], "start") + _point(record["end"], "end")
+    elif entity_type == "circle":
+        values = _point(record["center"], "center") + [float(record["radius"])]
+    elif entity_type == "box":
+        values = _point(record["center"], "center") + [float(v) for v in record["size"]]
+    elif entity_type in POLYLINE_TYPES:
+        points = [_point(p, "points") for p in record["points"]]
+        if len(points) < 2:
+            raise ValueError("A polyline needs at least two points")
+        return {"type": entity_type, "points": points, "closed": record.get("closed", False), "layer": layer}
+    else:
+        raise ValueError(f"Unsupported entity type: {entity_type}")
+    return {"type": entity_type, "values": values, "layer": layer}
+
+def _normalise_csv(row: Dict[str, str], default_type: str) -> Dict[str, Any]:
+    """Convert a CSV row into the packed value layout of its type. Polyline rows hold one vertex."""
+    entity_type = (row.get("type") or default_type).strip().lower()
+    layer = row.get("layer") or None
+    if entity_type in ("point",) + POLYLINE_TYPES:
+        values = [_number(row, "x"), _number(row, "y"), _number(row, "z", 0.0)]
+    elif entity_type == "line":
+        values = [_number(row, "x1"), _number(row, "y1"), _number(row, "z1", 0.0),
+                  _number(row, "x2"), _number(row, "y2"), _number(row, "z2", 0.0)]
+    elif entity_type == "circle":
+        values = [_number(row, "x"), _number(row, "y"), _number(row, "z", 0.0), _number(row, "radius")]
+    elif entity_type == "box":
+        values = [_number(row, "x"), _number(row, "y"), _number(row, "z", 0.0),
+                  _number(row, "length"), _number(row, "width"), _number(row, "height")]
+    else:
+        raise ValueError(f"Unsupported entity type: {entity_type}")
+    return {"type": entity_type, "values": values, "layer": layer}
+
+def _complete_polyline(record: Dict[str, Any], line: int) -> Dict[str, Any]:
+    """Check a polyline collected from CSV rows, line being the line of its first row."""
+    if len(record["points"]) < 2:
+        raise ValueError(f"A polyline needs at least two points, but the one on line {line} has one")
+    return record
+
+def _read_csv(path: str, default_type: str, chunk_size: int) -> Iterator[Chunk]:
+    total = os.path.getsize(path)
+    with open(path, "rb") as raw:
+        reader = csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8", newline=""))
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        records: List[Dict[str, Any]] = []
+        polyline = None  # (id, record, line) of the polyline whose vertices are being collected
+
+        for row in reader:
+            record = _normalise_csv(row, default_type)
+            if record["type"] in POLYLINE_TYPES:
+                polyline_id = (record["type"], row.get("id"))
+                if polyline is not None and polyline[0] == polyline_id:
+                    polyline[1]["points"].append(record["values"])
+                    continue
+                # A new polyline starts; only now is the previous one complete
+                if polyline is not None:
+                    records.append(_complete_polyline(*polyline[1:]))
+                closed = (row.get("closed") or "").strip().lower() in ("1", "true", "yes")
+                polyline = (polyline_id, {"type": record["type"], "points": [record["values"]], "closed": closed, "layer": record["layer"]},
+                            reader.line_num)
+            else:
+                records.append(record)
+
+            if len(records) >= chunk_size:
+                yield Chunk(_pack_records(records), raw.tell(), total)
+                records = []
+
+        if polyline is not None:
+            records.append(_complete_polyline(*polyline[1:]))
+        if records:
+            yield Chunk(_pack_records(records), total, total)
+
+def _read_jsonl(path: str, default_type: str, chunk_size: int) -> Iterator[Chunk]:
+    total = os.path.getsize(path)
+    with open(path, "rb") as raw:
+        records = []
+        for line in raw:
+            if not line.strip():
+                continue
+            records.append(_normalise_json(json.loads(line), default_type))
+            if len(records) >= chunk_size:
+                yield Chunk(_pack_records(records), raw.tell(), total)
+                records = []
+        if records:
+            yield Chunk(_pack_records(records), total, total)
+
+class _NpyStream:
+    """Reads rows of a .npy member of an NPZ archive sequentially, without loading the array."""
+
+    def __init__(self, archive: zipfile.ZipFile, name: str):
+        self._file = archive.open(name + ".npy")
+        version = np.lib.format.read_magic(self._file)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(self._file)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(self._file)
+        if fortran_order or dtype.hasobject:
+            raise ValueError(f"{name} must be a C-ordered numeric array")
+        self.shape = shape
+        self.dtype = dtype
+        self._row_items = int(np.prod(shape[1:])) if len(shape) > 1 else 1
+
+    def read(self, rows: int) -> np.ndarray:
+        count = rows * self._row_items
+        data = self._file.read(count * self.dtype.itemsize)
+        return np.frombuffer(data, dtype=self.dtype, count=count).reshape((rows,) + tuple(self.shape[1:]))
+
+    def close(self):
+        self._file.close()
+
+def _pad_columns(values: np.ndarray, columns: int) -> np.ndarray:
+    """Insert z = 0 into 2D coordinates so every group uses the 3D value layout."""
+    values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+    if values.shape[1] == columns:
+        return values
+    if columns == 3 and values.shape[1] == 2:
+        return np.column_stack([values, np.zeros(len(values))])
+    if columns == 4 and values.shape[1] == 3:  # Circles given as x, y, radius
+        return np.column_stack([values[:, :2], np.zeros(len(values)), values[:, 2]])
+    if columns == 6 and values.shape[1] == 4:  # Lines given as x1, y1, x2, y2
+        zeros = np.zeros(len(values))
+        return np.column_stack([values[:, :2], zeros, values[:, 2:], zeros])
+    raise ValueError(f"Expected {columns} values per entity but found {values.shape[1]}")
+
+def _read_npz(path: str, chunk_size: int) -> Iterator[Chunk]:
+    with zipfile.ZipFile(path) as archive:
+        names = {os.path.splitext(name)[0] for name in archive.namelist()}
+        plan = []
+        for entity_type, name in (("point", "points"), ("line", "lines"), ("circle", "circles"), ("box", "boxes")):
+            if name in names:
+                plan.append((entity_type, name, None))
+        for entity_type, name, offsets_name in (("polyline", "polylines", "polyline_offsets"),
+                                                ("polyline3d", "polylines3d", "polyline3d_offsets")):
+            if name in names:
+                if offsets_name not in names:
+                    raise ValueError(f"{name} requires {offsets_name}")
+                plan.append((entity_type, name, offsets_name))
+
+        # Offsets and closed flags are one small value per polyline, so they are loaded whole
+        with np.load(path) as small:
+            offsets_by_name = {offsets_name: small[offsets_name].astype(np.int64) for _, _, offsets_name in plan if offsets_name}
+            closed_flags = small["polyline_closed"].astype(bool) if "polyline_closed" in names else None
+
+        total = 0
+        for _, name, offsets_name in plan:
+            if offsets_name:
+                total += len(offsets_by_name[offsets_name]) - 1
+            else:
+                stream = _NpyStream(archive, name)
+                total += stream.shape[0]
+                stream.close()
+        position = 0
+        for entity_type, name, offsets_name in plan:
+            stream = _NpyStream(archive, name)
+            try:
+                if offsets_name is None:
+                    remaining = stream.shape[0]
+                    while remaining:
+                        rows = min(chunk_size, remaining)
+                        values = _pad_columns(stream.read(rows), VALUES_PER_ENTITY[entity_type])
+                        remaining -= rows
+                        position += rows
+                        yield Chunk([Group(entity_type, values)], position, total)
+                else:
+                    offsets = offsets_by_name[offsets_name]
+                    closed = closed_flags if entity_type == "polyline" else None
+                    for start in range(0, len(offsets) - 1, chunk_size):
+                        end = min(start + chunk_size, len(offsets) - 1)
+                        vertices = _pad_columns(stream.read(int(offsets[end] - offsets[start])), 3)
+                        chunk_offsets = (offsets[start:end + 1] - offsets[start]).astype(np.int32)
+                        chunk_closed = closed[start:end].tolist() if closed is not None else None
+                        position += end - start
+                        yield Chunk([Group(entity_type, vertices, chunk_offsets, chunk_closed)], position, total)
+            finally:
+                stream.close()
+
+def read_geometry(path: str, file_format: str = None, default_type: str = "point", chunk_size: int = 1000) -> Iterator[Chunk]:
+    """Lazily read a geometry file in chunks of at most chunk_size entities.
+
+    file_format is one of "csv", "jsonl" or "npz", inferred from the file extension when omitted.
+    """
+    if default_type not in ENTITY_TYPES:
+        raise ValueError(f"default_type must be one of {', '.join(ENTITY_TYPES)}")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if file_format is None:
+        extension = os.path.splitext(path)[1].lower().lstrip(".")
+        file_format = {"ndjson": "jsonl", "json": "jsonl"}.get(extension, extension)
+
+    if file_format == "csv":
+        return _read_csv(path, default_type, chunk_size)
+    if file_format == "jsonl":
+        return _read_jsonl(path, default_type, chunk_size)
+    if file_format == "npz":
+        return _read_npz(path, chunk_size)
+    raise ValueError(f"Unsupported file format: {file_format}")
+
+def prefetch(iterable: Iterable[Any], depth: int) -> Iterator[Any]:
+    """Iterate in a background thread, keeping at most depth items ready ahead of the consumer.
+
+    Reading and packing the next chunks overlaps with AutoCAD creating the current
+    one, while memory stays bounded by depth chunks.
+    """
+    items: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize=max(1, depth))
+    stopped = threading.Event()
+
+    def put(kind: str, value: Any) -> bool:
+        # Gives up once the consumer has stopped, so the producer never blocks forever
+        while not stopped.is_set():
+            try:
+                items.put((kind, value), timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put("item", item):
+                    return
+            put("done", None)
+        except BaseException as e:
+            put("error", e)
+
+    producer = threading.Thread(target=produce, name="geometry-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            kind, value = items.get()
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        stopped.set()
+
+def merge_ranges(ranges: Iterable[List[int]]) -> List[List[int]]:
+    """Merge [first, last] handle ranges that touch or overlap."""
+    merged: List[List[int]] = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return merged
+
+# Columns of the extents array of every exported table
+EXTENT_COLUMNS = ("min_x", "min_y", "min_z", "max_x", "max_y", "max_z")
+
+class NpyColumnWriter:
+    """Appends rows to a .npy file whose header is rewritten with the final shape on close.
+
+    The header is padded to a fixed size up front, so rows can be streamed to disk
+    without knowing their number in advance.
+    """
+
+    HEADER_BYTES = 128
+
+    def __init__(self, path: str, dtype: Any, row_shape: Tuple[int, ...] = ()):
+        self.path = path
+        self.dtype = np.dtype(dtype).newbyteorder("<") if np.dtype(dtype).itemsize > 1 else np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.rows = 0
+        self._file = open(path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        header = repr({
+            "descr": np.lib.format.dtype_to_descr(self.dtype),
+            "fortran_order": False,
+            "shape": (self.rows,) + self.row_shape,
+        })
+        header = header.ljust(self.HEADER_BYTES - 10 - 1) + "\n"
+        if len(header) != self.HEADER_BYTES - 10:
+            raise ValueError("Array header does not fit")
+        self._file.write(b"\x93NUMPY\x01\x00" + np.uint16(len(header)).astype("<u2").tobytes() + header.encode("latin1"))
+
+    def append(self, values: Any):
+        values = np.ascontiguousarray(values, dtype=self.dtype).reshape((-1,) + self.row_shape)
+        self._file.write(values.tobytes())
+        self.rows += len(values)
+
+    def close(self):
+        self._file.seek(0)
+        self._write_header()
+        self._file.close()
+
+def decode_doubles(encoded: str, columns: int) -> np.ndarray:
+    """Decode base64 little-endian float64 values into rows of columns values."""
+    values = np.frombuffer(base64.b64decode(encoded), dtype="<f8")
+    return values.reshape(-1, columns) if columns else values.reshape(0, 0)
+
+class _ExportWriter:
+    """Base of the columnar export writers. Layer names are coded consistently across pages."""
+
+    format = None
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.layers: List[str] = []
+        self._layer_codes: Dict[str, int] = {}
+        self.rows: Dict[str, int] = {}
+
+    def write_page(self, page: Dict[str, Any]):
+        """Append one EXPORT_ENTITIES_PAGE result."""
+        page_layers = np.array([self._layer_code(name) for name in page.get("layerNames", [])], dtype=np.int32)
+        for type_name, table in page.get("tables", {}).items():
+            count = table["count"]
+            if not count:
+                continue
+            columns = table.get("columns", [])
+            handles = np.asarray(table["handles"], dtype=np.int64)
+            layers = page_layers[np.asarray(table["layers"], dtype=np.int64)]
+            # Color indices, 256 meaning by layer
+            colors = np.asarray(table["colors"] if "colors" in table else np.full(count, 256), dtype=np.int16)
+            extents = decode_doubles(table["extents"], len(EXTENT_COLUMNS))
+            geometry = decode_doubles(table["geometry"], len(columns)) if columns else np.empty((count, 0))
+            self._write_table(type_name, columns, handles, layers, colors, extents, geometry)
+            self.rows[type_name] = self.rows.get(type_name, 0) + count
+
+    def _layer_code(self, name: str) -> int:
+        code = self._layer_codes.get(name)
+        if code is None:
+            code = self._layer_codes[name] = len(self.layers)
+            self.layers.append(name)
+        return code
+
+    def _write_table(self, type_name, columns, handles, layers, colors, extents, geometry):
+        raise NotImplementedError
+
+    def close(self) -> Dict[str, Any]:
+        """Finish all files and describe them for the manifest."""
+        raise NotImplementedError
+
+class NpyExportWriter(_ExportWriter):
+    """Writes every table as a directory of .npy columns."""
+
+    format = "npy"
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self._tables: Dict[str, Dict[str, NpyColumnWriter]] = {}
+
+    def _open_table(self, type_name: str, columns: List[str]) -> Dict[str, NpyColumnWriter]:
+        table_directory = os.path.join(self.directory, type_name)
+        os.makedirs(table_directory, exist_ok=True)
+        writers = {
+            "handle": NpyColumnWriter(os.path.join(table_directory, "handle.npy"), np.int64),
+            "layer": NpyColumnWriter(os.path.join(table_directory, "layer.npy"), np.int32),
+            "color": NpyColumnWriter(os.path.join(table_directory, "color.npy"), np.int16),
+            "extents": NpyColumnWriter(os.path.join(table_directory, "extents.npy"), np.float64, (len(EXTENT_COLUMNS),)),
+        }
+        for column in columns:
+            writers[column] = NpyColumnWriter(os.path.join(table_directory, f"{column}.npy"), np.float64)
+        return writers
+
+    def _write_table(self, type_name, columns, handles, layers, colors, extents, geometry):
+        writers = self._tables.get(type_name)
+        if writers is None:
+            writers = self._tables[type_name] = self._open_table(type_name, columns)
+        writers["handle"].append(handles)
+        writers["layer"].append(layers)
+        writers["color"].append(colors)
+        writers["extents"].append(extents)
+        for index, column in enumerate(columns):
+            writers[column].append(geometry[:, index])
+
+    def close(self) -> Dict[str, Any]:
+        tables = {}
+        for type_name, writers in self._tables.items():
+            for writer in writers.values():
+                writer.close()
+            tables[type_name] = {
+                "rows": self.rows.get(type_name, 0),
+                "columns": {
+                    name: {
+                        "file": os.path.relpath(writer.path, self.directory),
+                        "dtype": writer.dtype.str,
+                        "shape": [writer.rows, *writer.row_shape],
+                    }
+                    for name, writer in writers.items()
+                },
+            }
+        return tables
+
+class ParquetExportWriter(_ExportWriter):
+    """Writes every table as a Parquet file, one row group per page. Requires pyarrow."""
+
+    format = "parquet"
+
+    def __init__(self, directory: str):
+        if pyarrow is None:
+            raise ImportError("Parquet export requires pyarrow")
+        super().__init__(directory)
+        self._writers: Dict[str, Any] = {}
+
+    def _write_table(self, type_name, columns, handles, layers, colors, extents, geometry):
+        arrays = {
+            "handle": pyarrow.array(handles),
+            "layer": pyarrow.array(np.array(self.layers, dtype=object)[layers], type=pyarrow.string()),
+            "color": pyarrow.array(colors),
+        }
+        for index, column in enumerate(EXTENT_COLUMNS):
+            arrays[column] = pyarrow.array(extents[:, index])
+        for index, column in enumerate(columns):
+            arrays[column] = pyarrow.array(geometry[:, index])
+        table = pyarrow.table(arrays)
+
+        writer = self._writers.get(type_name)
+        if writer is None:
+            writer = self._writers[type_name] = pyarrow.parquet.ParquetWriter(
+                os.path.join(self.directory, f"{type_name}.parquet"), table.schema)
+        writer.write_table(table)
+
+    def close(self) -> Dict[str, Any]:
+        tables = {}
+        for type_name, writer in self._writers.items():
+            writer.close()
+            tables[type_name] = {
+                "rows": self.rows.get(type_name, 0),
+                "file": f"{type_name}.parquet",
+            }
+        return tables
+
+def open_export_writer(directory: str, file_format: str = "auto") -> _ExportWriter:
+    """Create the writer for an export; "auto" picks Parquet when pyarrow is installed, .npy columns otherwise."""
+    if file_format == "auto":
+        file_format = "parquet" if pyarrow is not None else "npy"
+    if file_format == "npy":
+        return NpyExportWriter(directory)
+    if file_format == "parquet":
+        return ParquetExportWriter(directory)
+    raise ValueError(f"Unsupported export format: {file_format}")
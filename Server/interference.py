@@ -0,0 +1,65 @@
+"""
+Broad-phase interference detection on axis-aligned bounding boxes.
+
+Boxes are swept along the axis on which they are most spread out relative to
+their size, so that axis alone rules out the most pairs. After sorting by
+their lower bound on that axis, the boxes that can overlap box i are exactly
+the following boxes whose lower bound does not exceed box i's upper one,
+found for all boxes at once with searchsorted. Those candidate pairs are then
+pruned on all axes in one vectorised comparison. Work is done in blocks so
+the candidate arrays stay bounded even when many boxes share a range.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+# Candidate pairs generated per block
+_BLOCK_PAIRS = 1 << 20
+
+def overlapping_pairs(extents: np.ndarray, tolerance: float = 0.0, subset: Optional[np.ndarray] = None) -> np.ndarray:
+    """Index pairs (i, j), i < j, of boxes that overlap or come within tolerance of each other.
+
+    extents is an (n, 6) array of min_x, min_y, min_z, max_x, max_y, max_z rows; rows
+    containing NaN are ignored. If subset is a boolean mask, only pairs involving at least
+    one of its boxes are returned.
+    """
+    extents = np.asarray(extents, dtype=np.float64).reshape(-1, 6)
+    valid = np.flatnonzero(~np.isnan(extents).any(axis=1))
+    low = extents[valid, :3] - tolerance / 2
+    high = extents[valid, 3:] + tolerance / 2
+
+    if len(valid):
+        spread = (low + high).std(axis=0) / np.maximum((high - low).mean(axis=0), np.finfo(np.float64).tiny)
+        axis = int(np.argmax(spread))
+    else:
+        axis = 0
+
+    order = np.argsort(low[:, axis], kind="stable")
+    low, high, ids = low[order], high[order], valid[order]
+    # Boxes i + 1 .. ends[i] - 1 start before box i ends along the sweep axis
+    ends = np.searchsorted(low[:, axis], high[:, axis], side="right")
+    counts = np.maximum(ends - np.arange(len(ids)) - 1, 0)
+    in_subset = subset[ids] if subset is not None else None
+
+    pairs = []
+    start = 0
+    while start < len(ids):
+        # Grow the block until it holds about _BLOCK_PAIRS candidates
+        stop = start + max(1, int(np.searchsorted(np.cumsum(counts[start:]), _BLOCK_PAIRS)))
+        stop = min(stop, len(ids))
+        block_counts = counts[start:stop]
+        first = np.repeat(np.arange(start, stop), block_counts)
+        offsets = np.arange(len(first)) - np.repeat(np.cumsum(block_counts) - block_counts, block_counts)
+        second = first + 1 + offsets
+
+        overlap = np.all((low[second] <= high[first]) & (low[first] <= high[second]), axis=1)
+        if in_subset is not None:
+            overlap &= in_subset[first] | in_subset[second]
+        pairs.append(np.stack([ids[first[overlap]], ids[second[overlap]]], axis=1))
+        start = stop
+
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    result = np.concatenate(pairs)
+    return np.sort(result, axis=1)
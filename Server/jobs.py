@@ -0,0 +1,153 @@
+"""
+Background jobs for long-running tool calls.
+
+A job runs an ordinary tool call as a task on the server's event loop, so the
+call that submitted it returns at once. While a job runs, the modifying bridge
+commands its tool sends are submitted to the plugin as plugin jobs instead of
+being awaited on the connection (see AutoCADConnection.send_command). Their
+progress and the partial results the plugin reports for each finished item
+are polled over side connections and collected on the job, where job_status
+and await_job pick them up.
+
+A job belongs to the MCP client that submitted it; other clients can neither
+see it nor wait for or cancel it.
+"""
+
+import asyncio
+import contextvars
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Coroutine, Dict, List, Optional
+from mcp.types import TextContent
+
+from clients import current_client
+
+# Finished jobs remembered for job_status and await_job
+MAX_FINISHED_JOBS = 64
+
+def tool_content(result: Any) -> List[Any]:
+    """The content blocks of a FastMCP.call_tool result.
+
+    Depending on the mcp version, call_tool returns the content blocks, or a tuple
+    of them and the tool's structured result.
+    """
+    if isinstance(result, tuple) and len(result) == 2:
+        result = result[0]
+    if isinstance(result, dict):
+        return [TextContent(type="text", text=json.dumps(result, indent=2))]
+    return list(result)
+
+@dataclass
+class Job:
+    """A tool call running in the background."""
+    id: str
+    tool: str
+    arguments: Dict[str, Any]
+    client: str  # Id of the MCP client that submitted the job
+    status: str = "running"  # running, completed, failed or cancelled
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    command: Optional[str] = None  # Bridge command the job is waiting for
+    done: int = 0
+    total: Optional[int] = None
+    partial_results: List[Any] = field(default_factory=list)
+    result: Any = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def report(self, command: str, done: int, total: Optional[int], partial_results: List[Any]):
+        """Record the progress of a bridge command of the job. Called from the tool's worker thread."""
+        with self._lock:
+            self.command = command
+            self.done = done or 0
+            self.total = total
+            self.partial_results.extend(partial_results)
+
+    def describe(self, since: int = 0) -> Dict[str, Any]:
+        """Status of the job, with the partial results from index since onwards."""
+        with self._lock:
+            return {
+                "jobId": self.id,
+                "tool": self.tool,
+                "status": self.status,
+                "command": self.command,
+                "done": self.done,
+                "total": self.total,
+                "partialResults": self.partial_results[since:],
+                "nextIndex": len(self.partial_results),
+                "elapsed": (self.finished_at or time.time()) - self.submitted_at,
+                "error": self.error,
+            }
+
+_current_job: contextvars.ContextVar[Optional[Job]] = contextvars.ContextVar("autocad_job", default=None)
+
+def current_job() -> Optional[Job]:
+    """The job the running tool call belongs to, if any."""
+    return _current_job.get()
+
+class JobManager:
+    """The jobs submitted to the server."""
+
+    def __init__(self):
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, tool: str, arguments: Dict[str, Any], run: Callable[[], Coroutine[Any, Any, Any]]) -> Job:
+        """Start running run() as a job of tool. Must be called on the event loop."""
+        job = Job(uuid.uuid4().hex, tool, arguments, current_client().id)
+        with self._lock:
+            self._jobs[job.id] = job
+
+        async def execute():
+            _current_job.set(job)
+            try:
+                result = tool_content(await run())
+                status, error = "completed", None
+                # Tools report failures as an error message rather than raising
+                text = getattr(result[0], "text", None) if len(result) == 1 else None
+                if isinstance(text, str) and text.startswith("Error"):
+                    status, error = "failed", text
+            except asyncio.CancelledError:
+                self._finish(job, "cancelled", None, "Job was cancelled")
+                raise
+            except Exception as e:
+                self._finish(job, "failed", None, str(e))
+                return
+            self._finish(job, status, result, error)
+
+        # The task runs in a copy of the submitting call's context, so setting the job here stays local to it
+        job.task = asyncio.get_running_loop().create_task(execute())
+        return job
+
+    def _finish(self, job: Job, status: str, result: Any, error: Optional[str]):
+        with job._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+        with self._lock:
+            finished = [j.id for j in self._jobs.values() if j.finished_at is not None]
+            for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Job:
+        """A job of the current client. Jobs of other clients are reported as unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.client != current_client().id:
+            raise ValueError(f"Unknown job: {job_id}")
+        return job
+
+    def list(self) -> List[Job]:
+        """The jobs of the current client."""
+        client_id = current_client().id
+        with self._lock:
+            return [job for job in self._jobs.values() if job.client == client_id]
+
+# Jobs are shared by all connections
+jobs = JobManager()
@@ -0,0 +1,359 @@
+"""
+Compact columnar mirror of the entities of a drawing.
+
+The mirror keeps one row per model space entity in typed NumPy arrays: the
+handle, a type code, a layer code, the color index and the extents. Type and
+layer names are interned once in string tables, so a million entities take
+about 64 bytes each instead of the kilobytes of a decoded JSON dictionary.
+Queries are vectorised over the whole drawing and return lightweight row views.
+
+Mirrors are filled from EXPORT_ENTITIES_PAGE results and kept per connection
+and document. get_mirror brings a mirror up to date with the entities added,
+modified and erased since its revision (GET_CHANGES_SINCE), re-exporting only
+those. It reloads the whole mirror only when the plugin's change log no longer
+reaches back to the mirror's revision, or when layers, blocks or styles changed,
+which can change entities without them being modified.
+"""
+
+import logging
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import config
+from geometry_io import EXTENT_COLUMNS, decode_doubles
+from targets import current_target
+
+logger = logging.getLogger("AutoCADMCP")
+
+# Attempts at loading a mirror before settling for one the drawing changed under
+_LOAD_ATTEMPTS = 3
+
+class StringTable:
+    """Interned strings identified by small integer codes."""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._folded: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def code(self, name: str) -> int:
+        """The code of name, adding it to the table if needed."""
+        code = self._codes.get(name)
+        if code is None:
+            name = sys.intern(name)
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+            self._folded.setdefault(name.casefold(), []).append(code)
+        return code
+
+    def copy(self) -> "StringTable":
+        table = StringTable()
+        table.names = list(self.names)
+        table._codes = dict(self._codes)
+        table._folded = {name: list(codes) for name, codes in self._folded.items()}
+        return table
+
+    def codes_of(self, names: Iterable[str]) -> List[int]:
+        """Codes of the known names among names, compared case-insensitively like AutoCAD does."""
+        codes = []
+        for name in names:
+            codes.extend(self._folded.get(name.casefold(), ()))
+        return codes
+
+class EntityRow:
+    """A view of one row of a mirror. Values are read from the mirror's arrays on access."""
+
+    __slots__ = ("_mirror", "_index")
+
+    def __init__(self, mirror: "DrawingMirror", index: int):
+        self._mirror = mirror
+        self._index = index
+
+    @property
+    def handle(self) -> int:
+        return int(self._mirror._handles[self._index])
+
+    @property
+    def type(self) -> str:
+        return self._mirror.types.names[self._mirror._types[self._index]]
+
+    @property
+    def layer(self) -> str:
+        return self._mirror.layers.names[self._mirror._layers[self._index]]
+
+    @property
+    def color(self) -> int:
+        return int(self._mirror._colors[self._index])
+
+    @property
+    def extents(self) -> Optional[Tuple[float, ...]]:
+        """(min_x, min_y, min_z, max_x, max_y, max_z), or None for entities without extents."""
+        extents = self._mirror._extents[self._index]
+        return None if np.isnan(extents[0]) else tuple(float(v) for v in extents)
+
+    def to_dict(self) -> Dict[str, Any]:
+        extents = self.extents
+        return {
+            "handle": self.handle,
+            "type": self.type,
+            "layer": self.layer,
+            "color": self.color,
+            "extents": dict(zip(EXTENT_COLUMNS, extents)) if extents else None,
+        }
+
+    def __repr__(self) -> str:
+        return f"EntityRow(handle={self.handle}, type={self.type!r}, layer={self.layer!r})"
+
+class DrawingMirror:
+    """Columnar copy of the entities of one drawing at one revision."""
+
+    _INITIAL_CAPACITY = 1024
+
+    def __init__(self, revision: Optional[str] = None):
+        self.revision = revision
+        self.types = StringTable()
+        self.layers = StringTable()
+        self._size = 0
+        self._handles = np.empty(0, dtype=np.int64)
+        self._types = np.empty(0, dtype=np.uint16)
+        self._layers = np.empty(0, dtype=np.int32)
+        self._colors = np.empty(0, dtype=np.int16)
+        self._extents = np.empty((0, len(EXTENT_COLUMNS)), dtype=np.float64)
+        # Row indices sorted by handle, built on the first lookup after an append
+        self._order: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[EntityRow]:
+        return (EntityRow(self, index) for index in range(self._size))
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays, excluding unused capacity."""
+        per_row = sum(array.itemsize * (array.shape[1] if array.ndim > 1 else 1)
+                      for array in (self._handles, self._types, self._layers, self._colors, self._extents))
+        return self._size * per_row
+
+    # Columns, trimmed to the rows in use. They are views and must not be modified.
+
+    @property
+    def handles(self) -> np.ndarray:
+        return self._handles[:self._size]
+
+    @property
+    def type_codes(self) -> np.ndarray:
+        return self._types[:self._size]
+
+    @property
+    def layer_codes(self) -> np.ndarray:
+        return self._layers[:self._size]
+
+    @property
+    def colors(self) -> np.ndarray:
+        return self._colors[:self._size]
+
+    @property
+    def extents(self) -> np.ndarray:
+        return self._extents[:self._size]
+
+    def _reserve(self, rows: int):
+        needed = self._size + rows
+        capacity = len(self._handles)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, self._INITIAL_CAPACITY)
+        for name in ("_handles", "_types", "_layers", "_colors", "_extents"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def append_page(self, page: Dict[str, Any]):
+        """Append one EXPORT_ENTITIES_PAGE result."""
+        page_layers = np.array([self.layers.code(name) for name in page.get("layerNames", [])], dtype=np.int32)
+        for type_name, table in page.get("tables", {}).items():
+            count = table["count"]
+            if not count:
+                continue
+            self._reserve(count)
+            rows = slice(self._size, self._size + count)
+            self._handles[rows] = table["handles"]
+            self._types[rows] = self.types.code(type_name)
+            self._layers[rows] = page_layers[np.asarray(table["layers"], dtype=np.int64)]
+            self._colors[rows] = table["colors"] if "colors" in table else 256
+            self._extents[rows] = decode_doubles(table["extents"], len(EXTENT_COLUMNS))
+            self._size += count
+        self._order = None
+
+    def copy(self) -> "DrawingMirror":
+        """A copy that can be changed while this mirror is still in use."""
+        mirror = DrawingMirror(self.revision)
+        mirror.types = self.types.copy()
+        mirror.layers = self.layers.copy()
+        for name in ("_handles", "_types", "_layers", "_colors", "_extents"):
+            setattr(mirror, name, getattr(self, name)[:self._size].copy())
+        mirror._size = self._size
+        return mirror
+
+    def remove(self, handles: Sequence[int]):
+        """Remove the rows of handles, ignoring handles not in the mirror."""
+        indices = self.index_of(handles)
+        indices = indices[indices >= 0]
+        if not len(indices):
+            return
+        keep = np.ones(self._size, dtype=bool)
+        keep[indices] = False
+        size = int(np.count_nonzero(keep))
+        for name in ("_handles", "_types", "_layers", "_colors", "_extents"):
+            array = getattr(self, name)
+            array[:size] = array[:self._size][keep]
+        self._size = size
+        self._order = None
+
+    def index_of(self, handles: Sequence[int]) -> np.ndarray:
+        """Row indices of handles, -1 for handles not in the mirror."""
+        handles = np.asarray(handles, dtype=np.int64)
+        if not self._size:
+            return np.full(len(handles), -1, dtype=np.int64)
+        if self._order is None:
+            self._order = np.argsort(self.handles, kind="stable")
+        sorted_handles = self.handles[self._order]
+        positions = np.searchsorted(sorted_handles, handles).clip(max=self._size - 1)
+        return np.where(sorted_handles[positions] == handles, self._order[positions], -1)
+
+    def get(self, handle: int) -> Optional[EntityRow]:
+        """The row of an entity, or None if it is not in the mirror."""
+        index = int(self.index_of([handle])[0])
+        return EntityRow(self, index) if index >= 0 else None
+
+    def rows(self, indices: Iterable[int]) -> List[EntityRow]:
+        return [EntityRow(self, int(index)) for index in indices]
+
+    def mask(
+        self,
+        types: Iterable[str] = None,
+        layers: Iterable[str] = None,
+        colors: Iterable[int] = None,
+        within: Sequence[Sequence[float]] = None,
+        intersecting: Sequence[Sequence[float]] = None
+    ) -> np.ndarray:
+        """Boolean mask of the rows matching all given criteria.
+
+        types and layers are matched case-insensitively. within and intersecting are
+        boxes [[min_x, min_y(, min_z)], [max_x, max_y(, max_z)]] the extents of an
+        entity must lie in or overlap; entities without extents match neither.
+        """
+        mask = np.ones(self._size, dtype=bool)
+        if types is not None:
+            mask &= np.isin(self.type_codes, self.types.codes_of(types))
+        if layers is not None:
+            mask &= np.isin(self.layer_codes, self.layers.codes_of(layers))
+        if colors is not None:
+            mask &= np.isin(self.colors, list(colors))
+        if within is not None:
+            low, high = self._box(within)
+            dims = len(low)
+            mask &= np.all(self.extents[:, :dims] >= low, axis=1) & np.all(self.extents[:, 3:3 + dims] <= high, axis=1)
+        if intersecting is not None:
+            low, high = self._box(intersecting)
+            dims = len(low)
+            mask &= np.all(self.extents[:, :dims] <= high, axis=1) & np.all(self.extents[:, 3:3 + dims] >= low, axis=1)
+        return mask
+
+    @staticmethod
+    def _box(box: Sequence[Sequence[float]]) -> Tuple[np.ndarray, np.ndarray]:
+        low, high = (np.asarray(corner, dtype=np.float64) for corner in box)
+        if low.shape != high.shape or len(low) not in (2, 3):
+            raise ValueError("A box needs two corners of 2 or 3 coordinates")
+        return np.minimum(low, high), np.maximum(low, high)
+
+    def select(self, **criteria) -> List[EntityRow]:
+        """Rows matching the criteria of mask."""
+        return self.rows(np.flatnonzero(self.mask(**criteria)))
+
+    def count_by(self, column: str, mask: np.ndarray = None) -> Dict[str, int]:
+        """Number of rows per type or layer name, optionally among the rows of mask."""
+        table, codes = (self.types, self.type_codes) if column == "type" else (self.layers, self.layer_codes)
+        if mask is not None:
+            codes = codes[mask]
+        counts = np.bincount(codes, minlength=len(table))
+        return {table.names[code]: int(count) for code, count in enumerate(counts) if count}
+
+def _load(autocad, first_response: Dict[str, Any], page_size: int) -> DrawingMirror:
+    """Load a mirror, starting from the already fetched response with the first page."""
+    mirror = DrawingMirror()
+    revisions = {getattr(first_response, "revision_token", None)}
+    page = first_response.get("result", {})
+    while True:
+        mirror.append_page(page)
+        cursor = page.get("nextCursor")
+        if cursor is None:
+            break
+        response = autocad.send_command("EXPORT_ENTITIES_PAGE", {"cursor": cursor, "pageSize": page_size})
+        if not response.get("success", False):
+            raise Exception(response.get("error", "Unknown error"))
+        page = response.get("result", {})
+        revisions.add(getattr(response, "revision_token", None))
+    # A drawing that changed between pages may have been read with missing or repeated
+    # entities; such a mirror has no revision and is never reused
+    mirror.revision = revisions.pop() if len(revisions) == 1 else None
+    return mirror
+
+def _update(autocad, mirror: DrawingMirror, page_size: int) -> Optional[DrawingMirror]:
+    """The mirror with the changes since its revision applied, or None if it has to be reloaded instead.
+
+    Mirrors handed out may still be read by other calls, so changes are applied to a copy.
+    """
+    response = autocad.send_command("GET_CHANGES_SINCE", {"since": mirror.revision})
+    if not response.get("success", False):
+        raise Exception(response.get("error", "Unknown error"))
+    changes = response.get("result", {})
+    if changes.get("resync") or changes.get("definitionsChanged"):
+        return None
+    if changes.get("revision") == mirror.revision:
+        return mirror
+
+    mirror = mirror.copy()
+    mirror.remove([*changes.get("modified", ()), *changes.get("erased", ())])
+    # Entities changed again meanwhile are exported as they are now, and reappear in the next changes
+    refreshed = [*changes.get("added", ()), *changes.get("modified", ())]
+    for start in range(0, len(refreshed), page_size):
+        response = autocad.send_command("EXPORT_ENTITIES_PAGE", {"entityIds": refreshed[start:start + page_size]})
+        if not response.get("success", False):
+            raise Exception(response.get("error", "Unknown error"))
+        mirror.append_page(response.get("result", {}))
+    mirror.revision = changes.get("revision")
+    if refreshed or changes.get("erased"):
+        logger.debug(f"Updated mirror with {len(refreshed)} exported and {len(changes.get('erased', ()))} erased entities")
+    return mirror
+
+def get_mirror(autocad, page_size: int = None) -> DrawingMirror:
+    """The mirror of the targeted document on a connection, updated with the changes since it was last used."""
+    page_size = page_size or config.mirror_page_size
+    document = current_target().document
+    with autocad._mirror_lock:
+        cached = autocad.mirrors.get(document)
+        if cached is not None and cached.revision is not None:
+            updated = _update(autocad, cached, page_size)
+            if updated is not None:
+                autocad.mirrors[document] = updated
+                return updated
+
+        for attempt in range(_LOAD_ATTEMPTS):
+            response = autocad.send_command("EXPORT_ENTITIES_PAGE", {"cursor": 0, "pageSize": page_size})
+            if not response.get("success", False):
+                raise Exception(response.get("error", "Unknown error"))
+
+            cached = _load(autocad, response, page_size)
+            autocad.mirrors[document] = cached
+            if cached.revision is not None:
+                break
+            logger.info(f"Drawing changed while loading its mirror (attempt {attempt + 1})")
+        logger.info(f"Loaded mirror of {len(cached)} entities ({cached.nbytes / 1e6:.1f} MB)")
+        return cached
@@ -0,0 +1,219 @@
+"""
+Instance transform generation for entity patterns (arrays).
+
+Every pattern type is reduced to a stack of 4x4 homogeneous transforms of
+shape (n, 4, 4), one per copy, computed in a single vectorised pass. The
+stack is shipped to the plugin as one compact base64 blob of little-endian
+float64 values so that all copies can be cloned in one transaction.
+"""
+
+import base64
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def _vector(values: Sequence[float], name: str) -> np.ndarray:
+    """Convert an [x, y] or [x, y, z] list into a 3D float vector."""
+    if values is None:
+        raise ValueError(f"{name} is required for this pattern type")
+    vector = np.zeros(3, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim != 1 or not 2 <= values.size <= 3:
+        raise ValueError(f"{name} must be [x, y] or [x, y, z]")
+    vector[:values.size] = values
+    return vector
+
+
+def _translations(offsets: np.ndarray) -> np.ndarray:
+    """Build a stack of translation matrices from an (n, 3) array of offsets."""
+    transforms = np.tile(np.eye(4), (len(offsets), 1, 1))
+    transforms[:, :3, 3] = offsets
+    return transforms
+
+
+def _rotations(angles: np.ndarray, axis: np.ndarray, origin: np.ndarray) -> np.ndarray:
+    """Build a stack of rotation matrices about an axis through origin (Rodrigues)."""
+    norm = np.linalg.norm(axis)
+    if norm == 0:
+        raise ValueError("axis must be a non-zero vector")
+    k = axis / norm
+    cross = np.array([
+        [0.0, -k[2], k[1]],
+        [k[2], 0.0, -k[0]],
+        [-k[1], k[0], 0.0],
+    ])
+    cos = np.cos(angles)[:, None, None]
+    sin = np.sin(angles)[:, None, None]
+    rotation = cos * np.eye(3) + sin * cross + (1.0 - cos) * np.outer(k, k)
+
+    transforms = np.tile(np.eye(4), (len(angles), 1, 1))
+    transforms[:, :3, :3] = rotation
+    transforms[:, :3, 3] = origin - rotation @ origin
+    return transforms
+
+
+def _align_rotations(source: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Rotation matrices of shape (n, 3, 3) taking the unit vector source onto each target."""
+    v = np.cross(source, targets)
+    c = targets @ source
+    s = np.linalg.norm(v, axis=1)
+
+    k = np.zeros_like(v)
+    turning = s > 1e-12
+    k[turning] = v[turning] / s[turning, None]
+
+    # Antiparallel tangents have no unique axis; use any axis perpendicular to source
+    flipped = ~turning & (c < 0)
+    if flipped.any():
+        helper = np.array([0.0, 0.0, 1.0]) if abs(source[2]) < 0.9 else np.array([1.0, 0.0, 0.0])
+        perpendicular = np.cross(source, helper)
+        k[flipped] = perpendicular / np.linalg.norm(perpendicular)
+        s[flipped] = 0.0
+
+    cross = np.zeros((len(k), 3, 3))
+    cross[:, 0, 1], cross[:, 0, 2] = -k[:, 2], k[:, 1]
+    cross[:, 1, 0], cross[:, 1, 2] = k[:, 2], -k[:, 0]
+    cross[:, 2, 0], cross[:, 2, 1] = -k[:, 1], k[:, 0]
+    kk = k[:, :, None] * k[:, None, :]
+
+    c = c[:, None, None]
+    s = s[:, None, None]
+    return c * np.eye(3) + s * cross + (1.0 - c) * kk
+
+
+def linear_transforms(count: int, delta: Sequence[float]) -> np.ndarray:
+    """Copies 1..count-1 each offset by a multiple of delta."""
+    steps = np.arange(1, count, dtype=np.float64)
+    return _translations(steps[:, None] * _vector(delta, "delta"))
+
+
+def radial_transforms(count: int, angle: float, axis: Sequence[float], origin: Sequence[float]) -> np.ndarray:
+    """Copies 1..count-1 each rotated by a multiple of angle about axis through origin."""
+    if angle is None:
+        raise ValueError("angle is required for this pattern type")
+    angles = np.arange(1, count, dtype=np.float64) * angle
+    return _rotations(angles, _vector(axis, "axis"), _vector(origin, "origin"))
+
+
+def rectangular_transforms(
+    rows: int,
+    columns: int,
+    levels: int,
+    row_spacing: float = 0.0,
+    column_spacing: float = 0.0,
+    level_spacing: float = 0.0,
+) -> np.ndarray:
+    """A rows x columns x levels grid along the y, x and z axes, excluding the original."""
+    if min(rows, columns, levels) < 1:
+        raise ValueError("rows, columns and levels must all be at least 1")
+    r, c, l = np.meshgrid(
+        np.arange(rows, dtype=np.float64),
+        np.arange(columns, dtype=np.float64),
+        np.arange(levels, dtype=np.float64),
+        indexing="ij",
+    )
+    offsets = np.stack([
+        c.ravel() * column_spacing,
+        r.ravel() * row_spacing,
+        l.ravel() * level_spacing,
+    ], axis=1)
+    # The first cell is the original entity
+    return _translations(offsets[1:])
+
+
+def polar_transforms(
+    count: int,
+    origin: Sequence[float],
+    axis: Optional[Sequence[float]] = None,
+    spacing_angle: Optional[float] = None,
+    fill_angle: Optional[float] = None,
+    rotate_items: bool = True,
+    base_point: Optional[Sequence[float]] = None,
+) -> np.ndarray:
+    """Copies 1..count-1 distributed around origin.
+
+    Either spacing_angle (angle between neighbouring items) or fill_angle (angle
+    covered by the whole array) must be given. A full-circle fill angle spreads
+    the items evenly without overlapping the first and last. When rotate_items
+    is false the copies are only translated, following base_point around the circle.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    if spacing_angle is None:
+        if fill_angle is None:
+            raise ValueError("spacing_angle or fill_angle is required for polar patterns")
+        full_circle = np.isclose(abs(fill_angle), 2 * np.pi)
+        divisions = count if full_circle else max(count - 1, 1)
+        spacing_angle = fill_angle / divisions
+
+    axis = _vector(axis if axis is not None else [0, 0, 1], "axis")
+    origin = _vector(origin, "origin")
+    angles = np.arange(1, count, dtype=np.float64) * spacing_angle
+    transforms = _rotations(angles, axis, origin)
+
+    if not rotate_items:
+        base = _vector(base_point, "base_point")
+        moved = transforms[:, :3, :3] @ base + transforms[:, :3, 3]
+        transforms = _translations(moved - base)
+
+    return transforms
+
+
+def path_transforms(
+    path_points: Sequence[Sequence[float]],
+    count: int,
+    spacing: Optional[float] = None,
+    base_point: Optional[Sequence[float]] = None,
+    align_items: bool = True,
+) -> np.ndarray:
+    """Copies 1..count-1 placed along a polyline path.
+
+    The original entity is assumed to sit at base_point (default: the first path
+    point). Copies are spaced by arc length, evenly over the whole path unless
+    spacing is given. With align_items, each copy is rotated so that the path
+    tangent at the start maps onto the tangent at its position.
+    """
+    points = np.asarray(path_points, dtype=np.float64)
+    if points.ndim != 2 or len(points) < 2 or not 2 <= points.shape[1] <= 3:
+        raise ValueError("path_points must contain at least two [x, y] or [x, y, z] points")
+    if points.shape[1] == 2:
+        points = np.hstack([points, np.zeros((len(points), 1))])
+
+    segments = np.diff(points, axis=0)
+    lengths = np.linalg.norm(segments, axis=1)
+    keep = lengths > 0
+    segments, lengths = segments[keep], lengths[keep]
+    points = np.vstack([points[:1], points[1:][keep]])
+    if len(lengths) == 0:
+        raise ValueError("path has zero length")
+    cumulative = np.concatenate([[0.0], np.cumsum(lengths)])
+    total = cumulative[-1]
+
+    if spacing is None:
+        spacing = total / max(count - 1, 1)
+    stations = np.arange(1, count, dtype=np.float64) * spacing
+    if stations.size and stations[-1] > total * (1 + 1e-9):
+        raise ValueError(f"{count} items at spacing {spacing} do not fit on a path of length {total}")
+    stations = np.minimum(stations, total)
+
+    index = np.clip(np.searchsorted(cumulative, stations, side="right") - 1, 0, len(segments) - 1)
+    fraction = (stations - cumulative[index]) / lengths[index]
+    positions = points[index] + fraction[:, None] * segments[index]
+
+    base = _vector(base_point, "base_point") if base_point is not None else points[0]
+    if not align_items:
+        return _translations(positions - base)
+
+    tangents = segments / lengths[:, None]
+    rotation = _align_rotations(tangents[0], tangents[index])
+    transforms = np.tile(np.eye(4), (len(positions), 1, 1))
+    transforms[:, :3, :3] = rotation
+    transforms[:, :3, 3] = positions - rotation @ base
+    return transforms
+
+
+def encode_transforms(transforms: np.ndarray) -> str:
+    """Pack an (n, 4, 4) transform stack into base64 little-endian row-major float64."""
+    packed = np.ascontiguousarray(transforms, dtype="<f8")
+    return base64.b64encode(packed.tobytes()).decode("ascii")
@@ -0,0 +1,148 @@
+"""
+Content-addressed cache for rendered views.
+
+Images are keyed by a hash of the normalised view parameters together with the
+plugin's render token, which covers the drawing revision and the viewport's
+lighting and background, so a repeated capture of an unchanged drawing can be
+answered without rendering. Entries live in a bounded in-memory tier backed by
+a bounded on-disk tier, both evicted in least-recently-used order.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from config import config
+
+logger = logging.getLogger("AutoCADMCP")
+
+# Decimal places kept when normalising view parameters, so float noise does not defeat the cache
+_PRECISION = 6
+
+def _round(values):
+    return [round(float(v), _PRECISION) + 0.0 for v in values]
+
+def make_render_key(parameters: Dict[str, Any], revision: str) -> str:
+    """Build the cache key for a CAPTURE_VIEW request at a given render token."""
+    direction = [float(v) for v in parameters["viewDirection"]]
+    length = math.sqrt(sum(v * v for v in direction)) or 1.0
+    perspective = bool(parameters["perspectiveEnabled"])
+
+    normalised = {
+        "target": _round(list(parameters["target"]) + [0.0] * (3 - len(parameters["target"]))),
+        "viewHeight": round(float(parameters["viewHeight"]), _PRECISION),
+        "viewDirection": _round(v / length for v in direction),
+        "perspectiveEnabled": perspective,
+        "lensLength": round(float(parameters["lensLength"]), _PRECISION) if perspective else None,
+        "revision": revision,
+    }
+    encoded = json.dumps(normalised, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class RenderCache:
+    """Two-tier (memory and disk) LRU cache of rendered PNG images."""
+
+    def __init__(self, directory: str, memory_limit: int, disk_limit: int):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self._load_disk_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def _load_disk_index(self):
+        """Rebuild the disk LRU order from file modification times."""
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".png"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_size += size
+        self._evict_disk()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached image for key, or None."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+
+            if key not in self._disk:
+                return None
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+                os.utime(self._path(key))
+            except OSError as e:
+                logger.warning(f"Dropping unreadable render cache entry {key}: {str(e)}")
+                self._disk_size -= self._disk.pop(key)
+                return None
+
+            self._disk.move_to_end(key)
+            self._store_memory(key, data)
+            return data
+
+    def put(self, key: str, data: bytes):
+        """Store an image in both tiers."""
+        with self._lock:
+            self._store_memory(key, data)
+            if key in self._disk or len(data) > self.disk_limit:
+                return
+            try:
+                with open(self._path(key), "wb") as f:
+                    f.write(data)
+            except OSError as e:
+                logger.warning(f"Could not write render cache entry {key}: {str(e)}")
+                return
+            self._disk[key] = len(data)
+            self._disk_size += len(data)
+            self._evict_disk()
+
+    def _store_memory(self, key: str, data: bytes):
+        if len(data) > self.memory_limit:
+            return
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _evict_disk(self):
+        while self._disk_size > self.disk_limit:
+            key, size = self._disk.popitem(last=False)
+            self._disk_size -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+# Global render cache
+_render_cache = None
+
+def get_render_cache() -> RenderCache:
+    """Retrieve or create the shared render cache."""
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = RenderCache(
+            config.render_cache_dir,
+            config.render_cache_memory_bytes,
+            config.render_cache_disk_bytes
+        )
+    return _render_cache
@@ -0,0 +1,146 @@
+"""
+Recent bridge requests, and cheap logging of them.
+
+Every command sent to a bridge is recorded in a bounded ring buffer with its
+timing, outcome and a summary of its parameters, which the get_diagnostics
+tool dumps on demand. Summaries describe the shape of a payload rather than
+formatting it: long strings and lists are reduced to their length, so
+recording a bulk geometry call costs about as much as recording a ping.
+
+Per-command log lines are formatted lazily, only if their level is enabled,
+and sampled: of every command type, the first and then every
+log_sample_every-th command is logged. Failures are always logged.
+"""
+
+import itertools
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+from config import config
+
+# Items of a list shown before it is summarised by its length
+_LIST_ITEMS = 8
+
+def summarize(value: Any, limit: int = None, depth: int = 2) -> Any:
+    """A small, JSON-serialisable description of value, truncating long strings and lists."""
+    limit = limit or config.log_payload_limit
+    if isinstance(value, str):
+        return value if len(value) <= limit else f"{value[:limit]}... ({len(value)} chars)"
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, dict):
+        if depth <= 0:
+            return f"<{len(value)} keys>"
+        return {key: summarize(item, limit, depth - 1) for key, item in itertools.islice(value.items(), _LIST_ITEMS * 4)}
+    if isinstance(value, (list, tuple)):
+        if depth <= 0 or len(value) > _LIST_ITEMS:
+            return f"<{len(value)} items>"
+        return [summarize(item, limit, depth - 1) for item in value]
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return summarize(str(value), limit, depth)
+
+class Lazy:
+    """Defers building a log message argument until the record is formatted."""
+
+    __slots__ = ("_build",)
+
+    def __init__(self, build: Callable[[], Any]):
+        self._build = build
+
+    def __str__(self) -> str:
+        return str(self._build())
+
+@dataclass
+class RequestRecord:
+    """One command sent to a bridge."""
+    command_id: str
+    command_type: str
+    endpoint: str
+    document: Optional[str]
+    parameters: Any  # Summary of the parameters, see summarize
+    started_at: float
+    duration: float
+    outcome: str  # ok, error, timeout, connection or cancelled
+    error: Optional[str] = None
+    response_bytes: int = 0
+    queue_wait_ms: Optional[float] = None  # Reported by the bridge
+    client: Optional[str] = None  # Id of the MCP client the command was sent for
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "commandId": self.command_id,
+            "command": self.command_type,
+            "endpoint": self.endpoint,
+            "document": self.document,
+            "parameters": self.parameters,
+            "startedAt": self.started_at,
+            "durationMs": round(self.duration * 1000, 1),
+            "outcome": self.outcome,
+            "error": self.error,
+            "responseBytes": self.response_bytes,
+            "queueWaitMs": self.queue_wait_ms,
+            "client": self.client,
+        }
+
+class RequestLog:
+    """Ring buffer of the most recent requests, and the sampling of their log lines."""
+
+    def __init__(self, size: int = None):
+        self._records: Deque[RequestRecord] = deque(maxlen=size or config.request_log_size)
+        self._seen: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def sampled(self, command_type: str) -> bool:
+        """Whether the log line of this occurrence of command_type should be emitted."""
+        with self._lock:
+            count = self._seen[command_type]
+            self._seen[command_type] += 1
+        return count % max(1, config.log_sample_every) == 0
+
+    def record(self, record: RequestRecord):
+        with self._lock:
+            self._records.append(record)
+
+    def dump(self, limit: int = 100, command_type: str = None, failures_only: bool = False) -> List[Dict[str, Any]]:
+        """The most recent requests, newest first."""
+        with self._lock:
+            records = list(self._records)
+        selected = []
+        for record in reversed(records):
+            if command_type is not None and record.command_type != command_type:
+                continue
+            if failures_only and record.outcome == "ok":
+                continue
+            selected.append(record.describe())
+            if len(selected) >= limit:
+                break
+        return selected
+
+    def statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Count, failures and latencies per command type over the requests in the buffer."""
+        with self._lock:
+            records = list(self._records)
+        by_type: Dict[str, List[RequestRecord]] = {}
+        for record in records:
+            by_type.setdefault(record.command_type, []).append(record)
+
+        statistics = {}
+        for command_type, group in sorted(by_type.items()):
+            durations = sorted(record.duration for record in group)
+            statistics[command_type] = {
+                "count": len(group),
+                "failures": sum(record.outcome != "ok" for record in group),
+                "meanMs": round(sum(durations) / len(durations) * 1000, 1),
+                "p95Ms": round(durations[min(len(durations) - 1, int(0.95 * len(durations)))] * 1000, 1),
+                "maxMs": round(durations[-1] * 1000, 1),
+            }
+        return statistics
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+# Requests of all connections
+request_log = RequestLog()
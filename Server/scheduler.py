@@ -0,0 +1,210 @@
+"""
+Priority-aware scheduling of bridge commands.
+
+Commands are classified as cheap reads, edits, or heavy modelling/rendering
+work. Callers sharing a bridge connection take turns through a scheduler that
+grants one of the connection's sockets to the most urgent waiting command,
+while keeping commands of the same session in FIFO order. Waiting commands
+slowly gain priority so heavy work is never starved indefinitely.
+
+When several MCP clients share the connection, the sockets are shared between
+them by weighted fair queuing: every client accrues virtual time for the time
+its commands hold a socket, divided by its weight, and the next command is
+taken from the waiting client with the least virtual time. A client also never
+holds more than client_max_commands sockets at once, so however many commands
+one client queues, the others still get through.
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, Hashable, Iterator, List, Optional
+from config import config
+from cancellation import CommandCancelledError, current_scope
+from clients import Client, current_client
+
+class CommandClass(IntEnum):
+    """Scheduling class of a bridge command. Lower values are dispatched first."""
+    READ = 0
+    EDIT = 1
+    HEAVY = 2
+
+# Commands that never modify the drawing
+READ_COMMANDS = {
+    "ping",
+    "GET_ALL_ENTITIES",
+    "GET_SELECTED_ENTITIES",
+    "GET_ENTITY_PROPERTIES",
+    "GET_CURRENT_WORKSPACE",
+    "GET_RENDER_JOB",
+    "GET_RENDER_TOKEN",
+    "CANCEL",
+    "GET_DOCUMENTS",
+    "EXPORT_ENTITIES_PAGE",
+    "GET_CHANGES_SINCE",
+    "SELECT_ENTITIES",
+    "MEASURE_ENTITIES",
+    "GET_SNAP_POINTS",
+    "SUBMIT_JOB",
+    "GET_JOB",
+}
+
+# Solid modelling, bulk and render commands that can keep AutoCAD busy for a long time
+HEAVY_COMMANDS = {
+    "ARRAY_ENTITIES",
+    "EXPLODE_ENTITIES",
+    "EXTRUDE_REGIONS",
+    "COMBINE_REGIONS",
+    "COMBINE_SOLIDS",
+    "SWEEP_SOLID",
+    "CAPTURE_VIEW",
+    "BULK_CREATE",
+    "CHECK_INTERFERENCE",
+}
+
+def classify(command_type: str) -> CommandClass:
+    """Return the scheduling class of a bridge command."""
+    if command_type in READ_COMMANDS:
+        return CommandClass.READ
+    if command_type in HEAVY_COMMANDS:
+        return CommandClass.HEAVY
+    return CommandClass.EDIT
+
+@dataclass
+class _Ticket:
+    command_type: str
+    command_class: CommandClass
+    sequence: int
+    session: Optional[Hashable]
+    client: Client
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+class CommandScheduler:
+    """Grants the sockets of a bridge connection to one command each, in priority order and fairly between clients."""
+
+    def __init__(self, aging_seconds: float = None, capacity: int = None):
+        self.aging_seconds = aging_seconds if aging_seconds is not None else config.scheduler_aging_seconds
+        self.capacity = max(1, capacity if capacity is not None else config.bridge_pool_size)
+        self._condition = threading.Condition()
+        self._waiting: List[_Ticket] = []
+        self._running: List[_Ticket] = []
+        self._sequence = itertools.count()
+        # Virtual time of every client with waiting or running commands, and of those that had some
+        # since the connection was last idle
+        self._virtual: Dict[str, float] = {}
+
+    @property
+    def depth(self) -> int:
+        """Number of commands waiting for the connection."""
+        with self._condition:
+            return len(self._waiting)
+
+    def waiting(self, command_class: CommandClass) -> int:
+        """Number of commands of a class waiting for the connection."""
+        with self._condition:
+            return sum(ticket.command_class == command_class for ticket in self._waiting)
+
+    @property
+    def load(self) -> int:
+        """Number of commands waiting for or using the connection."""
+        with self._condition:
+            return len(self._waiting) + len(self._running)
+
+    def client_load(self) -> Dict[str, Dict[str, float]]:
+        """Waiting and running commands and the virtual time of every active client."""
+        with self._condition:
+            load = {}
+            for key, tickets in (("waiting", self._waiting), ("running", self._running)):
+                for ticket in tickets:
+                    entry = load.setdefault(ticket.client.id, {"waiting": 0, "running": 0})
+                    entry[key] += 1
+            for client_id, entry in load.items():
+                entry["virtualTime"] = round(self._virtual.get(client_id, 0.0), 3)
+            return load
+
+    def _effective_priority(self, ticket: _Ticket, now: float) -> float:
+        age = now - ticket.enqueued_at
+        return ticket.command_class - (age / self.aging_seconds if self.aging_seconds > 0 else 0)
+
+    def _next(self) -> Optional[_Ticket]:
+        """The ticket to run next, if a socket is free and any waiting ticket may run.
+
+        Of every session only the oldest waiting ticket may run, and only while no other
+        command of the session is running. Of the clients with such tickets and a socket
+        to spare, the one with the least virtual time goes first, with its most urgent ticket.
+        """
+        if len(self._running) >= self.capacity:
+            return None
+        running_sessions = {t.session for t in self._running if t.session is not None}
+        running_per_client: Dict[str, int] = {}
+        for ticket in self._running:
+            running_per_client[ticket.client.id] = running_per_client.get(ticket.client.id, 0) + 1
+
+        heads = {}
+        for ticket in self._waiting:
+            lane = ticket.session if ticket.session is not None else ("ticket", ticket.sequence)
+            if lane not in heads or ticket.sequence < heads[lane].sequence:
+                heads[lane] = ticket
+        limit = max(1, config.client_max_commands)
+        eligible = [t for t in heads.values()
+                    if t.session not in running_sessions and running_per_client.get(t.client.id, 0) < limit]
+        if not eligible:
+            return None
+
+        client_id = min(eligible, key=lambda t: (self._virtual.get(t.client.id, 0.0), t.sequence)).client.id
+        now = time.monotonic()
+        return min((t for t in eligible if t.client.id == client_id),
+                   key=lambda t: (self._effective_priority(t, now), t.sequence))
+
+    def _activate(self, client: Client):
+        """Let a client that had nothing waiting or running start at the virtual time of the active clients,
+        so it neither makes up for the time it was idle nor inherits debt from earlier bursts beyond that."""
+        active = {t.client.id for t in self._waiting} | {t.client.id for t in self._running}
+        if client.id in active:
+            return
+        floor = min((self._virtual.get(client_id, 0.0) for client_id in active), default=None)
+        if floor is None:
+            # The connection was idle, so nobody is owed anything
+            self._virtual.clear()
+            floor = 0.0
+        self._virtual[client.id] = max(self._virtual.get(client.id, 0.0), floor)
+
+    def wake(self):
+        """Wake all waiting callers so they can re-check whether they were cancelled."""
+        with self._condition:
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, command_type: str, session: Hashable = None) -> Iterator[CommandClass]:
+        """Wait until command_type may use a socket of the connection, and hold it for the duration of the block."""
+        client = current_client()
+        ticket = _Ticket(command_type, classify(command_type), next(self._sequence), session, client)
+        scope = current_scope()
+        with self._condition:
+            self._activate(client)
+            self._waiting.append(ticket)
+            try:
+                while self._next() is not ticket:
+                    # Commands of a cancelled tool call give up their place in the queue
+                    if scope is not None and scope.cancelled:
+                        raise CommandCancelledError(f"{command_type} was cancelled before it was sent")
+                    self._condition.wait()
+            except BaseException:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+                raise
+            self._waiting.remove(ticket)
+            self._running.append(ticket)
+            # Further sockets may be free for other clients
+            self._condition.notify_all()
+        started = time.monotonic()
+        try:
+            yield ticket.command_class
+        finally:
+            with self._condition:
+                self._running.remove(ticket)
+                self._virtual[client.id] = self._virtual.get(client.id, 0.0) + (time.monotonic() - started) / max(client.weight, 1e-6)
+                self._condition.notify_all()
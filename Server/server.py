@@ -1,12 +1,18 @@
 from mcp.server.fastmcp import FastMCP, Context, Image
+import anyio
+import inspect
 import logging
 import textwrap
 from dataclasses import dataclass
 from contextlib import asynccontextmanager
 from typing import AsyncIterator, Dict, Any, List
 from config import config
+from cancellation import cancellable
 from tools import register_all_tools
-from autocad_connection import get_autocad_connection, AutoCADConnection
+from targets import routed as _routed
+from clients import identified as _identified
+from autocad_connection import get_registry
+from warmup import warmup
 
 # Configure logging using settings from config
 logging.basicConfig(
@@ -15,33 +21,70 @@ logging.basicConfig(
 )
 logger = logging.getLogger("AutoCADMCP")
 
-# Global connection state
-_autocad_connection: AutoCADConnection = None
-
 @asynccontextmanager
-async def server_lifespan(server: FastMCP) -> AsyncIterator[Dict[str, Any]]:
-    """Handle server startup and shutdown."""
-    global _autocad_connection
+async def autocad_lifetime() -> AsyncIterator[None]:
+    """Connect to AutoCAD for the lifetime of the server, and disconnect at shutdown."""
     logger.info("AutoCADMCP server starting up")
+    # Connecting must not hold up the server, AutoCAD may not be running yet
+    warmup.start()
     try:
-        _autocad_connection = get_autocad_connection()
-        logger.info("Connected to AutoCAD on startup")
-    except Exception as e:
-        logger.warning(f"Could not connect to AutoCAD on startup: {str(e)}")
-        _autocad_connection = None
-    try:
-        yield {}
+        yield
     finally:
-        if _autocad_connection:
-            _autocad_connection.disconnect()
-            _autocad_connection = None
+        warmup.stop()
+        get_registry().disconnect_all()
         logger.info("AutoCADMCP server shut down")
 
+# Set while serving many clients over HTTP, see serve_http
+_shared = False
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP) -> AsyncIterator[Dict[str, Any]]:
+    """Handle server startup and shutdown.
+
+    Over the HTTP transports the lifespan runs for every client session, and the
+    server starts up once around all of them instead.
+    """
+    if _shared:
+        yield {}
+    else:
+        async with autocad_lifetime():
+            yield {}
+
+class AutoCADMCP(FastMCP):
+    """FastMCP server whose synchronous tools run in worker threads.
+
+    Tools block while AutoCAD executes their commands. Running them off the
+    event loop keeps the server responsive, and lets a cancelled request
+    withdraw its commands that are still queued in AutoCAD.
+
+    Unless registered with routed=False, every tool also accepts a target
+    argument selecting the AutoCAD instance and document it runs on.
+
+    Calls are attributed to the MCP client that made them, which shares the
+    bridges fairly with other clients when serving over HTTP; calls of
+    synchronous tools count towards the client's limit of running calls.
+    """
+
+    def tool(self, *args, routed: bool = True, **kwargs):
+        decorator = super().tool(*args, **kwargs)
+        route = routed
+
+        def register(fn):
+            limited = not inspect.iscoroutinefunction(fn)
+            if limited:
+                fn = cancellable(fn)
+            if route:
+                fn = _routed(fn, get_registry().place)
+            return decorator(_identified(fn, self.get_context, limited))
+        return register
+
 # Initialize MCP server
-mcp = FastMCP(
+mcp = AutoCADMCP(
     "AutoCADMCP",
     description="AutoCAD Editor integration via Model Context Protocol",
-    lifespan=server_lifespan
+    lifespan=server_lifespan,
+    host=config.mcp_host,
+    port=config.mcp_port
 )
 
 # Register all tools
@@ -72,6 +115,22 @@ async def autocad_prompt(prompt: str) -> str:
         - An error message if the operation fails
     """)
 
+async def serve_http(transport: str):
+    """Serve many MCP clients from one process over streamable HTTP or SSE, sharing the bridge connections."""
+    global _shared
+    _shared = True
+    async with autocad_lifetime():
+        logger.info(f"Serving MCP clients over {transport} at {config.mcp_host}:{config.mcp_port}")
+        if transport == "sse":
+            await mcp.run_sse_async()
+        else:
+            await mcp.run_streamable_http_async()
+
 # Run the server
 if __name__ == "__main__":
-    mcp.run(transport='stdio')
\ No newline at end of file
+    if config.transport == "stdio":
+        mcp.run(transport='stdio')
+    elif config.transport in ("streamable-http", "sse"):
+        anyio.run(serve_http, config.transport)
+    else:
+        raise SystemExit(f"Unknown transport: {config.transport}")
\ No newline at end of file
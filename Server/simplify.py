@@ -0,0 +1,206 @@
+"""
+Vertex reduction for dense point sequences.
+
+Polylines are simplified with Ramer-Douglas-Peucker, which keeps the point
+farthest from the chord of each span until every dropped point lies within
+the tolerance, or with Visvalingam-Whyatt, which repeatedly drops the point
+forming the flattest triangle with its neighbours. Distances of a whole span
+are computed in one vectorised pass.
+
+Spline fit points are reduced by refinement: starting from the end points,
+the worst-fitting sample of every span of the cubic spline through the kept
+points is kept as well, until all samples lie within the tolerance. The
+reduced fit points are a subset of the input, so the spline still passes
+through the points it keeps.
+
+Every reduction reports the maximum deviation of the input points from the
+result it achieved.
+"""
+
+import heapq
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+class Reduction(NamedTuple):
+    """Reduced points, and the maximum distance of an input point from the reduced curve."""
+    points: np.ndarray
+    max_deviation: float
+
+def _as_points(points: Sequence[Sequence[float]]) -> np.ndarray:
+    array = np.asarray(points, dtype=np.float64)
+    if array.ndim != 2 or array.shape[1] not in (2, 3):
+        raise ValueError("Points must be a list of [x, y] or [x, y, z] coordinates")
+    return array
+
+def _segment_distances(points: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Distances of points from the segments start-end (one segment per point, or one for all)."""
+    direction = end - start
+    length2 = np.einsum("...i,...i->...", direction, direction)
+    t = np.einsum("...i,...i->...", points - start, direction) / np.where(length2 > 0, length2, 1.0)
+    nearest = start + np.clip(t, 0.0, 1.0)[..., None] * direction
+    return np.linalg.norm(points - nearest, axis=-1)
+
+def polyline_deviation(points: np.ndarray, kept: np.ndarray) -> float:
+    """Maximum distance of points from the polyline through points[kept], kept being sorted indices."""
+    if len(points) < 3:
+        return 0.0
+    span = np.clip(np.searchsorted(kept, np.arange(len(points)), side="right") - 1, 0, len(kept) - 2)
+    distances = _segment_distances(points, points[kept[span]], points[kept[span + 1]])
+    return float(distances.max())
+
+def _rdp(points: np.ndarray, tolerance: float) -> np.ndarray:
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    spans = [(0, len(points) - 1)]
+    while spans:
+        start, end = spans.pop()
+        if end - start < 2:
+            continue
+        distances = _segment_distances(points[start + 1:end], points[start], points[end])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            spans.append((start, split))
+            spans.append((split, end))
+    return np.flatnonzero(keep)
+
+def _visvalingam(points: np.ndarray, tolerance: float) -> np.ndarray:
+    # A point is dropped while its height over the chord of its neighbours is within tolerance
+    count = len(points)
+    previous = np.arange(-1, count - 1)
+    following = np.arange(1, count + 1)
+    alive = np.ones(count, dtype=bool)
+
+    def height(i: int) -> float:
+        return float(_segment_distances(points[i], points[previous[i]], points[following[i]]))
+
+    interior = np.arange(1, count - 1)
+    heights = _segment_distances(points[interior], points[interior - 1], points[interior + 1])
+    queue = list(zip(heights.tolist(), interior.tolist()))
+    heapq.heapify(queue)
+    current = {i: h for h, i in queue}
+    while queue:
+        value, i = heapq.heappop(queue)
+        if not alive[i] or current.get(i) != value:
+            continue
+        if value > tolerance:
+            break
+        alive[i] = False
+        before, after = previous[i], following[i]
+        following[before], previous[after] = after, before
+        for neighbour in (before, after):
+            if 0 < neighbour < count - 1:
+                # Heights never decrease below the one just removed, as in effective area ordering
+                current[neighbour] = max(height(neighbour), value)
+                heapq.heappush(queue, (current[neighbour], int(neighbour)))
+    return np.flatnonzero(alive)
+
+def simplify_polyline(points: Sequence[Sequence[float]], tolerance: float, method: str = "rdp",
+                      closed: bool = False) -> Reduction:
+    """Drop vertices of a polyline that lie within tolerance of the simplified polyline."""
+    points = _as_points(points)
+    if tolerance < 0:
+        raise ValueError("tolerance must not be negative")
+    if method not in ("rdp", "visvalingam"):
+        raise ValueError(f"Unknown simplification method: {method}")
+    if len(points) < 3:
+        return Reduction(points, 0.0)
+
+    # A closed polyline is simplified as an open one returning to its first vertex
+    source = np.vstack([points, points[:1]]) if closed else points
+    kept = _rdp(source, tolerance) if method == "rdp" else _visvalingam(source, tolerance)
+    deviation = polyline_deviation(source, kept)
+    if closed:
+        kept = kept[:-1]
+    return Reduction(source[kept], deviation)
+
+def _chord_parameters(points: np.ndarray) -> np.ndarray:
+    lengths = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    parameters = np.concatenate([[0.0], np.cumsum(lengths)])
+    return parameters / parameters[-1] if parameters[-1] > 0 else np.linspace(0.0, 1.0, len(points))
+
+def _spline_matrix(knots: np.ndarray, samples: np.ndarray) -> np.ndarray:
+    """Matrix mapping values at knots to the not-a-knot cubic spline through them, evaluated at samples."""
+    count = len(knots)
+    steps = np.diff(knots)
+    span = np.clip(np.searchsorted(knots, samples, side="right") - 1, 0, count - 2)
+    h = steps[span]
+    a = (knots[span + 1] - samples) / h
+    b = 1.0 - a
+    rows = np.arange(len(samples))
+
+    linear = np.zeros((len(samples), count))
+    linear[rows, span] = a
+    linear[rows, span + 1] = b
+    if count == 2:
+        return linear
+
+    # Second derivatives M solve system @ M = differences @ values. The end conditions are
+    # "not-a-knot" (the first two and last two spans share a cubic), which unlike natural ends
+    # do not force the curve straight at its ends
+    system = np.zeros((count, count))
+    differences = np.zeros((count, count))
+    if count == 3:
+        system[0, :] = [1.0, -1.0, 0.0]
+        system[-1, :] = [0.0, -1.0, 1.0]
+    else:
+        system[0, :3] = [steps[1], -(steps[0] + steps[1]), steps[0]]
+        system[-1, -3:] = [steps[-1], -(steps[-2] + steps[-1]), steps[-2]]
+    for i in range(1, count - 1):
+        system[i, i - 1] = steps[i - 1] / 6
+        system[i, i] = (steps[i - 1] + steps[i]) / 3
+        system[i, i + 1] = steps[i] / 6
+        differences[i, i - 1] = 1 / steps[i - 1]
+        differences[i, i] = -1 / steps[i - 1] - 1 / steps[i]
+        differences[i, i + 1] = 1 / steps[i]
+    curvature = np.linalg.solve(system, differences)
+
+    cubic = np.zeros((len(samples), count))
+    cubic[rows, span] = (a ** 3 - a) * h * h / 6
+    cubic[rows, span + 1] = (b ** 3 - b) * h * h / 6
+    return linear + cubic @ curvature
+
+def reduce_fit_points(points: Sequence[Sequence[float]], tolerance: float, max_iterations: int = 100) -> Reduction:
+    """A subset of points whose interpolating cubic spline passes within tolerance of all points.
+
+    The spline through the kept points is parameterised by their own chord lengths, and every
+    dropped point is compared with the spline at the matching parameter of its span, which
+    bounds its distance from the curve.
+    """
+    points = _as_points(points)
+    if tolerance < 0:
+        raise ValueError("tolerance must not be negative")
+    if len(points) < 3:
+        return Reduction(points, 0.0)
+
+    dense = _chord_parameters(points)
+    selected = np.array([0, len(points) - 1])
+    deviation = 0.0
+    for _ in range(max_iterations):
+        knots = _chord_parameters(points[selected])
+        # Map each sample into its span of the reduced spline's parameter range
+        span = np.clip(np.searchsorted(selected, np.arange(len(points)), side="right") - 1, 0, len(selected) - 2)
+        start, end = selected[span], selected[span + 1]
+        fraction = (dense - dense[start]) / np.where(dense[end] > dense[start], dense[end] - dense[start], 1.0)
+        samples = knots[span] + fraction * (knots[span + 1] - knots[span])
+        residuals = np.linalg.norm(_spline_matrix(knots, samples) @ points[selected] - points, axis=1)
+        deviation = float(residuals.max())
+        if deviation <= tolerance:
+            break
+
+        # Keep the worst sample of every span that is still out of tolerance
+        worst = [
+            first + 1 + int(np.argmax(residuals[first + 1:last]))
+            for first, last in zip(selected[:-1], selected[1:])
+            if last - first > 1 and residuals[first + 1:last].max() > tolerance
+        ]
+        if not worst:
+            break
+        selected = np.union1d(selected, worst)
+
+    if deviation > tolerance:
+        # Too many fit points would be needed; keep them all
+        return Reduction(points, 0.0)
+    return Reduction(points[selected], deviation)
@@ -0,0 +1,246 @@
+"""
+Nearest snap point queries.
+
+Snap points (endpoints, midpoints, centers and so on) of all model space
+entities are kept in a KD-tree per connection and document. The tree is a
+static, balanced tree over the points present when it was built; points of
+entities added or modified later go to a small insertion buffer that is
+scanned linearly, and points of modified or erased entities are tombstoned.
+The tree is rebuilt once the buffer or the tombstones grow too large, so
+queries stay logarithmic while updates stay cheap.
+
+The index is brought up to date from the drawing's change log before every
+query, fetching snap points of changed entities only.
+"""
+
+import heapq
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import config
+from geometry_io import decode_doubles
+from targets import current_target
+
+logger = logging.getLogger("AutoCADMCP")
+
+# Snap point kinds, by the codes GET_SNAP_POINTS uses
+SNAP_KINDS = ("endpoint", "midpoint", "center", "node", "insertion", "grip")
+
+class KDTree:
+    """Balanced KD-tree over a fixed set of 3D points, with leaf buckets and node bounding boxes."""
+
+    LEAF_SIZE = 32
+
+    def __init__(self, points: np.ndarray):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        # Point indices, permuted so that every node covers a contiguous range
+        self.index = np.arange(len(self.points))
+        self._ranges: List[Tuple[int, int]] = []
+        self._children: List[Tuple[int, int]] = []
+        self._low: List[np.ndarray] = []
+        self._high: List[np.ndarray] = []
+        if len(self.points):
+            self._build(0, len(self.points))
+
+    def _build(self, start: int, stop: int) -> int:
+        node = len(self._ranges)
+        members = self.points[self.index[start:stop]]
+        low, high = members.min(axis=0), members.max(axis=0)
+        self._ranges.append((start, stop))
+        self._children.append((-1, -1))
+        self._low.append(low)
+        self._high.append(high)
+        if stop - start > self.LEAF_SIZE:
+            axis = int(np.argmax(high - low))
+            middle = (stop - start) // 2
+            order = np.argpartition(members[:, axis], middle)
+            self.index[start:stop] = self.index[start:stop][order]
+            left = self._build(start, start + middle)
+            right = self._build(start + middle, stop)
+            self._children[node] = (left, right)
+        return node
+
+    def _box_distance(self, node: int, point: np.ndarray) -> float:
+        gap = np.maximum(np.maximum(self._low[node] - point, point - self._high[node]), 0.0)
+        return float(gap @ gap)
+
+    def query(self, point: Sequence[float], k: int, accept: np.ndarray = None,
+              max_distance: float = np.inf) -> List[Tuple[float, int]]:
+        """The k nearest points as (squared distance, point index) pairs, nearest first.
+
+        accept is an optional boolean mask of the points that may be returned.
+        """
+        if not self._ranges or k <= 0:
+            return []
+        point = np.asarray(point, dtype=np.float64)
+        limit = max_distance * max_distance
+        best: List[Tuple[float, int]] = []  # Max-heap of the k nearest so far, as negated distances
+        pending = [(self._box_distance(0, point), 0)]
+        while pending:
+            distance, node = heapq.heappop(pending)
+            bound = -best[0][0] if len(best) == k else limit
+            if distance > bound:
+                break
+            left, right = self._children[node]
+            if left >= 0:
+                for child in (left, right):
+                    child_distance = self._box_distance(child, point)
+                    if child_distance <= bound:
+                        heapq.heappush(pending, (child_distance, child))
+                continue
+
+            start, stop = self._ranges[node]
+            indices = self.index[start:stop]
+            if accept is not None:
+                indices = indices[accept[indices]]
+            offsets = self.points[indices] - point
+            distances = np.einsum("ij,ij->i", offsets, offsets)
+            for candidate in np.flatnonzero(distances <= bound):
+                entry = (-float(distances[candidate]), int(indices[candidate]))
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+                bound = -best[0][0] if len(best) == k else limit
+        return sorted((-distance, index) for distance, index in best)
+
+class SnapIndex:
+    """Snap points of one drawing, kept current through the drawing's change log."""
+
+    def __init__(self):
+        self.revision: Optional[str] = None
+        self._tree = KDTree(np.empty((0, 3)))
+        self._handles = np.empty(0, dtype=np.int64)
+        self._kinds = np.empty(0, dtype=np.uint8)
+        self._alive = np.empty(0, dtype=bool)
+        # Points added since the tree was built, scanned linearly
+        self._buffer_points = np.empty((0, 3))
+        self._buffer_handles = np.empty(0, dtype=np.int64)
+        self._buffer_kinds = np.empty(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return int(self._alive.sum()) + len(self._buffer_handles)
+
+    def rebuild(self, points: np.ndarray, handles: np.ndarray, kinds: np.ndarray):
+        self._tree = KDTree(points)
+        self._handles = handles
+        self._kinds = kinds
+        self._alive = np.ones(len(handles), dtype=bool)
+        self._buffer_points = np.empty((0, 3))
+        self._buffer_handles = np.empty(0, dtype=np.int64)
+        self._buffer_kinds = np.empty(0, dtype=np.uint8)
+
+    def remove(self, handles: Sequence[int]):
+        """Tombstone the points of entities."""
+        if not len(handles):
+            return
+        self._alive &= ~np.isin(self._handles, handles)
+        keep = ~np.isin(self._buffer_handles, handles)
+        self._buffer_points = self._buffer_points[keep]
+        self._buffer_handles = self._buffer_handles[keep]
+        self._buffer_kinds = self._buffer_kinds[keep]
+        self.compact()
+
+    def insert(self, points: np.ndarray, handles: np.ndarray, kinds: np.ndarray):
+        """Add points to the insertion buffer, rebuilding the tree if the buffer or tombstones have grown too large."""
+        self._buffer_points = np.concatenate([self._buffer_points, points])
+        self._buffer_handles = np.concatenate([self._buffer_handles, handles])
+        self._buffer_kinds = np.concatenate([self._buffer_kinds, kinds])
+        self.compact()
+
+    def compact(self, force: bool = False):
+        """Rebuild the tree from the live points if the buffer or the tombstones have grown too large."""
+        size = len(self._handles)
+        dead = size - int(self._alive.sum())
+        if force or len(self._buffer_handles) > max(config.snap_buffer_size, size // 8) or dead > size // 4:
+            alive = self._alive
+            self.rebuild(
+                np.concatenate([self._tree.points[alive], self._buffer_points]),
+                np.concatenate([self._handles[alive], self._buffer_handles]),
+                np.concatenate([self._kinds[alive], self._buffer_kinds])
+            )
+
+    def nearest(self, point: Sequence[float], k: int = 1, kinds: Sequence[str] = None,
+                max_distance: float = None) -> List[Dict[str, Any]]:
+        """The k nearest snap points of the given kinds, nearest first."""
+        point = np.asarray(list(point) + [0.0] * (3 - len(point)), dtype=np.float64)
+        max_distance = np.inf if max_distance is None else max_distance
+        unknown = [kind for kind in kinds or () if kind not in SNAP_KINDS]
+        if unknown:
+            raise ValueError(f"Unknown snap point kinds: {', '.join(unknown)}")
+        codes = None if kinds is None else [SNAP_KINDS.index(kind) for kind in kinds]
+
+        accept = self._alive if codes is None else self._alive & np.isin(self._kinds, codes)
+        found = [(distance, "tree", index) for distance, index in self._tree.query(point, k, accept, max_distance)]
+
+        offsets = self._buffer_points - point
+        distances = np.einsum("ij,ij->i", offsets, offsets)
+        eligible = distances <= max_distance * max_distance
+        if codes is not None:
+            eligible &= np.isin(self._buffer_kinds, codes)
+        for index in np.flatnonzero(eligible):
+            found.append((float(distances[index]), "buffer", int(index)))
+
+        results = []
+        for distance, source, index in sorted(found)[:k]:
+            points, handles, codes = (
+                (self._tree.points, self._handles, self._kinds) if source == "tree"
+                else (self._buffer_points, self._buffer_handles, self._buffer_kinds)
+            )
+            results.append({
+                "point": points[index].tolist(),
+                "kind": SNAP_KINDS[codes[index]],
+                "handle": int(handles[index]),
+                "distance": float(np.sqrt(distance))
+            })
+        return results
+
+def _decode(result: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return (
+        decode_doubles(result["points"], 3) if result["handles"] else np.empty((0, 3)),
+        np.asarray(result["handles"], dtype=np.int64),
+        np.asarray(result["kinds"], dtype=np.uint8)
+    )
+
+def _send(autocad, params: Dict[str, Any]) -> Dict[str, Any]:
+    response = autocad.send_command("GET_SNAP_POINTS", params)
+    if not response.get("success", False):
+        raise Exception(response.get("error", "Unknown error"))
+    return response.get("result", {})
+
+def _load_all(autocad, index: SnapIndex):
+    parts = []
+    cursor = 0
+    while cursor is not None:
+        result = _send(autocad, {"cursor": cursor, "pageSize": config.mirror_page_size})
+        parts.append(_decode(result))
+        cursor = result.get("nextCursor")
+    points, handles, kinds = (np.concatenate(column) for column in zip(*parts))
+    index.rebuild(points, handles, kinds)
+    logger.info(f"Indexed {len(handles)} snap points")
+
+def get_snap_index(autocad) -> SnapIndex:
+    """The snap index of the targeted document on a connection, updated with the changes since it was last used."""
+    document = current_target().document
+    with autocad._snap_lock:
+        index = autocad.snap_indexes.get(document)
+        if index is None:
+            index = autocad.snap_indexes[document] = SnapIndex()
+
+        response = autocad.send_command("GET_CHANGES_SINCE", {"since": index.revision} if index.revision else {})
+        if not response.get("success", False):
+            raise Exception(response.get("error", "Unknown error"))
+        changes = response.get("result", {})
+
+        if changes.get("resync"):
+            _load_all(autocad, index)
+        else:
+            changed = [*changes.get("modified", ()), *changes.get("erased", ())]
+            index.remove(changed)
+            refreshed = [*changes.get("added", ()), *changes.get("modified", ())]
+            if refreshed:
+                index.insert(*_decode(_send(autocad, {"entityIds": refreshed})))
+        index.revision = changes.get("revision")
+        return index
@@ -0,0 +1,85 @@
+"""
+Routing of tool calls to AutoCAD instances and documents.
+
+A target names a bridge endpoint and, optionally, one of the documents open in
+that AutoCAD instance, written as "endpoint/document". Either part may be
+omitted: "" or None means the default endpoint and its active document, and
+"/Drawing2.dwg" means Drawing2.dwg on the default endpoint. The endpoint "any"
+places the call on the least loaded endpoint.
+"""
+
+import contextvars
+import functools
+import inspect
+from contextlib import contextmanager
+from typing import Annotated, Any, Awaitable, Callable, ContextManager, Iterator, NamedTuple, Optional
+from pydantic import Field
+
+# Endpoint name that lets the registry pick the least loaded endpoint
+ANY_ENDPOINT = "any"
+
+class Target(NamedTuple):
+    """A bridge endpoint and a document open in it. None means the default endpoint or the active document."""
+    endpoint: Optional[str] = None
+    document: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self.document is None:
+            return self.endpoint or ""
+        return f"{self.endpoint or ''}/{self.document}"
+
+def parse_target(target: Optional[str]) -> Target:
+    """Parse an "endpoint/document" target string."""
+    if not target:
+        return Target()
+    endpoint, _, document = target.partition("/")
+    return Target(endpoint.strip() or None, document.strip() or None)
+
+_current_target: contextvars.ContextVar[Target] = contextvars.ContextVar("autocad_target", default=Target())
+
+def current_target() -> Target:
+    """The target of the running tool call."""
+    return _current_target.get()
+
+@contextmanager
+def use_target(target: Target) -> Iterator[Target]:
+    """Route every command sent within the block to target."""
+    token = _current_target.set(target)
+    try:
+        yield target
+    finally:
+        _current_target.reset(token)
+
+TARGET_DESCRIPTION = (
+    'AutoCAD instance and document to run on, as "endpoint/document" (optional, defaults to the '
+    'active document of the default endpoint). Use "any" to run on the least loaded endpoint.'
+)
+
+def routed(fn: Callable[..., Awaitable[Any]], place: Callable[[], ContextManager[str]]) -> Callable[..., Awaitable[Any]]:
+    """Add a target argument to an async tool, routing the commands it sends to that target.
+
+    Tools that already take an argument called target (such as the view target
+    point of capture_view) get an autocad_target argument instead. place
+    reserves the least loaded endpoint for calls targeting "any".
+    """
+    signature = inspect.signature(fn)
+    name = "autocad_target" if "target" in signature.parameters else "target"
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        parsed = parse_target(kwargs.pop(name, None))
+        if parsed.endpoint != ANY_ENDPOINT:
+            with use_target(parsed):
+                return await fn(*args, **kwargs)
+        with place() as endpoint:
+            with use_target(Target(endpoint, parsed.document)):
+                return await fn(*args, **kwargs)
+
+    target_parameter = inspect.Parameter(
+        name,
+        inspect.Parameter.KEYWORD_ONLY,
+        default=None,
+        annotation=Annotated[Optional[str], Field(description=TARGET_DESCRIPTION)]
+    )
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), target_parameter])
+    return wrapper
@@ -0,0 +1,73 @@
+import pytest
+
+from admission import AdmissionControl, OverloadedError, TokenBucket
+from config import config
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Admission settings that only limit what a test sets."""
+    for name in ("rate_limits", "rate_bursts", "max_queue_depth", "shed_queue_wait_ms"):
+        monkeypatch.setattr(config, name, {"read": 0, "edit": 0, "heavy": 0})
+    return config
+
+def test_token_bucket_serves_bursts_then_paces():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve(1.0) == 0.0
+    assert bucket.reserve(1.0) == 0.0
+    assert bucket.reserve(1.0) == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve(1.0) == pytest.approx(0.2, abs=0.01)
+    with pytest.raises(OverloadedError) as rejected:
+        bucket.reserve(0.1)
+    assert rejected.value.retry_after >= 0.5
+
+def test_unlimited_commands_are_admitted(limits):
+    admission = AdmissionControl()
+    for _ in range(100):
+        admission.admit("MOVE_ENTITY", waiting=1000)
+    assert admission.describe()["rejected"] == {"read": 0, "edit": 0, "heavy": 0}
+
+def test_queue_depth(limits):
+    limits.max_queue_depth["heavy"] = 2
+    admission = AdmissionControl()
+    admission.admit("CAPTURE_VIEW", waiting=1)
+    admission.admit("MOVE_ENTITY", waiting=5)
+    with pytest.raises(OverloadedError, match="2 heavy commands are already waiting"):
+        admission.admit("CAPTURE_VIEW", waiting=2)
+    assert admission.describe()["rejected"]["heavy"] == 1
+
+def test_rate_limit(limits, monkeypatch):
+    limits.rate_limits["edit"] = 1
+    limits.rate_bursts["edit"] = 2
+    monkeypatch.setattr(config, "admission_max_wait", 0.0)
+    admission = AdmissionControl()
+    admission.admit("MOVE_ENTITY", waiting=0)
+    admission.admit("MOVE_ENTITY", waiting=0)
+    with pytest.raises(OverloadedError, match="rate limit"):
+        admission.admit("MOVE_ENTITY", waiting=0)
+    # Classes have buckets of their own
+    admission.admit("GET_ENTITY_PROPERTIES", waiting=0)
+
+def test_long_queue_waits_shed_commands_by_class(limits):
+    limits.shed_queue_wait_ms.update(read=10000, edit=3000, heavy=1000)
+    admission = AdmissionControl()
+    admission.observe(20000)
+    # One report of 20s moves the average by its smoothing weight, to about 6s
+    assert 5000 < admission.describe()["queueWaitMs"] <= 6000
+    admission.admit("GET_ENTITY_PROPERTIES", waiting=0)
+    for command_type in ("MOVE_ENTITY", "CAPTURE_VIEW"):
+        with pytest.raises(OverloadedError, match="UI thread"):
+            admission.admit(command_type, waiting=0)
+    rejected = admission.describe()["rejected"]
+    assert rejected == {"read": 0, "edit": 1, "heavy": 1}
+
+def test_short_queue_waits_bring_the_average_down(limits):
+    limits.shed_queue_wait_ms["edit"] = 3000
+    admission = AdmissionControl()
+    admission.observe(20000)
+    for _ in range(10):
+        admission.observe(0)
+    admission.admit("MOVE_ENTITY", waiting=0)
+
+def test_retry_after_is_rounded_up():
+    assert OverloadedError("busy", 0.01).retry_after == 0.5
+    assert OverloadedError("busy", 1.23).retry_after == 1.3
@@ -0,0 +1,14 @@
+from autocad_connection import _parse_endpoint
+from config import ServerConfig
+
+def test_parse_endpoint():
+    assert _parse_endpoint("office=10.0.0.5:6401") == ("office", "10.0.0.5", 6401)
+    # Without a name the address names the endpoint, and without a host the default host is used
+    assert _parse_endpoint("10.0.0.5:6401") == ("10.0.0.5:6401", "10.0.0.5", 6401)
+    assert _parse_endpoint("cad2=:6402")[1:] == ("localhost", 6402)
+
+def test_endpoints_from_environment(monkeypatch):
+    monkeypatch.setenv("AUTOCAD_MCP_ENDPOINTS", "cad2=localhost:6401, office=10.0.0.5:6400")
+    assert ServerConfig().autocad_endpoints == ["cad2=localhost:6401", "office=10.0.0.5:6400"]
+    monkeypatch.delenv("AUTOCAD_MCP_ENDPOINTS")
+    assert ServerConfig().autocad_endpoints == []
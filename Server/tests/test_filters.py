@@ -0,0 +1,56 @@
+import pytest
+
+from filters import compile_filter, parse_filter
+
+def test_parse_precedence():
+    assert parse_filter("a == 1 or b == 2 and c == 3") == {"op": "or", "args": [
+        {"op": "cmp", "field": "a", "cmp": "==", "value": 1},
+        {"op": "and", "args": [
+            {"op": "cmp", "field": "b", "cmp": "==", "value": 2},
+            {"op": "cmp", "field": "c", "cmp": "==", "value": 3},
+        ]},
+    ]}
+
+def test_parse_literals():
+    assert parse_filter("a.B >= 1e3") == {"op": "cmp", "field": "a.b", "cmp": ">=", "value": 1000.0}
+    assert parse_filter('name == "x y"')["value"] == "x y"
+
+@pytest.mark.parametrize("text", ["", "type == 5", "color == 300", "radius <", "(a == 1"])
+def test_parse_rejects_invalid_expressions(text):
+    with pytest.raises(ValueError):
+        parse_filter(text)
+
+def test_compile_to_selection_filter():
+    compiled = compile_filter('type == Circle and layer == "HOLES" and radius < 5')
+    assert compiled.dxf == [[410, "Model"], [0, "CIRCLE"], [8, "HOLES"], [-4, "<"], [40, 5.0]]
+    assert compiled.residual is None
+
+def test_compile_nested_logic():
+    compiled = compile_filter('not (color in (1, 2) or layer != "0")')
+    assert compiled.dxf == [
+        [410, "Model"], [-4, "<not"], [-4, "<and"], [-4, "<or"], [-4, "<or"], [62, 1], [62, 2], [-4, "or>"],
+        [-4, "<not"], [8, "0"], [-4, "not>"], [-4, "or>"], [-4, "and>"], [-4, "not>"],
+    ]
+    assert compiled.residual is None
+
+def test_compile_keeps_properties_without_group_code_residual():
+    compiled = compile_filter("type in (Line, Arc) and StartPoint.Z > 0")
+    assert compiled.dxf == [[410, "Model"], [0, "LINE,ARC"]]
+    assert compiled.residual == {"op": "cmp", "field": "startpoint.z", "cmp": ">", "value": 0}
+
+def test_compile_uses_group_codes_only_for_matching_types():
+    # Code 40 means radius only for circles and arcs
+    assert compile_filter("radius < 5").residual == {"op": "cmp", "field": "radius", "cmp": "<", "value": 5}
+    compiled = compile_filter('layer != "0" and type == Polyline and elevation >= 2')
+    assert compiled.dxf[-3:] == [[0, "LWPOLYLINE"], [-4, ">="], [38, 2.0]]
+    assert compiled.residual is None
+
+def test_compile_bylayer_color_is_residual():
+    assert compile_filter("color == 256").residual is not None
+
+def test_compiled_filter_parameters():
+    compiled = compile_filter("type == Line and length > 2")
+    params = compiled.to_params()
+    assert params["filter"] == compiled.dxf
+    assert params["residual"] == {"op": "cmp", "field": "length", "cmp": ">", "value": 2}
+    assert params["expression"]["op"] == "and"
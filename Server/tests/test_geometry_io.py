@@ -0,0 +1,147 @@
+import base64
+import json
+
+import numpy as np
+import pytest
+
+from geometry_io import NpyColumnWriter, decode_doubles, merge_ranges, open_export_writer, prefetch, read_geometry
+
+def _encode(values) -> str:
+    return base64.b64encode(np.asarray(values, dtype="<f8").tobytes()).decode("ascii")
+
+def test_csv_rows_of_one_polyline_are_grouped(tmp_path):
+    path = tmp_path / "shapes.csv"
+    path.write_text(
+        "type,id,x,y,closed,layer\n"
+        "polyline,1,0,0,1,A\n"
+        "polyline,1,1,0,1,A\n"
+        "polyline,1,1,1,1,A\n"
+        "point,,5,5,,\n"
+        "polyline,2,0,0,,B\n"
+        "polyline,2,2,0,,B\n"
+    )
+    groups = {group.type: group for chunk in read_geometry(str(path)) for group in chunk.groups}
+    polylines = groups["polyline"]
+    assert polylines.count == 2
+    assert polylines.offsets.tolist() == [0, 3, 5]
+    assert polylines.closed == [True, False]
+    assert polylines.layers == ["A", "B"]
+    assert groups["point"].values.tolist() == [[5.0, 5.0, 0.0]]
+
+def test_csv_chunks_report_progress(tmp_path):
+    path = tmp_path / "points.csv"
+    path.write_text("x,y\n" + "".join(f"{i},{i}\n" for i in range(25)))
+    chunks = list(read_geometry(str(path), chunk_size=10))
+    assert [chunk.count for chunk in chunks] == [10, 10, 5]
+    assert chunks[-1].position == chunks[-1].total
+
+def test_jsonl_records(tmp_path):
+    path = tmp_path / "shapes.jsonl"
+    records = [
+        {"type": "line", "start": [0, 0], "end": [1, 2, 3]},
+        {"type": "circle", "center": [1, 1], "radius": 2, "layer": "C"},
+        {"type": "polyline3d", "points": [[0, 0, 0], [1, 1, 1]], "closed": True},
+    ]
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n")
+    groups = {group.type: group for chunk in read_geometry(str(path)) for group in chunk.groups}
+    assert groups["line"].values.tolist() == [[0.0, 0.0, 0.0, 1.0, 2.0, 3.0]]
+    assert groups["circle"].encode()["layers"] == ["C"]
+    encoded = groups["polyline3d"].encode()
+    assert encoded["count"] == 1 and encoded["closed"] == [True]
+    assert np.frombuffer(base64.b64decode(encoded["offsets"]), dtype="<i4").tolist() == [0, 2]
+
+def test_npz_pads_2d_values(tmp_path):
+    path = tmp_path / "shapes.npz"
+    np.savez(path, circles=np.array([[1.0, 2.0, 3.0]]), polylines=np.array([[0, 0], [1, 0], [1, 1]], dtype=float),
+             polyline_offsets=np.array([0, 3]), polyline_closed=np.array([True]))
+    groups = {group.type: group for chunk in read_geometry(str(path)) for group in chunk.groups}
+    assert groups["circle"].values.tolist() == [[1.0, 2.0, 0.0, 3.0]]
+    assert groups["polyline"].values[:, 2].tolist() == [0.0, 0.0, 0.0]
+    assert groups["polyline"].closed == [True]
+
+def test_npz_polylines_need_offsets(tmp_path):
+    path = tmp_path / "shapes.npz"
+    np.savez(path, polylines=np.zeros((2, 3)))
+    with pytest.raises(ValueError):
+        list(read_geometry(str(path)))
+
+@pytest.mark.parametrize("kwargs", [{"file_format": "dxf"}, {"default_type": "spline"}, {"chunk_size": 0}])
+def test_read_geometry_rejects_invalid_arguments(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        read_geometry(str(tmp_path / "shapes.csv"), **kwargs)
+
+def test_unsupported_entity_type(tmp_path):
+    path = tmp_path / "shapes.csv"
+    path.write_text("type,x,y\nhelix,0,0\n")
+    with pytest.raises(ValueError):
+        list(read_geometry(str(path)))
+
+def test_csv_polylines_need_two_points(tmp_path):
+    path = tmp_path / "shapes.csv"
+    path.write_text("type,id,x,y\npolyline,1,0,0\npolyline,1,1,0\npolyline,2,5,5\n")
+    with pytest.raises(ValueError, match="line 4"):
+        list(read_geometry(str(path)))
+
+def test_merge_ranges():
+    assert merge_ranges([[10, 12], [1, 3], [4, 5], [11, 20], [30, 30]]) == [[1, 5], [10, 20], [30, 30]]
+
+def test_prefetch_keeps_order_and_raises_errors():
+    assert list(prefetch(iter(range(100)), 3)) == list(range(100))
+
+    def failing():
+        yield 1
+        raise RuntimeError("broken")
+    with pytest.raises(RuntimeError):
+        list(prefetch(failing(), 2))
+
+def test_npy_column_writer_streams_rows(tmp_path):
+    path = str(tmp_path / "extents.npy")
+    writer = NpyColumnWriter(path, np.float64, (2,))
+    writer.append([[1, 2], [3, 4]])
+    writer.append([5, 6])
+    writer.close()
+    assert np.load(path).tolist() == [[1, 2], [3, 4], [5, 6]]
+
+def test_decode_doubles():
+    assert decode_doubles(_encode([1, 2, 3, 4, 5, 6]), 3).tolist() == [[1, 2, 3], [4, 5, 6]]
+
+def test_npy_export_codes_layers_across_pages(tmp_path):
+    writer = open_export_writer(str(tmp_path), "npy")
+    for layer_names, handles in ((["0", "WALLS"], [1, 2]), (["WALLS"], [3])):
+        writer.write_page({
+            "layerNames": layer_names,
+            "tables": {"Circle": {
+                "count": len(handles),
+                "columns": ["radius"],
+                "handles": handles,
+                "layers": [len(layer_names) - 1] * len(handles),
+                "colors": [1] * len(handles),
+                "extents": _encode(np.zeros((len(handles), 6))),
+                "geometry": _encode(np.arange(len(handles), dtype=float)),
+            }},
+        })
+    tables = writer.close()
+    assert tables["Circle"]["rows"] == 3
+    assert writer.layers == ["0", "WALLS"]
+    assert np.load(tmp_path / "Circle" / "handle.npy").tolist() == [1, 2, 3]
+    assert np.load(tmp_path / "Circle" / "layer.npy").tolist() == [1, 1, 1]
+    assert np.load(tmp_path / "Circle" / "color.npy").tolist() == [1, 1, 1]
+    assert np.load(tmp_path / "Circle" / "radius.npy").tolist() == [0.0, 1.0, 0.0]
+
+def test_parquet_export_writes_all_columns(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    writer = open_export_writer(str(tmp_path), "parquet")
+    writer.write_page({
+        "layerNames": ["0"],
+        "tables": {"Line": {
+            "count": 2,
+            "handles": [7, 8],
+            "layers": [0, 0],
+            "colors": [3, 256],
+            "extents": _encode(np.ones((2, 6))),
+        }},
+    })
+    writer.close()
+    table = parquet.read_table(tmp_path / "Line.parquet").to_pydict()
+    assert table["handle"] == [7, 8] and table["layer"] == ["0", "0"] and table["color"] == [3, 256]
+    assert table["max_z"] == [1.0, 1.0]
@@ -0,0 +1,62 @@
+import numpy as np
+
+from interference import overlapping_pairs
+
+def _brute_force(extents, tolerance=0.0):
+    pairs = set()
+    for i in range(len(extents)):
+        for j in range(i + 1, len(extents)):
+            if np.isnan(extents[i]).any() or np.isnan(extents[j]).any():
+                continue
+            low_i, high_i = extents[i, :3] - tolerance / 2, extents[i, 3:] + tolerance / 2
+            low_j, high_j = extents[j, :3] - tolerance / 2, extents[j, 3:] + tolerance / 2
+            if np.all(low_j <= high_i) and np.all(low_i <= high_j):
+                pairs.add((i, j))
+    return pairs
+
+def _random_boxes(count, seed):
+    rng = np.random.default_rng(seed)
+    low = rng.uniform(0, 100, (count, 3))
+    return np.hstack([low, low + rng.uniform(0, 8, (count, 3))])
+
+def _as_set(pairs):
+    return {(int(i), int(j)) for i, j in pairs}
+
+def test_matches_brute_force():
+    extents = _random_boxes(300, 1)
+    assert _as_set(overlapping_pairs(extents)) == _brute_force(extents)
+
+def test_tolerance_widens_boxes():
+    extents = np.array([[0, 0, 0, 1, 1, 1], [1.5, 0, 0, 2, 1, 1]], dtype=float)
+    assert len(overlapping_pairs(extents)) == 0
+    assert _as_set(overlapping_pairs(extents, tolerance=0.5)) == {(0, 1)}
+
+def test_touching_boxes_overlap():
+    extents = np.array([[0, 0, 0, 1, 1, 1], [1, 1, 1, 2, 2, 2]], dtype=float)
+    assert _as_set(overlapping_pairs(extents)) == {(0, 1)}
+
+def test_pairs_are_ordered():
+    pairs = overlapping_pairs(_random_boxes(200, 2))
+    assert np.all(pairs[:, 0] < pairs[:, 1])
+
+def test_nan_rows_are_ignored():
+    extents = _random_boxes(50, 3)
+    extents[[4, 17]] = np.nan
+    pairs = _as_set(overlapping_pairs(extents))
+    assert pairs == _brute_force(extents)
+    assert not any(4 in pair or 17 in pair for pair in pairs)
+
+def test_subset_limits_pairs():
+    extents = _random_boxes(200, 4)
+    subset = np.zeros(len(extents), dtype=bool)
+    subset[:20] = True
+    expected = {pair for pair in _brute_force(extents) if subset[pair[0]] or subset[pair[1]]}
+    assert _as_set(overlapping_pairs(extents, subset=subset)) == expected
+
+def test_boxes_sharing_one_range():
+    # Boxes stacked on the same x range are separated on the other axes only
+    extents = np.array([[0, i * 2, 0, 10, i * 2 + 1, 1] for i in range(50)], dtype=float)
+    assert _as_set(overlapping_pairs(extents)) == _brute_force(extents) == set()
+
+def test_empty_input():
+    assert overlapping_pairs(np.empty((0, 6))).shape == (0, 2)
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from clients import Client, _current_client
+from jobs import JobManager
+
+def _as(client_id: str, fn):
+    token = _current_client.set(Client(client_id, client_id))
+    try:
+        return fn()
+    finally:
+        _current_client.reset(token)
+
+def test_jobs_are_visible_only_to_their_client():
+    async def scenario():
+        manager = JobManager()
+
+        async def run():
+            return "done"
+
+        job = _as("a", lambda: manager.submit("bulk_create", {}, run))
+        await job.task
+        assert job.client == "a"
+        assert _as("a", lambda: manager.get(job.id)) is job
+        assert _as("a", manager.list) == [job]
+        with pytest.raises(ValueError, match="Unknown job"):
+            _as("b", lambda: manager.get(job.id))
+        assert _as("b", manager.list) == []
+
+    asyncio.run(scenario())
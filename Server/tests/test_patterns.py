@@ -0,0 +1,55 @@
+import base64
+
+import numpy as np
+import pytest
+
+from patterns import (encode_transforms, linear_transforms, path_transforms, polar_transforms, radial_transforms,
+                      rectangular_transforms)
+
+def _apply(transforms, point):
+    return (transforms @ np.append(np.asarray(point, dtype=float), 1.0))[:, :3]
+
+def test_linear():
+    assert _apply(linear_transforms(4, [2, 1]), [0, 0, 0]).tolist() == [[2, 1, 0], [4, 2, 0], [6, 3, 0]]
+
+def test_rectangular_excludes_the_original():
+    transforms = rectangular_transforms(2, 3, 1, row_spacing=10, column_spacing=5)
+    assert len(transforms) == 5
+    offsets = {tuple(offset) for offset in _apply(transforms, [0, 0, 0]).tolist()}
+    assert offsets == {(5, 0, 0), (10, 0, 0), (0, 10, 0), (5, 10, 0), (10, 10, 0)}
+    with pytest.raises(ValueError):
+        rectangular_transforms(0, 1, 1)
+
+def test_radial_rotates_about_origin():
+    moved = _apply(radial_transforms(4, np.pi / 2, [0, 0, 1], [1, 1]), [2, 1, 0])
+    assert np.allclose(moved, [[1, 2, 0], [0, 1, 0], [1, 0, 0]])
+    with pytest.raises(ValueError):
+        radial_transforms(2, np.pi, [0, 0, 0], [0, 0])
+
+def test_polar_full_circle_does_not_overlap():
+    transforms = polar_transforms(4, [0, 0], fill_angle=2 * np.pi)
+    assert np.allclose(_apply(transforms, [1, 0, 0]), [[0, 1, 0], [-1, 0, 0], [0, -1, 0]])
+
+def test_polar_partial_fill_spans_the_angle():
+    transforms = polar_transforms(3, [0, 0], fill_angle=np.pi)
+    assert np.allclose(_apply(transforms, [1, 0, 0])[-1], [-1, 0, 0])
+
+def test_polar_without_rotation_only_translates():
+    transforms = polar_transforms(2, [0, 0], spacing_angle=np.pi, rotate_items=False, base_point=[1, 0])
+    assert np.allclose(transforms[0, :3, :3], np.eye(3))
+    assert np.allclose(transforms[0, :3, 3], [-2, 0, 0])
+
+def test_path_spacing_and_alignment():
+    path = [[0, 0], [10, 0], [10, 10]]
+    transforms = path_transforms(path, 3)
+    assert np.allclose(_apply(transforms, [0, 0, 0]), [[10, 0, 0], [10, 10, 0]])
+    # The copy at the end of the path is turned along its second segment
+    assert np.allclose(transforms[1, :3, :3] @ [1, 0, 0], [0, 1, 0])
+    assert np.allclose(_apply(path_transforms(path, 3, spacing=5, align_items=False), [0, 0, 0]), [[5, 0, 0], [10, 0, 0]])
+    with pytest.raises(ValueError):
+        path_transforms(path, 5, spacing=10)
+
+def test_encode_transforms():
+    transforms = linear_transforms(3, [1, 0])
+    decoded = np.frombuffer(base64.b64decode(encode_transforms(transforms)), dtype="<f8").reshape(-1, 4, 4)
+    assert np.array_equal(decoded, transforms)
@@ -0,0 +1,42 @@
+from request_log import RequestLog, RequestRecord, summarize
+
+def _record(command_type: str, duration: float, outcome: str = "ok") -> RequestRecord:
+    return RequestRecord("id", command_type, "local", None, {}, 0.0, duration, outcome)
+
+def test_summarize_describes_shapes():
+    summary = summarize({"text": "x" * 300, "many": list(range(20)), "few": [1, 2], "data": b"abc", "nested": {"a": {"b": 1}}},
+                        limit=10)
+    assert summary == {
+        "text": "xxxxxxxxxx... (300 chars)",
+        "many": "<20 items>",
+        "few": [1, 2],
+        "data": "<3 bytes>",
+        "nested": {"a": "<1 keys>"},
+    }
+
+def test_ring_buffer_keeps_the_newest_records():
+    log = RequestLog(size=3)
+    for index in range(5):
+        log.record(_record(f"C{index}", 0.1))
+    assert [entry["command"] for entry in log.dump()] == ["C4", "C3", "C2"]
+
+def test_dump_filters():
+    log = RequestLog(size=10)
+    log.record(_record("MOVE_ENTITY", 0.1))
+    log.record(_record("MOVE_ENTITY", 0.2, "timeout"))
+    log.record(_record("GET_ENTITY_PROPERTIES", 0.1, "error"))
+    assert [entry["outcome"] for entry in log.dump(command_type="MOVE_ENTITY")] == ["timeout", "ok"]
+    assert [entry["command"] for entry in log.dump(failures_only=True, limit=1)] == ["GET_ENTITY_PROPERTIES"]
+
+def test_statistics():
+    log = RequestLog(size=100)
+    for index in range(1, 21):
+        log.record(_record("MOVE_ENTITY", index / 1000, "ok" if index % 10 else "error"))
+    assert log.statistics() == {"MOVE_ENTITY": {"count": 20, "failures": 2, "meanMs": 10.5, "p95Ms": 20.0, "maxMs": 20.0}}
+
+def test_sampling(monkeypatch):
+    from config import config
+    monkeypatch.setattr(config, "log_sample_every", 3)
+    log = RequestLog()
+    assert [log.sampled("MOVE_ENTITY") for _ in range(7)] == [True, False, False, True, False, False, True]
+    assert log.sampled("CAPTURE_VIEW")
@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+from cancellation import CallScope, CommandCancelledError, _current_scope
+from clients import Client, _current_client
+from scheduler import CommandClass, CommandScheduler, classify
+
+def test_classify():
+    assert classify("GET_ENTITY_PROPERTIES") == CommandClass.READ
+    assert classify("MOVE_ENTITY") == CommandClass.EDIT
+    assert classify("CAPTURE_VIEW") == CommandClass.HEAVY
+    # Commands the scheduler does not know are treated as edits
+    assert classify("SOMETHING_NEW") == CommandClass.EDIT
+
+class _Run:
+    """Runs commands through a scheduler in threads, recording the order they got a socket in."""
+
+    def __init__(self, scheduler: CommandScheduler):
+        self.scheduler = scheduler
+        self.order = []
+        self.threads = []
+
+    def command(self, name: str, command_type: str, client: Client, session=None, hold: float = 0.01):
+        waiting = self.scheduler.depth
+
+        def run():
+            _current_client.set(client)
+            with self.scheduler.slot(command_type, session):
+                self.order.append(name)
+                time.sleep(hold)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        # Queue commands one by one, so their order of arrival is known
+        _wait_for(lambda: self.scheduler.depth > waiting)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join(5)
+        assert not any(thread.is_alive() for thread in self.threads)
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+@pytest.fixture
+def client():
+    return Client("client-a", "a")
+
+def _held(scheduler: CommandScheduler, client: Client):
+    """Occupy the only socket of the scheduler until the returned event is set."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        _current_client.set(client)
+        with scheduler.slot("MOVE_ENTITY"):
+            started.set()
+            release.wait(5)
+    threading.Thread(target=hold, daemon=True).start()
+    started.wait(5)
+    return release
+
+def test_most_urgent_class_goes_first(client):
+    scheduler = CommandScheduler(aging_seconds=0, capacity=1)
+    release = _held(scheduler, client)
+    run = _Run(scheduler)
+    run.command("heavy", "CAPTURE_VIEW", client)
+    run.command("edit", "MOVE_ENTITY", client)
+    run.command("read", "GET_ENTITY_PROPERTIES", client)
+    assert scheduler.waiting(CommandClass.HEAVY) == 1 and scheduler.load == 4
+    release.set()
+    run.join()
+    assert run.order == ["read", "edit", "heavy"]
+
+def test_session_commands_keep_their_order(client):
+    scheduler = CommandScheduler(aging_seconds=0, capacity=1)
+    release = _held(scheduler, client)
+    run = _Run(scheduler)
+    run.command("first", "CAPTURE_VIEW", client, session="s")
+    run.command("second", "GET_ENTITY_PROPERTIES", client, session="s")
+    run.command("other", "MOVE_ENTITY", client)
+    release.set()
+    run.join()
+    assert run.order.index("first") < run.order.index("second")
+    assert run.order[0] == "other"
+
+def test_clients_share_the_connection_fairly():
+    scheduler = CommandScheduler(aging_seconds=0, capacity=1)
+    busy, quiet = Client("client-busy", "busy"), Client("client-quiet", "quiet")
+    release = _held(scheduler, busy)
+    run = _Run(scheduler)
+    for i in range(3):
+        run.command(f"busy-{i}", "GET_ENTITY_PROPERTIES", busy)
+    run.command("quiet", "GET_ENTITY_PROPERTIES", quiet)
+    load = scheduler.client_load()
+    assert load["client-busy"]["waiting"] == 3 and load["client-busy"]["running"] == 1
+    assert load["client-quiet"] == {"waiting": 1, "running": 0, "virtualTime": 0.0}
+    release.set()
+    run.join()
+    # The busy client has used the connection already, so the quiet one is next
+    assert run.order[0] == "quiet"
+
+def test_client_holds_at_most_its_share_of_sockets(client, monkeypatch):
+    from config import config
+    monkeypatch.setattr(config, "client_max_commands", 1)
+    scheduler = CommandScheduler(aging_seconds=0, capacity=2)
+    release = _held(scheduler, client)
+    run = _Run(scheduler)
+    run.command("next", "GET_ENTITY_PROPERTIES", client)
+    time.sleep(0.05)
+    assert run.order == []
+    release.set()
+    run.join()
+    assert run.order == ["next"]
+
+def test_cancelled_command_leaves_the_queue(client):
+    scheduler = CommandScheduler(aging_seconds=0, capacity=1)
+    release = _held(scheduler, client)
+    scope = CallScope()
+    errors = []
+
+    def run():
+        _current_client.set(client)
+        _current_scope.set(scope)
+        try:
+            with scheduler.slot("MOVE_ENTITY"):
+                pass
+        except CommandCancelledError as e:
+            errors.append(e)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    _wait_for(lambda: scheduler.depth == 1)
+    scope.cancelled = True
+    scheduler.wake()
+    thread.join(5)
+    assert len(errors) == 1 and scheduler.depth == 0
+    release.set()
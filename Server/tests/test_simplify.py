@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from simplify import polyline_deviation, reduce_fit_points, simplify_polyline
+
+def _noisy_curve(count=500, noise=0.01, seed=1):
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 4 * np.pi, count)
+    return np.column_stack([t, np.sin(t) + rng.uniform(-noise, noise, count)])
+
+@pytest.mark.parametrize("method", ["rdp", "visvalingam"])
+def test_simplified_polyline_stays_within_tolerance(method):
+    points = _noisy_curve()
+    reduced = simplify_polyline(points, 0.05, method)
+    assert 2 < len(reduced.points) < len(points) / 4
+    assert reduced.max_deviation <= 0.05
+    assert np.array_equal(reduced.points[0], points[0]) and np.array_equal(reduced.points[-1], points[-1])
+
+def test_collinear_points_reduce_to_end_points():
+    points = [[0, 0], [1, 1], [2, 2], [3, 3]]
+    reduced = simplify_polyline(points, 0.0)
+    assert reduced.points.tolist() == [[0, 0], [3, 3]]
+    assert reduced.max_deviation == 0.0
+
+def test_closed_polyline_keeps_its_first_vertex_once():
+    square = [[0, 0], [1, 0], [2, 0], [2, 2], [0, 2]]
+    reduced = simplify_polyline(square, 0.01, closed=True)
+    assert reduced.points.tolist() == [[0, 0], [2, 0], [2, 2], [0, 2]]
+
+def test_short_polylines_are_unchanged():
+    assert simplify_polyline([[0, 0], [1, 1]], 1.0).points.tolist() == [[0, 0], [1, 1]]
+
+@pytest.mark.parametrize("args", [([[0, 0, 0, 0]], 1.0), ([[0, 0], [1, 1], [2, 0]], -1.0)])
+def test_invalid_arguments(args):
+    with pytest.raises(ValueError):
+        simplify_polyline(*args)
+    with pytest.raises(ValueError):
+        simplify_polyline([[0, 0], [1, 1], [2, 0]], 1.0, "douglas")
+
+def test_polyline_deviation():
+    points = np.array([[0, 0], [1, 1], [2, 0]], dtype=float)
+    assert polyline_deviation(points, np.array([0, 2])) == pytest.approx(1.0)
+    assert polyline_deviation(points, np.array([0, 1, 2])) == 0.0
+
+def test_fit_points_are_a_subset_within_tolerance():
+    t = np.linspace(0, 2 * np.pi, 200)
+    points = np.column_stack([np.cos(t) * 10, np.sin(t) * 5, t])
+    reduced = reduce_fit_points(points, 0.01)
+    assert len(reduced.points) < 40
+    assert reduced.max_deviation <= 0.01
+    assert all(any(np.array_equal(point, source) for source in points) for point in reduced.points)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from snapping import SNAP_KINDS, KDTree, SnapIndex
+
+def _nearest(points, point, k):
+    distances = ((points - point) ** 2).sum(axis=1)
+    return sorted(zip(distances.tolist(), range(len(points))))[:k]
+
+def test_query_matches_brute_force():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(-50, 50, (2000, 3))
+    tree = KDTree(points)
+    for point in rng.uniform(-60, 60, (20, 3)):
+        found = tree.query(point, 5)
+        expected = _nearest(points, point, 5)
+        assert [index for _, index in found] == [index for _, index in expected]
+        assert np.allclose([distance for distance, _ in found], [distance for distance, _ in expected])
+
+def test_query_respects_accept_mask_and_max_distance():
+    rng = np.random.default_rng(2)
+    points = rng.uniform(0, 10, (500, 3))
+    accept = np.arange(len(points)) % 2 == 0
+    found = KDTree(points).query([5, 5, 5], 10, accept=accept, max_distance=2.0)
+    assert all(index % 2 == 0 for _, index in found)
+    assert all(distance <= 4.0 for distance, _ in found)
+    within = [(d, i) for d, i in _nearest(points, np.array([5, 5, 5]), len(points)) if i % 2 == 0 and d <= 4.0]
+    assert [index for _, index in found] == [index for _, index in within[:10]]
+
+def test_query_of_empty_tree():
+    assert KDTree(np.empty((0, 3))).query([0, 0, 0], 3) == []
+
+def _codes(*kinds):
+    return np.array([SNAP_KINDS.index(kind) for kind in kinds], dtype=np.uint8)
+
+def _index():
+    index = SnapIndex()
+    index.rebuild(np.array([[0.0, 0, 0], [10, 0, 0], [5, 0, 0]]), np.array([1, 1, 2], dtype=np.int64),
+                  _codes("endpoint", "endpoint", "center"))
+    return index
+
+def test_nearest_filters_kinds():
+    index = _index()
+    assert index.nearest([4, 0], 1)[0] == {"point": [5.0, 0.0, 0.0], "kind": "center", "handle": 2, "distance": 1.0}
+    assert index.nearest([4, 0], 1, kinds=["endpoint"])[0]["handle"] == 1
+    with pytest.raises(ValueError):
+        index.nearest([0, 0], 1, kinds=["tangent"])
+
+def test_inserted_points_are_found_until_removed():
+    index = _index()
+    index.insert(np.array([[4.0, 0.5, 0]]), np.array([3], dtype=np.int64), _codes("node"))
+    assert len(index) == 4
+    assert index.nearest([4, 0, 0], 1)[0]["handle"] == 3
+    index.remove([3, 2])
+    assert len(index) == 2
+    assert [result["handle"] for result in index.nearest([4, 0, 0], 3)] == [1, 1]
+
+def test_nearest_limits_distance():
+    assert _index().nearest([20, 0, 0], 3, max_distance=10.5) == [
+        {"point": [10.0, 0.0, 0.0], "kind": "endpoint", "handle": 1, "distance": 10.0}
+    ]
+
+def test_compact_rebuilds_from_live_points():
+    index = _index()
+    index.insert(np.array([[1.0, 1, 1]]), np.array([4], dtype=np.int64), _codes("grip"))
+    index.remove([2])
+    index.compact(force=True)
+    assert len(index) == 3
+    assert sorted(index._handles.tolist()) == [1, 1, 4]
+    assert index.nearest([1, 1, 1], 1)[0]["kind"] == "grip"
@@ -0,0 +1,36 @@
+import pytest
+
+from config import config
+from timeouts import AdaptiveTimeouts
+
+@pytest.fixture
+def timeouts():
+    return AdaptiveTimeouts(window=50, min_samples=5)
+
+def test_budget_until_enough_samples(timeouts):
+    for _ in range(4):
+        timeouts.record("MOVE_ENTITY", 0.1)
+    assert timeouts.timeout_for("MOVE_ENTITY") == config.edit_timeout
+    assert timeouts.timeout_for("CAPTURE_VIEW") == config.heavy_timeout
+
+def test_timeout_follows_latencies_of_its_type(timeouts):
+    for _ in range(20):
+        timeouts.record("MOVE_ENTITY", 1.0)
+        timeouts.record("GET_ENTITY_PROPERTIES", 0.001)
+    moved = timeouts.timeout_for("MOVE_ENTITY")
+    assert moved == min(config.edit_timeout, max(config.min_timeout, config.timeout_multiplier))
+    assert timeouts.timeout_for("GET_ENTITY_PROPERTIES") == config.min_timeout
+    assert timeouts.describe() == {"GET_ENTITY_PROPERTIES": config.min_timeout, "MOVE_ENTITY": moved}
+
+def test_pings_are_not_recorded(timeouts):
+    for _ in range(10):
+        timeouts.record("ping", 5.0)
+    assert timeouts.percentile("ping", 50) is None
+    assert timeouts.describe() == {}
+
+def test_percentile(timeouts):
+    for latency in range(1, 11):
+        timeouts.record("MOVE_ENTITY", float(latency))
+    assert timeouts.percentile("MOVE_ENTITY", 0) == 1.0
+    assert timeouts.percentile("MOVE_ENTITY", 90) == 9.0
+    assert timeouts.percentile("MOVE_ENTITY", 100) == 10.0
@@ -0,0 +1,83 @@
+"""
+Adaptive per-command timeouts.
+
+Each command class has a fixed timeout budget. Once enough latencies have been
+observed for a command type, its timeout shrinks to a multiple of a high
+percentile of its recent latencies, never dropping below a floor or exceeding
+the budget of its class. Reading one entity should not be allowed the same five minutes as
+a boolean union.
+
+Latencies are kept per command type rather than per class: a class mixes
+commands whose costs differ by orders of magnitude (a GET_ENTITY_PROPERTIES of
+one entity and an EXPORT_ENTITIES_PAGE of thousands), and pooling them would
+let the cheap ones shrink the timeout of the expensive ones. Pings are
+connection probes and are not recorded.
+
+The adaptive timeout only bounds how long a command may wait for AutoCAD to
+start on it. A command that times out while AutoCAD already executes it cannot
+be withdrawn, so it is waited for until the budget of its class instead (see
+AutoCADConnection._await_response).
+"""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+from config import config
+from scheduler import CommandClass, classify
+
+# Commands whose latencies are not recorded
+UNRECORDED_COMMANDS = {"ping"}
+
+class AdaptiveTimeouts:
+    """Tracks recent command latencies and derives per-command timeouts from them."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def budget(command_type: str) -> float:
+        """The configured upper bound for the class of a command type."""
+        return {
+            CommandClass.READ: config.read_timeout,
+            CommandClass.EDIT: config.edit_timeout,
+            CommandClass.HEAVY: config.heavy_timeout,
+        }[classify(command_type)]
+
+    def record(self, command_type: str, seconds: float):
+        """Record the latency of a completed command."""
+        if command_type in UNRECORDED_COMMANDS:
+            return
+        with self._lock:
+            latencies = self._latencies.get(command_type)
+            if latencies is None:
+                latencies = self._latencies[command_type] = deque(maxlen=self.window)
+            latencies.append(seconds)
+
+    def percentile(self, command_type: str, percentile: float) -> Optional[float]:
+        """The given percentile (0-100) of recent latencies of a command type, or None without enough samples."""
+        with self._lock:
+            samples = sorted(self._latencies.get(command_type, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def timeout_for(self, command_type: str) -> float:
+        """The timeout to apply to the next command of a type."""
+        budget = self.budget(command_type)
+        observed = self.percentile(command_type, config.timeout_percentile)
+        if observed is None:
+            return budget
+        return min(budget, max(config.min_timeout, observed * config.timeout_multiplier))
+
+    def describe(self) -> Dict[str, float]:
+        """The current timeout of every command type observed."""
+        with self._lock:
+            command_types = sorted(self._latencies)
+        return {command_type: self.timeout_for(command_type) for command_type in command_types}
+
+# Latencies are shared by all connections
+timeouts = AdaptiveTimeouts()
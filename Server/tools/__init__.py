@@ -7,6 +7,12 @@ from .curve_editing_tools import register_curve_editing_tools
 from .solid_editing_tools import register_solid_editing_tools
 from .text_tools import register_text_tools
 from .view_tools import register_view_tools
+from .session_tools import register_session_tools
+from .target_tools import register_target_tools
+from .bulk_tools import register_bulk_tools
+from .snap_tools import register_snap_tools
+from .job_tools import register_job_tools
+from .diagnostic_tools import register_diagnostic_tools
 
 def register_all_tools(mcp):
     """Register all tools with the MCP server."""
@@ -19,3 +25,9 @@ def register_all_tools(mcp):
     register_solid_editing_tools(mcp)
     register_text_tools(mcp)
     register_view_tools(mcp)
+    register_session_tools(mcp)
+    register_target_tools(mcp)
+    register_bulk_tools(mcp)
+    register_snap_tools(mcp)
+    register_job_tools(mcp)
+    register_diagnostic_tools(mcp)
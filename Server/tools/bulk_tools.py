@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+from typing import Any, Dict
+import anyio
+from mcp.server.fastmcp import FastMCP, Context
+from autocad_connection import get_autocad_connection
+import geometry_io
+
+logger = logging.getLogger("AutoCADMCP")
+
+def _report_progress(ctx: Context, progress: float, total: float):
+    """Report progress to the client from a tool running in a worker thread."""
+    try:
+        anyio.from_thread.run(ctx.report_progress, progress, total)
+    except Exception as e:
+        # Progress is informational; failing to report it must not abort the tool
+        logger.debug(f"Could not report progress: {str(e)}")
+
+def register_bulk_tools(mcp: FastMCP):
+    """Register all bulk import and export tools with the MCP server."""
+
+    @mcp.tool()
+    def import_geometry(
+        ctx: Context,
+        path: str,
+        file_format: str = None,
+        default_type: str = "point",
+        chunk_size: int = 1000,
+        max_in_flight: int = 2
+    ) -> Dict[str, Any]:
+        """Import points, lines, polylines, circles and boxes from a local CSV, JSON-lines or NPZ file.
+        The file is read and sent to AutoCAD chunk by chunk, so files of any size can be imported.
+
+        CSV files need a header row. A type column (point, line, polyline, polyline3d, circle or box) selects the
+        entity of each row, defaulting to default_type. Points and polyline vertices use the columns x, y, z;
+        consecutive polyline rows with the same id form one polyline. Lines use x1, y1, z1, x2, y2, z2, circles
+        x, y, z, radius, and boxes x, y, z, length, width, height. An optional layer column sets the layer.
+
+        JSON-lines files hold one record per line, such as {"type": "point", "position": [x, y, z]},
+        {"type": "line", "start": [...], "end": [...]}, {"type": "polyline", "points": [[...], ...], "closed": false},
+        {"type": "circle", "center": [...], "radius": r} or {"type": "box", "center": [...], "size": [l, w, h]}.
+
+        NPZ files hold arrays named points (n, 3), lines (n, 6), circles (n, 4), boxes (n, 6), or polylines /
+        polylines3d vertices (m, 3) with polyline_offsets / polyline3d_offsets of length n + 1.
+
+        Args:
+            ctx: The MCP context
+            path: Path of the file to import
+            file_format: "csv", "jsonl" or "npz" (optional, inferred from the file extension)
+            default_type: Entity type of CSV rows and JSON records without a type (optional, defaults to "point")
+            chunk_size: Number of entities created per request (optional, defaults to 1000)
+            max_in_flight: Number of chunks read ahead while AutoCAD creates the current one (optional, defaults to 2)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the number of entities created in total and per type, the handle
+            ranges [first, last] of the created entities, and the error that stopped the import, if any
+        """
+        try:
+            chunks = geometry_io.read_geometry(path, file_format, default_type, chunk_size)
+        except Exception as e:
+            return f"Error importing geometry: {str(e)}"
+
+        summary = {"count": 0, "countByType": {}, "handleRanges": [], "chunks": 0}
+        ranges = []
+
+        def create(chunk: geometry_io.Chunk, regen: bool):
+            nonlocal ranges
+            response = autocad.send_command("BULK_CREATE", {
+                "groups": [group.encode() for group in chunk.groups],
+                "regen": regen
+            })
+
+            if not response.get("success", False):
+                raise Exception(response.get("error", "Unknown error"))
+
+            for group in response.get("result", {}).get("groups", []):
+                summary["count"] += group["count"]
+                summary["countByType"][group["type"]] = summary["countByType"].get(group["type"], 0) + group["count"]
+                ranges.extend(group["handles"])
+            ranges = geometry_io.merge_ranges(ranges)
+            summary["chunks"] += 1
+            _report_progress(ctx, chunk.position, chunk.total)
+
+        try:
+            autocad = get_autocad_connection()
+            # Every chunk is held back until the next one is read, so that only the
+            # last chunk regenerates the drawing
+            pending = None
+            for chunk in geometry_io.prefetch(chunks, max_in_flight):
+                if pending is not None:
+                    create(pending, regen=False)
+                pending = chunk
+            if pending is not None:
+                create(pending, regen=True)
+        except Exception as e:
+            summary["error"] = f"Error importing geometry: {str(e)}"
+
+        summary["handleRanges"] = ranges
+        return summary
+
+    @mcp.tool()
+    def export_entities(
+        ctx: Context,
+        directory: str,
+        file_format: str = "auto",
+        page_size: int = 5000
+    ) -> Dict[str, Any]:
+        """Export the handles, layers, colors, extents and key geometry of all model space entities to local columnar files,
+        one table per entity type, for analysis outside AutoCAD. Entities are fetched page by page, so drawings of
+        any size can be exported.
+
+        With file_format "npy", every table is a directory of .npy column files (handle, layer, color, extents and
+        geometry columns such as start_x or radius) that can be memory-mapped with numpy.load(path, mmap_mode="r").
+        With "parquet", every table is one Parquet file. Layers are stored as codes into the manifest's layer list
+        in .npy exports, and as strings in Parquet exports. Colors are AutoCAD color indices, 256
+        meaning by layer. A manifest.json describes all files.
+
+        Args:
+            ctx: The MCP context
+            directory: Directory to write the export to
+            file_format: "npy", "parquet" or "auto" (optional, defaults to "auto": Parquet if pyarrow is installed)
+            page_size: Number of entities fetched per request (optional, defaults to 5000)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the path of the manifest, the format, the number of exported
+            entities per type, and whether the drawing was unchanged during the export
+        """
+        try:
+            writer = geometry_io.open_export_writer(directory, file_format)
+        except Exception as e:
+            return f"Error exporting entities: {str(e)}"
+
+        try:
+            autocad = get_autocad_connection()
+            cursor = 0
+            revisions = set()
+            while cursor is not None:
+                response = autocad.send_command("EXPORT_ENTITIES_PAGE", {
+                    "cursor": cursor,
+                    "pageSize": page_size
+                })
+
+                if not response.get("success", False):
+                    raise Exception(response.get("error", "Unknown error"))
+
+                page = response.get("result", {})
+                writer.write_page(page)
+                revisions.add(getattr(response, "revision_token", None))
+                cursor = page.get("nextCursor")
+                _report_progress(ctx, sum(writer.rows.values()), None)
+        except Exception as e:
+            writer.close()
+            return f"Error exporting entities: {str(e)}"
+
+        manifest = {
+            "format": writer.format,
+            "entityCount": sum(writer.rows.values()),
+            # Pages fetched while the drawing changed may miss or repeat entities
+            "consistent": len(revisions) == 1,
+            "revision": revisions.pop() if len(revisions) == 1 else None,
+            "extentColumns": list(geometry_io.EXTENT_COLUMNS),
+            "layers": writer.layers,
+            "tables": writer.close()
+        }
+        manifest_path = os.path.join(directory, "manifest.json")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        return {
+            "manifest": manifest_path,
+            "format": manifest["format"],
+            "entityCount": manifest["entityCount"],
+            "countByType": dict(writer.rows),
+            "consistent": manifest["consistent"]
+        }
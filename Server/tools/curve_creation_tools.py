@@ -1,6 +1,15 @@
 from typing import Optional, List
 from mcp.server.fastmcp import FastMCP, Context
 from autocad_connection import get_autocad_connection
+from simplify import simplify_polyline, reduce_fit_points
+
+def _reduction_result(handle, before: int, reduction) -> dict:
+    return {
+        "handle": handle,
+        "verticesBefore": before,
+        "verticesAfter": len(reduction.points),
+        "maxDeviation": reduction.max_deviation
+    }
 
 def register_curve_creation_tools(mcp: FastMCP):
     """Register all curve management tools with the MCP server."""
@@ -68,26 +77,34 @@ def register_curve_creation_tools(mcp: FastMCP):
     @mcp.tool()
     def draw_polyline(
         ctx: Context,
-        points: List[List[float]]
+        points: List[List[float]],
+        tolerance: Optional[float] = None,
+        method: str = "rdp"
     ) -> int:
         """Draw a polyline in AutoCAD.
 
         Args:
             ctx: The MCP context
             points: List of point coordinates [[x1, y1, z1], [x2, y2, z2], ...]
+            tolerance: Optional distance within which vertices may be dropped before drawing
+            method: How vertices are dropped, "rdp" (Ramer-Douglas-Peucker) or "visvalingam"
 
         Returns:
-            int: Entity handle of the newly created polyline
+            int: Entity handle of the newly created polyline, or with a tolerance, the handle,
+                the vertex counts before and after simplification and the maximum deviation
         """
         try:
+            reduction = simplify_polyline(points, tolerance, method) if tolerance is not None else None
             autocad = get_autocad_connection()
             response = autocad.send_command("DRAW_POLYLINE", {
-                "points": points
+                "points": reduction.points.tolist() if reduction else points
             })
             
             if not response.get("success", False):
                 return f"Error drawing polyline: {response.get('error', 'Unknown error')}"
                 
+            if reduction:
+                return _reduction_result(response.get("result"), len(points), reduction)
             return response.get("result")
         except Exception as e:
             return f"Error drawing polyline: {str(e)}"
@@ -192,26 +209,34 @@ def register_curve_creation_tools(mcp: FastMCP):
     @mcp.tool()
     def draw_polyline3d(
         ctx: Context,
-        points: List[List[float]]
+        points: List[List[float]],
+        tolerance: Optional[float] = None,
+        method: str = "rdp"
     ) -> int:
         """Draw a 3D polyline in AutoCAD.
 
         Args:
             ctx: The MCP context
             points: List of vertex coordinates [[x1, y1, z1], [x2, y2, z2], ...]
+            tolerance: Optional distance within which vertices may be dropped before drawing
+            method: How vertices are dropped, "rdp" (Ramer-Douglas-Peucker) or "visvalingam"
 
         Returns:
-            int: Entity handle of the newly created 3D polyline
+            int: Entity handle of the newly created 3D polyline, or with a tolerance, the handle,
+                the vertex counts before and after simplification and the maximum deviation
         """
         try:
+            reduction = simplify_polyline(points, tolerance, method) if tolerance is not None else None
             autocad = get_autocad_connection()
             response = autocad.send_command("DRAW_POLYLINE3D", {
-                "points": points
+                "points": reduction.points.tolist() if reduction else points
             })
             
             if not response.get("success", False):
                 return f"Error drawing polyface: {response.get('error', 'Unknown error')}"
                 
+            if reduction:
+                return _reduction_result(response.get("result"), len(points), reduction)
             return response.get("result")
         except Exception as e:
             return f"Error drawing polyface: {str(e)}"
@@ -221,7 +246,8 @@ def register_curve_creation_tools(mcp: FastMCP):
         ctx: Context,
         points: List[List[float]],
         order: int,
-        fit_tolerance: float
+        fit_tolerance: float,
+        tolerance: Optional[float] = None
     ) -> int:
         """Draw a spline in AutoCAD. Creates a spline that attempts to fit an {order} degree curve to the array of points within the tolerance {fitTolerance}.
 
@@ -230,14 +256,18 @@ def register_curve_creation_tools(mcp: FastMCP):
             points: List of vertex coordinates [[x1, y1, z1], [x2, y2, z2], ...]
             order: The order of the spline
             fit_tolerance: The fit tolerance of the spline
+            tolerance: Optional distance within which the spline through fewer fit points
+                must still pass all given points; fit points are dropped before drawing
 
         Returns:
-            int: Entity handle of the newly created spline
+            int: Entity handle of the newly created spline, or with a tolerance, the handle,
+                the fit point counts before and after reduction and the maximum deviation
         """
         try:
+            reduction = reduce_fit_points(points, tolerance) if tolerance is not None else None
             autocad = get_autocad_connection()
             response = autocad.send_command("DRAW_SPLINE", {
-                "points": points,
+                "points": reduction.points.tolist() if reduction else points,
                 "order": order,
                 "fitTolerance": fit_tolerance
             })  
@@ -245,6 +275,8 @@ def register_curve_creation_tools(mcp: FastMCP):
             if not response.get("success", False):
                 return f"Error drawing spline: {response.get('error', 'Unknown error')}"
                 
+            if reduction:
+                return _reduction_result(response.get("result"), len(points), reduction)
             return response.get("result")
         except Exception as e:
             return f"Error drawing spline: {str(e)}"
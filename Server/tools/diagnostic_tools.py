@@ -0,0 +1,45 @@
+import logging
+from typing import Any, Dict
+from mcp.server.fastmcp import FastMCP, Context
+from config import config
+from clients import clients
+from request_log import request_log
+from timeouts import timeouts
+
+def register_diagnostic_tools(mcp: FastMCP):
+    """Register all diagnostic tools with the MCP server."""
+
+    @mcp.tool(routed=False)
+    def get_diagnostics(
+        ctx: Context,
+        limit: int = 50,
+        command: str = None,
+        failures_only: bool = False
+    ) -> Dict[str, Any]:
+        """Get the most recent requests sent to AutoCAD, with per-command latency statistics.
+        Use this to find out why calls are slow or failing.
+
+        Args:
+            ctx: The MCP context
+            limit: Maximum number of requests to return, newest first (optional, defaults to 50)
+            command: Only return requests of this bridge command, e.g. "SWEEP_SOLID" (optional)
+            failures_only: Only return requests that failed or timed out (optional, defaults to false)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the log settings and transport, the current adaptive timeout of every command type,
+            the connected MCP clients with their weights and running and waiting calls, count, failures and latencies
+            per command over the remembered requests, and the selected requests with their parameter summaries,
+            durations, outcomes, time spent in the bridge's queue and the client they were sent for
+        """
+        try:
+            return {
+                "logLevel": logging.getLevelName(logging.getLogger("AutoCADMCP").getEffectiveLevel()),
+                "logSampleEvery": config.log_sample_every,
+                "transport": config.transport,
+                "timeouts": timeouts.describe(),
+                "clients": [client.describe() for client in clients()],
+                "statistics": request_log.statistics(),
+                "requests": request_log.dump(limit, command, failures_only)
+            }
+        except Exception as e:
+            return f"Error getting diagnostics: {str(e)}"
@@ -1,6 +1,7 @@
 from typing import Optional, List, Dict, Any
 from mcp.server.fastmcp import FastMCP, Context
 from autocad_connection import get_autocad_connection
+import patterns
 
 def register_editing_tools(mcp: FastMCP):
     """Register all editing tools with the MCP server."""
@@ -248,40 +249,67 @@ def register_editing_tools(mcp: FastMCP):
         delta: List[float] = None,
         angle: float = None,
         axis: List[float] = None,
-        origin: List[float] = None
-    ) -> List[Dict[str, Any]]:
-        """Make an entity pattern in AutoCAD.
+        origin: List[float] = None,
+        rows: int = 1,
+        columns: int = 1,
+        levels: int = 1,
+        row_spacing: float = 0.0,
+        column_spacing: float = 0.0,
+        level_spacing: float = 0.0,
+        fill_angle: float = None,
+        rotate_items: bool = True,
+        base_point: List[float] = None,
+        path_points: List[List[float]] = None,
+        spacing: float = None,
+        align_items: bool = True
+    ) -> List[List[Dict[str, Any]]]:
+        """Make an entity pattern (array) in AutoCAD. All copies are created in a single operation.
 
         Args:
             ctx: The MCP context
             entity_handles: The handles of the entities to make a pattern of
-            count: The number of entities to create in the pattern. If count is 1, no entities will be created.
-            pattern_type: The type of pattern to create (linear, radial)
+            count: The number of entities in the pattern, including the original. If count is 1, no entities will be created. Ignored for rectangular patterns.
+            pattern_type: The type of pattern to create (linear, radial, rectangular, polar, path)
             delta: The distance between each entity in the pattern [x, y, z] (only for linear patterns)
-            angle: The angle to rotate the entities (in radians) (only for radial patterns)
-            axis: The axis to rotate the entities around [x, y, z] (only for radial patterns)
-            origin: The origin to rotate the entities around [x, y, z] (only for radial patterns)
+            angle: The angle between each entity (in radians) (only for radial and polar patterns)
+            axis: The axis to rotate the entities around [x, y, z] (only for radial and polar patterns, defaults to the z axis for polar patterns)
+            origin: The origin to rotate the entities around [x, y, z] (only for radial and polar patterns)
+            rows: The number of rows along the y axis (only for rectangular patterns)
+            columns: The number of columns along the x axis (only for rectangular patterns)
+            levels: The number of levels along the z axis (only for rectangular patterns)
+            row_spacing: The distance between rows (only for rectangular patterns)
+            column_spacing: The distance between columns (only for rectangular patterns)
+            level_spacing: The distance between levels (only for rectangular patterns)
+            fill_angle: The total angle covered by the pattern (in radians), used instead of angle (only for polar patterns)
+            rotate_items: Whether copies are rotated as they are placed (only for polar patterns)
+            base_point: The reference point of the original entities [x, y, z] (required for polar patterns when rotate_items is false, optional for path patterns)
+            path_points: The vertices of the path to place the copies along [[x1, y1, z1], [x2, y2, z2], ...] (only for path patterns)
+            spacing: The distance along the path between copies, evenly distributed over the whole path if omitted (only for path patterns)
+            align_items: Whether copies are rotated to follow the path direction (only for path patterns)
 
         Returns:
-            List[Dict[str, Any]]: List of dictionaries containing the properties of the newly created entities
+            List[List[Dict[str, Any]]]: For each input entity, a list of dictionaries containing the handle and type of the newly created entities
         """
         try:
-            autocad = get_autocad_connection()
-
-            properties = {
-                "entityIds": entity_handles,
-                "count": count,
-                "patternType": pattern_type
-            }
-
             if pattern_type == "linear":
-                properties["delta"] = delta
+                transforms = patterns.linear_transforms(count, delta)
             elif pattern_type == "radial":
-                properties["angle"] = angle
-                properties["axis"] = axis
-                properties["origin"] = origin
+                transforms = patterns.radial_transforms(count, angle, axis, origin)
+            elif pattern_type == "rectangular":
+                transforms = patterns.rectangular_transforms(rows, columns, levels, row_spacing, column_spacing, level_spacing)
+            elif pattern_type == "polar":
+                transforms = patterns.polar_transforms(count, origin, axis, angle, fill_angle, rotate_items, base_point)
+            elif pattern_type == "path":
+                transforms = patterns.path_transforms(path_points, count, spacing, base_point, align_items)
+            else:
+                return f"Error making entity pattern: Invalid pattern type: {pattern_type}"
 
-            response = autocad.send_command("MAKE_ENTITY_PATTERN", properties)
+            autocad = get_autocad_connection()
+            response = autocad.send_command("ARRAY_ENTITIES", {
+                "entityIds": entity_handles,
+                "transformCount": len(transforms),
+                "transforms": patterns.encode_transforms(transforms)
+            })
 
             if not response.get("success", False):
                 return f"Error making entity pattern: {response.get('error', 'Unknown error')}"
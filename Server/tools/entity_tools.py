@@ -1,6 +1,10 @@
 from typing import Any, Dict, List
+import numpy as np
 from mcp.server.fastmcp import FastMCP, Context
 from autocad_connection import get_autocad_connection
+from mirror import get_mirror
+from filters import compile_filter
+import measurements
 
 def register_entity_tools(mcp: FastMCP):
     """Register all entity-related tools with the MCP server."""
@@ -14,7 +18,7 @@ def register_entity_tools(mcp: FastMCP):
         """
         try:
             autocad = get_autocad_connection()
-            response = autocad.send_command("GET_ALL_ENTITIES")
+            response = autocad.send_conditional("GET_ALL_ENTITIES")
 
             if not response.get("success", False):
                 return f"Error getting all entities: {response.get('error', 'Unknown error')}"
@@ -23,6 +27,31 @@ def register_entity_tools(mcp: FastMCP):
         except Exception as e:
             return f"Error getting all entities: {str(e)}"
 
+    @mcp.tool()
+    def get_changes_since(ctx: Context, revision: str = None) -> Dict[str, Any]:
+        """Get the entities added, modified and erased since a revision of the current drawing, by the user or by tools.
+        Call it without a revision to get the current one, and pass that to a later call to find out what changed.
+
+        Args:
+            ctx: The MCP context
+            revision: Revision returned by a previous call (optional, defaults to none)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the current revision, the handles of the added, modified and erased
+            entities, and resync, which is true if no revision was given or the changes since it are no longer known,
+            in which case the drawing has to be re-read with get_all_entities
+        """
+        try:
+            autocad = get_autocad_connection()
+            response = autocad.send_command("GET_CHANGES_SINCE", {"since": revision} if revision else {})
+
+            if not response.get("success", False):
+                return f"Error getting changes: {response.get('error', 'Unknown error')}"
+
+            return response.get("result")
+        except Exception as e:
+            return f"Error getting changes: {str(e)}"
+
     @mcp.tool()
     def get_selected_entities(ctx: Context) -> List[int]:
         """Get all selected entities in the current drawing.
@@ -41,6 +70,137 @@ def register_entity_tools(mcp: FastMCP):
         except Exception as e:
             return f"Error getting selected entities: {str(e)}"
 
+    @mcp.tool()
+    def select_entities(ctx: Context, expression: str, limit: int = 1000) -> Dict[str, Any]:
+        """Select model space entities matching a filter expression. Only the handles of matching entities are
+        returned, so this is much cheaper than reading all entities and filtering them.
+
+        Expressions combine comparisons with and, or, not and parentheses, for example
+        'type == Circle and layer == "HOLES" and radius < 5' or 'type in (Line, Arc) and not Length > 10'.
+        type, layer and color (a color index, 256 meaning ByLayer) are compared with ==, != or in (...). Any other
+        name is an entity property such as Radius, Length, Area or StartPoint.X, compared with ==, !=, <, <=, > or >=.
+        Entities without the property do not match.
+
+        Args:
+            ctx: The MCP context
+            expression: The filter expression
+            limit: Maximum number of handles returned (optional, defaults to 1000)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the number of matching entities and the handles of the first limit of them
+        """
+        try:
+            compiled = compile_filter(expression)
+        except ValueError as e:
+            return f"Error in filter expression: {str(e)}"
+
+        try:
+            autocad = get_autocad_connection()
+            response = autocad.send_conditional("SELECT_ENTITIES", {**compiled.to_params(), "limit": limit})
+
+            if not response.get("success", False):
+                return f"Error selecting entities: {response.get('error', 'Unknown error')}"
+
+            result = response.get("result")
+            return {**result, "truncated": result["count"] > len(result["handles"])}
+        except Exception as e:
+            return f"Error selecting entities: {str(e)}"
+
+    @mcp.tool()
+    def measure_entities(
+        ctx: Context,
+        entity_handles: List[int] = None,
+        expression: str = None,
+        quantities: List[str] = None
+    ) -> Dict[str, Any]:
+        """Measure lengths of curves, areas of closed curves, regions and solids, volumes of solids, centroids and
+        bounding boxes of entities. Measurements are remembered, so measuring unchanged entities again is cheap.
+
+        Args:
+            ctx: The MCP context
+            entity_handles: The handles of the entities to measure (optional if expression is given)
+            expression: Filter expression selecting the entities to measure, as in select_entities (optional)
+            quantities: Quantities to return, any of "length", "area", "volume", "centroid" and "extents"
+                (optional, defaults to all)
+
+        Returns:
+            Dict[str, Any]: Dictionary of columns: the handles of the measured entities and, for each quantity, a list
+            with one value per handle, null where the quantity does not apply (centroids are [x, y, z] and extents
+            [min_x, min_y, min_z, max_x, max_y, max_z]), plus the handles of entities that do not exist
+        """
+        quantities = quantities or list(measurements.QUANTITIES)
+        unknown = [q for q in quantities if q not in measurements.QUANTITIES]
+        if unknown:
+            return f"Error measuring entities: unknown quantities {', '.join(unknown)}"
+        if entity_handles is None and expression is None:
+            return "Error measuring entities: entity_handles or expression is required"
+
+        try:
+            autocad = get_autocad_connection()
+            handles = list(entity_handles or [])
+            if expression is not None:
+                response = autocad.send_conditional("SELECT_ENTITIES", compile_filter(expression).to_params())
+                if not response.get("success", False):
+                    return f"Error measuring entities: {response.get('error', 'Unknown error')}"
+                handles.extend(response.get("result", {}).get("handles", []))
+
+            present, rows, missing, cached = measurements.measure(autocad, handles)
+            # NaN marks quantities that do not apply; JSON has no NaN, so they become null
+            values = np.where(np.isnan(rows), None, rows).tolist()
+            result = {"handles": present}
+            for quantity in quantities:
+                columns = measurements.QUANTITIES[quantity]
+                if columns.stop - columns.start == 1:
+                    result[quantity] = [row[columns.start] for row in values]
+                else:
+                    result[quantity] = [None if row[columns.start] is None else row[columns] for row in values]
+            result["missing"] = missing
+            result["memoised"] = cached
+            return result
+        except Exception as e:
+            return f"Error measuring entities: {str(e)}"
+
+    @mcp.tool()
+    def find_entities(
+        ctx: Context,
+        types: List[str] = None,
+        layers: List[str] = None,
+        colors: List[int] = None,
+        within: List[List[float]] = None,
+        intersecting: List[List[float]] = None,
+        limit: int = 1000
+    ) -> Dict[str, Any]:
+        """Find model space entities by type, layer, color and location.
+        The drawing is mirrored in the server, so repeated queries on an unchanged drawing are answered without
+        reading it again.
+
+        Args:
+            ctx: The MCP context
+            types: Entity types to include, such as "Line", "Circle" or "Polyline" (optional, defaults to all types)
+            layers: Layers to include (optional, defaults to all layers)
+            colors: Color indices to include, 256 meaning ByLayer and 0 ByBlock (optional, defaults to all colors)
+            within: Box [[min_x, min_y(, min_z)], [max_x, max_y(, max_z)]] the entities must lie in (optional)
+            intersecting: Box [[min_x, min_y(, min_z)], [max_x, max_y(, max_z)]] the entities must overlap (optional)
+            limit: Maximum number of entities listed (optional, defaults to 1000)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the number of matching entities in total and per type, and the
+            handle, type, layer, color and extents of the first limit of them
+        """
+        try:
+            autocad = get_autocad_connection()
+            mirror = get_mirror(autocad)
+            mask = mirror.mask(types=types, layers=layers, colors=colors, within=within, intersecting=intersecting)
+            indices = mask.nonzero()[0]
+            return {
+                "count": len(indices),
+                "countByType": mirror.count_by("type", mask),
+                "entities": [row.to_dict() for row in mirror.rows(indices[:limit])],
+                "truncated": len(indices) > limit
+            }
+        except Exception as e:
+            return f"Error finding entities: {str(e)}"
+
     @mcp.tool()
     def get_entity_properties(ctx: Context, entity_handles: List[int]) -> List[Dict[str, Any]]:
         """Get properties of an entity.
@@ -50,7 +210,7 @@ def register_entity_tools(mcp: FastMCP):
         """
         try:
             autocad = get_autocad_connection()
-            response = autocad.send_command("GET_ENTITY_PROPERTIES", {
+            response = autocad.send_conditional("GET_ENTITY_PROPERTIES", {
                 "entityIds": entity_handles
             })
 
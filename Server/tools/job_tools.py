@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from typing import Any, Dict, List
+from mcp.server.fastmcp import FastMCP, Context
+from config import config
+from jobs import jobs
+
+logger = logging.getLogger("AutoCADMCP")
+
+# Tools that manage jobs cannot themselves run as one
+_JOB_TOOLS = {"submit_job", "job_status", "await_job", "cancel_job", "list_jobs"}
+
+def register_job_tools(mcp: FastMCP):
+    """Register all background job tools with the MCP server."""
+
+    @mcp.tool(routed=False)
+    async def submit_job(ctx: Context, tool: str, arguments: Dict[str, Any] = None, target: str = None) -> Dict[str, Any]:
+        """Run any tool call in the background and return at once. Use this for long-running work such as
+        sweeps, booleans on many solids, extruding many regions or large patterns, and do other work meanwhile.
+        The modifying AutoCAD commands of the call report their progress, and partial results for every item
+        they finish, which job_status and await_job return.
+
+        Args:
+            ctx: The MCP context
+            tool: Name of the tool to run
+            arguments: Arguments of the tool call (optional)
+            target: AutoCAD instance and document to run the call on, as "endpoint/document" (optional)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the job id and status of the job
+        """
+        try:
+            tools = {t.name: t for t in await mcp.list_tools()}
+            if tool not in tools or tool in _JOB_TOOLS:
+                return f"Error submitting job: unknown tool {tool}"
+            arguments = dict(arguments or {})
+            if target is not None:
+                properties = tools[tool].inputSchema.get("properties", {})
+                arguments["autocad_target" if "autocad_target" in properties else "target"] = target
+
+            job = jobs.submit(tool, arguments, lambda: mcp.call_tool(tool, arguments))
+            return job.describe()
+        except Exception as e:
+            return f"Error submitting job: {str(e)}"
+
+    @mcp.tool(routed=False)
+    def job_status(ctx: Context, job_id: str, since: int = 0) -> Dict[str, Any]:
+        """Get the status and progress of a job started by submit_job.
+
+        Args:
+            ctx: The MCP context
+            job_id: The id of the job
+            since: Index of the first partial result to return, e.g. the nextIndex of the previous status (optional, defaults to 0)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the status, the AutoCAD command being run, its progress (done of total),
+            the partial results from index since, the index of the next partial result, and any error of the job.
+            Partial results of a command that fails or is cancelled are rolled back with it.
+        """
+        try:
+            return jobs.get(job_id).describe(since)
+        except Exception as e:
+            return f"Error getting job status: {str(e)}"
+
+    @mcp.tool(routed=False)
+    async def await_job(ctx: Context, job_id: str, timeout: float = None) -> List[Any]:
+        """Wait for a job started by submit_job to finish, reporting its progress meanwhile.
+
+        Args:
+            ctx: The MCP context
+            job_id: The id of the job
+            timeout: Seconds to wait before returning the job's status instead (optional, waits until the job finishes)
+
+        Returns:
+            List[Any]: The results of the tool call once the job has finished, otherwise the status of the job
+        """
+        try:
+            job = jobs.get(job_id)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout if timeout is not None else None
+            while not job.task.done():
+                interval = config.job_progress_interval
+                if deadline is not None:
+                    interval = min(interval, deadline - loop.time())
+                    if interval <= 0:
+                        return [job.describe()]
+                # Waiting is not cancelling: the job keeps running if this call is cancelled
+                await asyncio.wait({job.task}, timeout=interval)
+                status = job.describe()
+                try:
+                    await ctx.report_progress(status["done"], status["total"])
+                except Exception as e:
+                    # Progress is informational; failing to report it must not abort the wait
+                    logger.debug(f"Could not report progress: {str(e)}")
+
+            if job.status == "completed":
+                return list(job.result)
+            return [job.describe()]
+        except Exception as e:
+            return f"Error awaiting job: {str(e)}"
+
+    @mcp.tool(routed=False)
+    def cancel_job(ctx: Context, job_id: str) -> Dict[str, Any]:
+        """Cancel a job started by submit_job. AutoCAD commands of the job that are still queued are withdrawn,
+        and a running command stops after the item it is working on, rolling back its changes.
+
+        Args:
+            ctx: The MCP context
+            job_id: The id of the job
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the status of the job
+        """
+        try:
+            job = jobs.get(job_id)
+            if not job.task.done():
+                job.task.get_loop().call_soon_threadsafe(job.task.cancel)
+            return job.describe()
+        except Exception as e:
+            return f"Error cancelling job: {str(e)}"
+
+    @mcp.tool(routed=False)
+    def list_jobs(ctx: Context) -> List[Dict[str, Any]]:
+        """List the jobs this client submitted, running and recently finished.
+
+        Args:
+            ctx: The MCP context
+
+        Returns:
+            List[Dict[str, Any]]: List of dictionaries containing the id, tool, status and progress of every job
+        """
+        try:
+            return [{key: value for key, value in job.describe().items() if key != "partialResults"} for job in jobs.list()]
+        except Exception as e:
+            return f"Error listing jobs: {str(e)}"
@@ -0,0 +1,88 @@
+from typing import Any, Dict
+from mcp.server.fastmcp import FastMCP, Context
+from autocad_connection import get_autocad_connection
+from config import config
+
+def register_session_tools(mcp: FastMCP):
+    """Register all transaction session tools with the MCP server."""
+
+    @mcp.tool()
+    def begin_session(ctx: Context, timeout: float = None) -> Dict[str, Any]:
+        """Begin a transaction session. Until the session is committed or aborted, all subsequent tool calls
+        run inside one document lock and transaction. The drawing is only regenerated once, on commit,
+        and the whole session forms a single undo step. Meanwhile other clients sharing the server can
+        only read the drawing.
+
+        Args:
+            ctx: The MCP context
+            timeout: Seconds of inactivity after which the session is aborted automatically (optional)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the session id and timeout
+        """
+        try:
+            autocad = get_autocad_connection()
+            timeout = timeout if timeout is not None else config.session_timeout
+            response = autocad.send_command("BEGIN_SESSION", {
+                "timeout": timeout
+            })
+
+            if not response.get("success", False):
+                return f"Error beginning session: {response.get('error', 'Unknown error')}"
+
+            # Commands of the session must reach the bridge in the order they were issued,
+            # and other clients must not mix their edits into it
+            autocad.begin_session(response.get("result", {}).get("sessionId"), timeout)
+            return response.get("result")
+        except Exception as e:
+            return f"Error beginning session: {str(e)}"
+
+    @mcp.tool()
+    def commit_session(ctx: Context, session_id: str) -> Dict[str, Any]:
+        """Commit a transaction session, keeping every change made since begin_session.
+
+        Args:
+            ctx: The MCP context
+            session_id: The id returned by begin_session
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the session id and the number of commands run in the session
+        """
+        try:
+            autocad = get_autocad_connection()
+            response = autocad.send_command("COMMIT_SESSION", {
+                "sessionId": session_id
+            })
+
+            if not response.get("success", False):
+                return f"Error committing session: {response.get('error', 'Unknown error')}"
+
+            autocad.end_session()
+            return response.get("result")
+        except Exception as e:
+            return f"Error committing session: {str(e)}"
+
+    @mcp.tool()
+    def abort_session(ctx: Context, session_id: str) -> Dict[str, Any]:
+        """Abort a transaction session, discarding every change made since begin_session.
+
+        Args:
+            ctx: The MCP context
+            session_id: The id returned by begin_session
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the session id and the number of commands discarded
+        """
+        try:
+            autocad = get_autocad_connection()
+            response = autocad.send_command("ABORT_SESSION", {
+                "sessionId": session_id
+            })
+
+            if not response.get("success", False):
+                return f"Error aborting session: {response.get('error', 'Unknown error')}"
+
+            autocad.end_session()
+            return response.get("result")
+        except Exception as e:
+            return f"Error aborting session: {str(e)}"
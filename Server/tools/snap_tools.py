@@ -0,0 +1,65 @@
+from typing import Any, Dict, List
+from mcp.server.fastmcp import FastMCP, Context
+from autocad_connection import get_autocad_connection
+from snapping import get_snap_index
+
+def register_snap_tools(mcp: FastMCP):
+    """Register all snap point tools with the MCP server."""
+
+    @mcp.tool()
+    def find_nearest_points(
+        ctx: Context,
+        point: List[float],
+        k: int = 1,
+        kinds: List[str] = None,
+        max_distance: float = None
+    ) -> List[Dict[str, Any]]:
+        """Find the snap points of model space entities nearest to a point, such as the nearest endpoint to attach a
+        dimension or curve to. Snap points are indexed in the server, so queries are fast even in large drawings.
+
+        Args:
+            ctx: The MCP context
+            point: The point to search from, as [x, y] or [x, y, z]
+            k: Number of snap points to return (optional, defaults to 1)
+            kinds: Kinds of snap points to consider: "endpoint" (ends and vertices of curves), "midpoint" (of lines,
+                arcs and polyline segments), "center" (of circles, arcs, ellipses and solids), "node" (points),
+                "insertion" (of blocks and text) and "grip" (grip points of other entities) (optional, defaults to all kinds)
+            max_distance: Maximum distance from point (optional, defaults to no limit)
+
+        Returns:
+            List[Dict[str, Any]]: List of dictionaries containing the point, kind, entity handle and distance of each
+            snap point, nearest first
+        """
+        try:
+            autocad = get_autocad_connection()
+            return get_snap_index(autocad).nearest(point, k, kinds, max_distance)
+        except Exception as e:
+            return f"Error finding nearest points: {str(e)}"
+
+    @mcp.tool()
+    def snap_point(
+        ctx: Context,
+        point: List[float],
+        tolerance: float,
+        kinds: List[str] = None
+    ) -> Dict[str, Any]:
+        """Snap a point to the nearest snap point of a model space entity within a tolerance, like object snaps do.
+
+        Args:
+            ctx: The MCP context
+            point: The point to snap, as [x, y] or [x, y, z]
+            tolerance: Maximum distance the point may move
+            kinds: Kinds of snap points to snap to, as in find_nearest_points (optional, defaults to all kinds)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the snapped point and whether it snapped, with the kind, entity handle
+            and distance of the snap point it snapped to
+        """
+        try:
+            autocad = get_autocad_connection()
+            nearest = get_snap_index(autocad).nearest(point, 1, kinds, tolerance)
+            if not nearest:
+                return {"point": list(point), "snapped": False}
+            return {**nearest[0], "snapped": True}
+        except Exception as e:
+            return f"Error snapping point: {str(e)}"
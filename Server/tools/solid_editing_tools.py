@@ -1,6 +1,12 @@
 from typing import Optional, List, Dict, Any
 from mcp.server.fastmcp import FastMCP, Context
+import numpy as np
 from autocad_connection import get_autocad_connection
+from mirror import get_mirror
+from interference import overlapping_pairs
+
+# Candidate pairs checked exactly per request
+_INTERFERENCE_BATCH = 500
 
 def register_solid_editing_tools(mcp: FastMCP):
     """Register all solid 3D editing tools with the MCP server."""
@@ -39,6 +45,61 @@ def register_solid_editing_tools(mcp: FastMCP):
         except Exception as e:
             return f"Error combining solids: {str(e)}"
 
+    @mcp.tool()
+    def find_interferences(
+        ctx: Context,
+        entities: List[int] = None,
+        tolerance: float = 0.0,
+        exact: bool = True
+    ) -> Dict[str, Any]:
+        """Find pairs of 3D solids in model space that interfere (overlap), without modifying them.
+        Bounding boxes of all solids are compared first, and only pairs whose boxes overlap are checked exactly
+        in AutoCAD, so this scales to thousands of solids.
+
+        Args:
+            ctx: The MCP context
+            entities: Handles of the solids to check against all others, such as newly created ones
+                (optional, defaults to checking all solids against each other)
+            tolerance: Clearance added around the bounding boxes of the broad phase (optional, defaults to 0). With exact
+                false, this reports pairs whose bounding boxes are closer than tolerance. The exact check only finds
+                solids that actually overlap, so with exact true a tolerance only adds candidates, never results.
+            exact: Whether to check candidate pairs exactly; if false, pairs with overlapping bounding boxes are returned (optional, defaults to true)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the number of solids, the number of candidate pairs whose bounding boxes
+            overlap, the handle pairs of the interfering solids, and with exact true, the handles that AutoCAD could not
+            check because they no longer exist or are not solids
+        """
+        try:
+            autocad = get_autocad_connection()
+            mirror = get_mirror(autocad)
+            rows = np.flatnonzero(mirror.mask(types=["Solid3d"]))
+            handles = mirror.handles[rows]
+            subset = np.isin(handles, entities) if entities is not None else None
+            candidates = handles[overlapping_pairs(mirror.extents[rows], tolerance, subset)].tolist()
+
+            if not exact:
+                return {"solids": len(rows), "candidates": len(candidates), "interfering": candidates, "exact": False}
+
+            interfering = []
+            invalid = set()
+            for start in range(0, len(candidates), _INTERFERENCE_BATCH):
+                response = autocad.send_command("CHECK_INTERFERENCE", {
+                    "pairs": candidates[start:start + _INTERFERENCE_BATCH]
+                })
+
+                if not response.get("success", False):
+                    return f"Error finding interferences: {response.get('error', 'Unknown error')}"
+
+                result = response.get("result", {})
+                interfering.extend(result.get("interfering", []))
+                invalid.update(result.get("invalid", []))
+
+            return {"solids": len(rows), "candidates": len(candidates), "interfering": interfering,
+                    "invalid": sorted(invalid), "exact": True}
+        except Exception as e:
+            return f"Error finding interferences: {str(e)}"
+
     @mcp.tool()
     def sweep_solid(
         ctx: Context,
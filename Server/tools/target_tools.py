@@ -0,0 +1,177 @@
+import socket
+from typing import Any, Dict, List, Optional
+import anyio
+from mcp.server.fastmcp import FastMCP, Context
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.types import TextContent
+from autocad_connection import AutoCADConnection, get_autocad_connection, get_registry
+from targets import Target, use_target
+from jobs import tool_content
+from warmup import warmup
+from config import config
+
+def register_target_tools(mcp: FastMCP):
+    """Register all tools managing AutoCAD instances and documents with the MCP server."""
+
+    @mcp.tool(routed=False)
+    def list_targets(ctx: Context, include_documents: bool = True) -> List[Dict[str, Any]]:
+        """List the registered AutoCAD instances (endpoints) and the documents open in them.
+        Any tool can be run on one of them by passing its target argument as "endpoint/document".
+
+        Args:
+            ctx: The MCP context
+            include_documents: Whether to ask every instance for its open documents (optional, defaults to true)
+
+        Returns:
+            List[Dict[str, Any]]: List of dictionaries containing the name, host, port, load and documents of every endpoint,
+            the state of its background connection and warm-up since startup, and for connected endpoints the
+            bridge's queue depth and queue wait of the last command, the waiting and running commands of every
+            MCP client sharing the connection, and the average queue wait and commands rejected by admission control
+        """
+        try:
+            targets = []
+            for endpoint in get_registry().endpoints():
+                info = {
+                    "name": endpoint.name,
+                    "host": endpoint.host,
+                    "port": endpoint.port,
+                    "connected": endpoint.connection is not None,
+                    "load": endpoint.load
+                }
+                status = warmup.status(endpoint.name)
+                if status is not None:
+                    info["warmup"] = status
+                if endpoint.connection is not None:
+                    info["bridgeQueueDepth"] = endpoint.connection.bridge_queue_depth
+                    info["bridgeQueueWaitMs"] = endpoint.connection.bridge_queue_wait_ms
+                    info["clients"] = endpoint.connection.scheduler.client_load()
+                    info["admission"] = endpoint.connection.admission.describe()
+                if include_documents:
+                    try:
+                        with use_target(Target(endpoint.name)):
+                            response = get_autocad_connection().send_command("GET_DOCUMENTS")
+                        info["connected"] = True
+                        info["documents"] = response.get("result", {}).get("documents")
+                    except Exception as e:
+                        info["error"] = str(e)
+                targets.append(info)
+            return targets
+        except Exception as e:
+            return f"Error listing targets: {str(e)}"
+
+    @mcp.tool(routed=False)
+    def add_target(ctx: Context, name: str, port: int, host: str = None) -> Dict[str, Any]:
+        """Register an AutoCAD instance under a name that can be used as target.
+
+        Args:
+            ctx: The MCP context
+            name: Name of the endpoint
+            port: Port of the MCP Bridge of the instance
+            host: Host of the instance (optional, defaults to the configured AutoCAD host)
+
+        Returns:
+            Dict[str, Any]: Dictionary containing the name, host and port of the endpoint
+        """
+        try:
+            endpoint = get_registry().add(name, host or config.autocad_host, port)
+            return {"name": endpoint.name, "host": endpoint.host, "port": endpoint.port}
+        except Exception as e:
+            return f"Error adding target: {str(e)}"
+
+    @mcp.tool(routed=False)
+    def remove_target(ctx: Context, name: str) -> bool:
+        """Unregister an AutoCAD instance.
+
+        Args:
+            ctx: The MCP context
+            name: Name of the endpoint
+
+        Returns:
+            bool: True if the endpoint was registered
+        """
+        try:
+            return get_registry().remove(name)
+        except Exception as e:
+            return f"Error removing target: {str(e)}"
+
+    @mcp.tool(routed=False)
+    def discover_targets(ctx: Context, host: str = None) -> List[Dict[str, Any]]:
+        """Find AutoCAD instances running the MCP Bridge and register the ones not registered yet.
+        A bridge whose port is taken by another instance listens on one of the following ports.
+
+        Args:
+            ctx: The MCP context
+            host: Host to probe (optional, defaults to the configured AutoCAD host)
+
+        Returns:
+            List[Dict[str, Any]]: List of dictionaries containing the name, host and port of every newly registered endpoint
+        """
+        try:
+            host = host or config.autocad_host
+            registry = get_registry()
+            discovered = []
+            for port in range(config.autocad_port, config.autocad_port + config.endpoint_scan_ports):
+                if registry.find(host, port) is not None:
+                    continue
+                probe = AutoCADConnection(host=host, port=port)
+                try:
+                    # Fail fast on ports nothing listens on
+                    probe.sock = socket.create_connection((host, port), timeout=config.cancel_timeout)
+                    probe.send_command("ping", timeout=config.cancel_timeout)
+                except Exception:
+                    continue
+                finally:
+                    probe.disconnect()
+                endpoint = registry.add(f"{host}:{port}", host, port)
+                discovered.append({"name": endpoint.name, "host": endpoint.host, "port": endpoint.port})
+            return discovered
+        except Exception as e:
+            return f"Error discovering targets: {str(e)}"
+
+    @mcp.tool(routed=False)
+    async def run_batch(ctx: Context, calls: List[Dict[str, Any]], max_parallel: int = 8) -> List[Any]:
+        """Run independent tool calls in parallel, spread over the AutoCAD instances.
+        Calls on different instances run at the same time, so for instance a batch of renders
+        with target "any" finishes faster the more instances are registered.
+
+        Args:
+            ctx: The MCP context
+            calls: List of calls, each a dictionary with the tool name ("tool"), its arguments ("arguments"),
+                and optionally the target to run it on ("target")
+            max_parallel: Maximum number of calls running at the same time (optional, defaults to 8)
+
+        Returns:
+            List[Any]: For every call, a line with its index, tool and target followed by the call's results
+        """
+        try:
+            tools = {tool.name: tool for tool in await mcp.list_tools()}
+            results: List[Optional[List[Any]]] = [None] * len(calls)
+            limiter = anyio.CapacityLimiter(max(1, max_parallel))
+
+            async def run(index: int, call: Dict[str, Any]):
+                name = call.get("tool")
+                target = call.get("target")
+                arguments = dict(call.get("arguments") or {})
+                if name not in tools or name == "run_batch":
+                    results[index] = [f"Error: unknown tool {name}"]
+                    return
+                if target is not None:
+                    properties = tools[name].inputSchema.get("properties", {})
+                    arguments["autocad_target" if "autocad_target" in properties else "target"] = target
+                async with limiter:
+                    try:
+                        results[index] = tool_content(await mcp.call_tool(name, arguments))
+                    except ToolError as e:
+                        results[index] = [f"Error: {str(e)}"]
+
+            async with anyio.create_task_group() as group:
+                for index, call in enumerate(calls):
+                    group.start_soon(run, index, call)
+
+            output = []
+            for index, (call, result) in enumerate(zip(calls, results)):
+                output.append(TextContent(type="text", text=f"[{index}] {call.get('tool')} on {call.get('target') or 'default'}:"))
+                output.extend(TextContent(type="text", text=item) if isinstance(item, str) else item for item in result)
+            return output
+        except Exception as e:
+            return f"Error running batch: {str(e)}"
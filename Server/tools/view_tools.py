@@ -1,6 +1,32 @@
-from typing import Optional, List, Dict, Any
-from mcp.server.fastmcp import FastMCP, Context
+import base64
+import threading
+from typing import Optional, List, Dict, Any, Union
+from mcp.server.fastmcp import FastMCP, Context, Image
 from autocad_connection import get_autocad_connection
+from render_cache import get_render_cache, make_render_key
+from config import config
+
+# Tool calls run in worker threads, so the state below is guarded by a lock
+_render_lock = threading.Lock()
+# View parameters of unfinished render jobs, so their images can be cached under the render
+# token the job reports once it has started
+_pending_renders: Dict[str, Dict[str, Any]] = {}
+_MAX_PENDING_RENDERS = 64
+
+def _render_job_result(job: Dict[str, Any]) -> Union[Image, Dict[str, Any]]:
+    """Return the finished image of a render job, or the job description while it is still pending."""
+    if job.get("status") == "completed" and job.get("imageData"):
+        data = base64.b64decode(job["imageData"])
+        token = job.get("renderToken")
+        with _render_lock:
+            parameters = _pending_renders.pop(job.get("jobId"), None)
+        if parameters is not None and token is not None:
+            get_render_cache().put(make_render_key(parameters, token), data)
+        return Image(data=data, format="png")
+    if job.get("status") == "failed":
+        with _render_lock:
+            _pending_renders.pop(job.get("jobId"), None)
+    return job
 
 def register_view_tools(mcp: FastMCP):
     """Register all view tools with the MCP server."""
@@ -13,8 +39,10 @@ def register_view_tools(mcp: FastMCP):
         view_direction: List[float],
         perspective_enabled: bool,
         lens_length: float = None,
-    ) -> Dict[str, Any]:
-        """Capture a view of the current viewport.
+        wait: bool = True,
+    ) -> Union[Image, Dict[str, Any]]:
+        """Capture a rendered view of the current viewport. Renders run as queued jobs in AutoCAD.
+        Repeated captures of the same view of an unchanged drawing are answered from a cache.
 
         Args:
             ctx: The MCP context
@@ -23,10 +51,16 @@ def register_view_tools(mcp: FastMCP):
             view_direction: The direction the view is facing (x, y, z)
             perspective_enabled: Whether to use a perspective camera
             lens_length: The lens length of the camera if perspective_enabled is true (optional, but required if perspective_enabled is true)
+            wait: Whether to wait for the render to finish and return the image (optional, defaults to true)
 
         Returns:
-            Dict[str, Any]: A dictionary containing the handle, type, and properties of the created view
+            Union[Image, Dict[str, Any]]: The rendered image if wait is true and the render finished in time,
+            otherwise a dictionary containing the job id, status, and output path of the render job.
+            Use get_render_job to retrieve the image of a pending job.
         """
+        if perspective_enabled and lens_length is None:
+            return "Error capturing view: lens_length is required when perspective_enabled is true"
+
         try:
             autocad = get_autocad_connection()
 
@@ -35,16 +69,77 @@ def register_view_tools(mcp: FastMCP):
                 "viewHeight": view_height,
                 "viewDirection": view_direction,
                 "perspectiveEnabled": perspective_enabled,
+                "outputDirectory": config.render_output_dir,
             }
 
             if perspective_enabled:
                 parameters["lensLength"] = lens_length
 
+            # Images are cached under the render token, which covers the drawing and the viewport's
+            # lighting. Reading it is a cheap read, so a cache hit does not queue a capture
+            response = autocad.send_command("GET_RENDER_TOKEN", {})
+            if not response.get("success", False):
+                return f"Error capturing view: {response.get('error', 'Unknown error')}"
+            cached = get_render_cache().get(make_render_key(parameters, response["result"]["renderToken"]))
+            if cached is not None:
+                return Image(data=cached, format="png")
+
             response = autocad.send_command("CAPTURE_VIEW", parameters)
 
             if not response.get("success", False):
                 return f"Error capturing view: {response.get('error', 'Unknown error')}"
-                
-            return response.get("result")
+
+            job = response.get("result")
+            with _render_lock:
+                _pending_renders[job["jobId"]] = parameters
+                while len(_pending_renders) > _MAX_PENDING_RENDERS:
+                    _pending_renders.pop(next(iter(_pending_renders)))
+
+            if not wait:
+                return job
+
+            # Waiting for the render happens on a side connection so it does not hold up other commands
+            response = autocad.send_immediate("GET_RENDER_JOB", {
+                "jobId": job["jobId"],
+                "wait": True,
+                "timeout": config.render_timeout
+            }, timeout=config.render_timeout + config.cancel_timeout)
+
+            if not response.get("success", False):
+                return f"Error capturing view: {response.get('error', 'Unknown error')}"
+
+            return _render_job_result(response.get("result"))
         except Exception as e:
             return f"Error capturing view: {str(e)}"
+
+    @mcp.tool()
+    def get_render_job(
+        ctx: Context,
+        job_id: str,
+        wait: bool = False,
+    ) -> Union[Image, Dict[str, Any]]:
+        """Get the status of a render job started by capture_view.
+
+        Args:
+            ctx: The MCP context
+            job_id: The id of the render job
+            wait: Whether to wait for the render to finish (optional, defaults to false)
+
+        Returns:
+            Union[Image, Dict[str, Any]]: The rendered image if the job has completed,
+            otherwise a dictionary containing the job id, status, queue position, and any error of the render job
+        """
+        try:
+            autocad = get_autocad_connection()
+            response = autocad.send_immediate("GET_RENDER_JOB", {
+                "jobId": job_id,
+                "wait": wait,
+                "timeout": config.render_timeout
+            }, timeout=config.render_timeout + config.cancel_timeout)
+
+            if not response.get("success", False):
+                return f"Error getting render job: {response.get('error', 'Unknown error')}"
+
+            return _render_job_result(response.get("result"))
+        except Exception as e:
+            return f"Error getting render job: {str(e)}"
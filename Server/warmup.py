@@ -0,0 +1,119 @@
+"""
+Background connection to the AutoCAD bridges at startup.
+
+The server answers MCP requests, including tool listing, as soon as it starts,
+whether AutoCAD is running yet or not. Meanwhile a daemon thread per registered
+endpoint connects to its bridge, retrying with exponential backoff until it
+succeeds or the server shuts down, and then prefetches the caches named in
+config.warmup for the active document, so the first real queries find them
+filled:
+
+    mirror  The drawing mirror: handles, types, layers and extents of all
+            model space entities (see mirror.get_mirror)
+    snaps   The snap index of all entities (see snapping.get_snap_index)
+
+A tool call arriving before the warm-up has finished simply connects on its own,
+and waits on the cache's lock if it needs the cache being loaded.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config import config
+from targets import Target, use_target
+from autocad_connection import Endpoint, get_autocad_connection, get_registry
+from mirror import get_mirror
+from snapping import get_snap_index
+
+logger = logging.getLogger("AutoCADMCP")
+
+# Caches that can be prefetched, by their name in config.warmup
+WARMERS = {
+    "mirror": get_mirror,
+    "snaps": get_snap_index,
+}
+
+class Warmup:
+    """Connects to the registered endpoints in the background and prefetches their caches."""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        # Per endpoint: its state (connecting, warming or ready), connection attempts and last error
+        self._status: Dict[str, Dict[str, Any]] = {}
+
+    def start(self):
+        """Start connecting to every registered endpoint. Returns at once."""
+        unknown = [name for name in config.warmup if name not in WARMERS]
+        if unknown:
+            logger.warning(f"Ignoring unknown warm-up caches: {', '.join(unknown)}")
+        self._stop.clear()
+        for endpoint in get_registry().endpoints():
+            self._update(endpoint.name, state="connecting", attempts=0, error=None)
+            thread = threading.Thread(target=self._run, args=(endpoint,), name=f"autocad-warmup-{endpoint.name}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Stop retrying. A connection attempt or prefetch in progress is left to finish on its own."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def status(self, name: str) -> Optional[Dict[str, Any]]:
+        """Warm-up state of an endpoint, or None if it was registered after startup."""
+        with self._lock:
+            status = self._status.get(name)
+            return dict(status) if status is not None else None
+
+    def _update(self, name: str, **values):
+        with self._lock:
+            self._status.setdefault(name, {}).update(values)
+
+    def _run(self, endpoint: Endpoint):
+        delay = config.connect_backoff_initial
+        attempts = 0
+        with use_target(Target(endpoint.name)):
+            while not self._stop.is_set():
+                attempts += 1
+                try:
+                    autocad = get_autocad_connection()
+                    break
+                except Exception as e:
+                    self._update(endpoint.name, attempts=attempts, error=str(e))
+                    if attempts == 1:
+                        logger.warning(f"AutoCAD endpoint {endpoint.name} is not available yet, retrying in the background: {str(e)}")
+                    else:
+                        logger.debug(f"Connecting to {endpoint.name} failed (attempt {attempts}): {str(e)}")
+                # Endpoints removed while waiting are not retried
+                if self._stop.wait(delay) or endpoint not in get_registry().endpoints():
+                    return
+                delay = min(delay * 2, config.connect_backoff_max)
+            else:
+                return
+
+            logger.info(f"Connected to AutoCAD endpoint {endpoint.name} after {attempts} attempt(s)")
+            self._update(endpoint.name, state="warming", attempts=attempts, error=None)
+            started = time.monotonic()
+            for name in config.warmup:
+                warm = WARMERS.get(name)
+                if warm is None or self._stop.is_set():
+                    continue
+                try:
+                    warm(autocad)
+                except Exception as e:
+                    # The cache is loaded on demand instead
+                    logger.warning(f"Could not prefetch the {name} of {endpoint.name}: {str(e)}")
+                    self._update(endpoint.name, error=f"{name}: {str(e)}")
+            elapsed = time.monotonic() - started
+            self._update(endpoint.name, state="ready", warmupSeconds=round(elapsed, 3))
+            warmed = [name for name in config.warmup if name in WARMERS]
+            if warmed:
+                logger.info(f"Warmed up {', '.join(warmed)} of {endpoint.name} in {elapsed:.2f}s")
+
+# Started by the server's lifespan
+warmup = Warmup()